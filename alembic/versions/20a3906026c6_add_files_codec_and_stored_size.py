@@ -0,0 +1,28 @@
+"""add files codec and stored size
+
+Revision ID: 20a3906026c6
+Revises: b49c3296f581
+Create Date: 2026-10-18 12:14:59.492058
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20a3906026c6'
+down_revision: Union[str, None] = 'b49c3296f581'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('files', sa.Column('codec', sa.String(length=16), nullable=True, comment='Storage codec (zstd, gzip), NULL - stored as is'))
+    op.add_column('files', sa.Column('stored_size', sa.BigInteger(), nullable=True, comment='Size of the file on disk in bytes'))
+
+
+def downgrade() -> None:
+    op.drop_column('files', 'stored_size')
+    op.drop_column('files', 'codec')
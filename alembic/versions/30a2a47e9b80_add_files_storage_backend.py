@@ -0,0 +1,26 @@
+"""add files storage backend
+
+Revision ID: 30a2a47e9b80
+Revises: 20a3906026c6
+Create Date: 2026-10-18 12:29:29.226208
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '30a2a47e9b80'
+down_revision: Union[str, None] = '20a3906026c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('files', sa.Column('storage_backend', sa.String(length=16), nullable=True, comment='Storage backend holding the file (s3), NULL - local'))
+
+
+def downgrade() -> None:
+    op.drop_column('files', 'storage_backend')
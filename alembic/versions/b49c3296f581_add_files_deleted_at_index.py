@@ -0,0 +1,28 @@
+"""add files deleted_at index
+
+Revision ID: b49c3296f581
+Revises: c7a342d46a69
+Create Date: 2026-10-18 12:10:38.250559
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b49c3296f581'
+down_revision: Union[str, None] = 'c7a342d46a69'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_files_deleted_at', 'files', ['deleted_at'], unique=False, postgresql_where=sa.text('deleted_at IS NOT NULL'), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_files_deleted_at', table_name='files', postgresql_concurrently=True)
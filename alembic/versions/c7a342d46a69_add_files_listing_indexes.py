@@ -0,0 +1,46 @@
+"""add files listing indexes
+
+Revision ID: c7a342d46a69
+Revises: 19df80488f9e
+Create Date: 2026-10-18 12:07:52.512556
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a342d46a69'
+down_revision: Union[str, None] = '19df80488f9e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+LIVE_ROWS = sa.text('deleted_at IS NULL')
+
+
+def upgrade() -> None:
+    # Индексы строятся CONCURRENTLY, чтобы не блокировать запись в files.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_files_live_created_at_id', 'files', ['created_at', 'id'], unique=False, postgresql_where=LIVE_ROWS, postgresql_concurrently=True)
+        op.create_index('ix_files_live_extension_created_at_id', 'files', ['file_extension', 'created_at', 'id'], unique=False, postgresql_where=LIVE_ROWS, postgresql_concurrently=True)
+        op.create_index('ix_files_live_format_created_at_id', 'files', ['file_format', 'created_at', 'id'], unique=False, postgresql_where=LIVE_ROWS, postgresql_concurrently=True)
+        op.create_index('ix_files_live_name_id', 'files', [sa.literal_column('file_old_name COLLATE "C"'), 'id'], unique=False, postgresql_where=LIVE_ROWS, postgresql_concurrently=True)
+        op.create_index('ix_files_live_size_id', 'files', ['file_size', 'id'], unique=False, postgresql_where=LIVE_ROWS, postgresql_concurrently=True)
+        # Поиск по подстроке имени (name_contains) требует pg_trgm
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_files_live_name_trgm', 'files', ['file_old_name'], unique=False, postgresql_using='gin', postgresql_ops={'file_old_name': 'gin_trgm_ops'}, postgresql_where=LIVE_ROWS, postgresql_concurrently=True)
+        op.drop_index('ix_files_created_at_id', table_name='files', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_files_created_at_id', 'files', ['created_at', 'id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_files_live_size_id', table_name='files', postgresql_concurrently=True)
+        op.drop_index('ix_files_live_name_trgm', table_name='files', postgresql_concurrently=True)
+        op.drop_index('ix_files_live_name_id', table_name='files', postgresql_concurrently=True)
+        op.drop_index('ix_files_live_format_created_at_id', table_name='files', postgresql_concurrently=True)
+        op.drop_index('ix_files_live_extension_created_at_id', table_name='files', postgresql_concurrently=True)
+        op.drop_index('ix_files_live_created_at_id', table_name='files', postgresql_concurrently=True)
@@ -0,0 +1,78 @@
+"""
+Сравнение двух JSON-отчётов benchmarks.run.
+
+    python -m benchmarks.compare old.json new.json --threshold 10
+
+Код возврата 1, если какая-либо метрика ухудшилась больше чем на threshold процентов.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# Метрики, для которых рост значения означает ухудшение, и наоборот.
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "mean_ms")
+HIGHER_IS_BETTER = ("req_per_s", "mb_per_s", "rows_per_s")
+KEY_FIELDS = (
+    "mode",
+    "function",
+    "size",
+    "chunk_size",
+    "page_number",
+    "page_size",
+    "concurrency",
+)
+
+
+def row_key(row: dict) -> tuple:
+    return tuple(row.get(field) for field in KEY_FIELDS)
+
+
+def compare(old: dict, new: dict, threshold: float) -> list[str]:
+    """
+    Сопоставляет строки отчётов по сценарию и параметрам замера.
+
+    :param old: Базовый отчёт.
+    :param new: Новый отчёт.
+    :param threshold: Допустимое ухудшение в процентах.
+    :return: Список описаний регрессий.
+    """
+    regressions = []
+    for scenario, new_rows in new["results"].items():
+        old_rows = {row_key(row): row for row in old["results"].get(scenario, [])}
+        for row in new_rows:
+            base = old_rows.get(row_key(row))
+            if base is None:
+                continue
+            for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+                before, after = base.get(metric), row.get(metric)
+                if not before or after is None:
+                    continue
+                change = (after - before) / before * 100
+                if metric in HIGHER_IS_BETTER:
+                    change = -change
+                line = (
+                    f"{scenario} {dict(zip(KEY_FIELDS, row_key(row)))} "
+                    f"{metric}: {before} -> {after} ({change:+.1f}%)"
+                )
+                print(line)
+                if change > threshold:
+                    regressions.append(line)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0)
+    args = parser.parse_args()
+    found = compare(
+        json.loads(args.old.read_text()),
+        json.loads(args.new.read_text()),
+        args.threshold,
+    )
+    if found:
+        print(f"\n{len(found)} regression(s):", *found, sep="\n", file=sys.stderr)
+        sys.exit(1)
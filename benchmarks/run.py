@@ -0,0 +1,452 @@
+"""
+Нагрузочные замеры загрузки, листинга и получения файлов.
+
+Запуск против приложения в том же процессе (через ASGITransport):
+    python -m benchmarks.run --output bench.json
+
+Запуск против работающего сервера:
+    python -m benchmarks.run --base-url http://127.0.0.1:8000 --output bench.json
+
+Сравнение двух прогонов:
+    python -m benchmarks.compare old.json new.json
+
+Файлы, загруженные замерами, удаляются после них из базы и из хранилища,
+настроенного для этого процесса: при --base-url оно должно совпадать
+с хранилищем сервера. Засеянные строки удаляются флагом --cleanup.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable
+from uuid import UUID
+
+import httpx
+from fastapi import UploadFile
+from sqlalchemy import delete, insert, select
+from starlette.datastructures import Headers
+
+from src.core.settings import settings
+from src.db.session import db_session
+from src.models.files import Files
+from src.services.crud.files import soft_delete_files
+from src.services.garbage_collector import GarbageCollector
+from src.services.storage import LocalStorage
+from src.services.upload_file import iter_upload_file, save_chunks_to_storage
+
+SEED_FORMAT = "application/x-benchmark-seed"
+KB = 1024
+MB = 1024 * 1024
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """
+    Перцентиль методом ближайшего ранга.
+
+    :param sorted_values: Отсортированные значения.
+    :param q: Перцентиль от 0 до 100.
+    :return: Значение перцентиля.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+async def measure(
+    operation: Callable[[int], Awaitable[int]],
+    total: int,
+    concurrency: int,
+) -> dict:
+    """
+    Выполняет operation total раз, не более concurrency одновременно.
+
+    :param operation: Корутина, принимающая номер запроса и возвращающая число переданных байт.
+    :param total: Общее количество запросов.
+    :param concurrency: Количество одновременных запросов.
+    :return: Латентность (p50/p95/p99, мс), req/s, MB/s и число ошибок.
+    """
+    latencies: list[float] = []
+    errors = 0
+    transferred = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int) -> None:
+        nonlocal errors, transferred
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                transferred += await operation(index)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run(index) for index in range(total)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "req_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mb_per_s": round(transferred / MB / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3)
+        if latencies
+        else 0.0,
+    }
+
+
+def make_upload_file(payload: bytes) -> UploadFile:
+    spooled = tempfile.SpooledTemporaryFile(max_size=MB)
+    spooled.write(payload)
+    spooled.seek(0)
+    return UploadFile(
+        file=spooled,
+        size=len(payload),
+        filename="bench.bin",
+        headers=Headers({"content-type": "application/octet-stream"}),
+    )
+
+
+async def bench_disk(args: argparse.Namespace) -> list[dict]:
+    """
+    Запись загрузки в локальное хранилище, как при загрузке через API:
+    save_chunks_to_storage (LocalStorage.put_stream во временный файл)
+    и публикация по итоговому пути, без HTTP и базы данных.
+    """
+    results = []
+    chunk_sizes = sorted({settings.UPLOAD_CHUNK_SIZE, *args.chunk_sizes})
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        storage = LocalStorage(Path(tmp_dir))
+        for size in args.sizes:
+            payload = os.urandom(size)
+            for chunk_size in chunk_sizes:
+
+                async def operation(index: int) -> int:
+                    key = f"bench/{size}-{chunk_size}-{index}.bin"
+                    staged, _ = await save_chunks_to_storage(
+                        iter_upload_file(make_upload_file(payload), chunk_size),
+                        key,
+                        storage,
+                        content_type="application/octet-stream",
+                    )
+                    await staged.publish()
+                    await storage.delete(key)
+                    return size
+
+                stats = await measure(operation, args.requests, args.concurrency)
+                results.append(
+                    {
+                        "function": "save_chunks_to_storage",
+                        "size": size,
+                        "chunk_size": chunk_size,
+                    }
+                    | stats
+                )
+                print_row("disk", results[-1])
+    return results
+
+
+async def bench_upload(
+    client: httpx.AsyncClient, args: argparse.Namespace, uploaded_ids: list
+) -> list[dict]:
+    """
+    Загрузка через multipart (обычная и large) и сырым телом, одиночная и параллельная.
+    Идентификаторы загруженных файлов добавляются в uploaded_ids для удаления.
+    """
+    results = []
+    for size in args.sizes:
+        payload = os.urandom(size)
+        large = size > settings.MAX_SIZE_FILE
+        modes = [("multipart", chunk_size) for chunk_size in args.chunk_sizes]
+        if not large:
+            modes.insert(0, ("multipart", None))
+        modes.append(("raw", None))
+        for concurrency in sorted({1, args.concurrency}):
+            for mode, chunk_size in modes:
+
+                async def operation(index: int) -> int:
+                    if mode == "raw":
+                        response = await client.post(
+                            "/api/files/upload/stream",
+                            content=payload,
+                            headers={"X-File-Name": "bench.bin"},
+                        )
+                    else:
+                        params = {}
+                        if chunk_size is not None:
+                            params = {"large": True, "chunk_size": chunk_size}
+                        response = await client.post(
+                            "/api/files/upload",
+                            files={"file": ("bench.bin", payload, "application/octet-stream")},
+                            params=params,
+                        )
+                    response.raise_for_status()
+                    uploaded_ids.append(UUID(response.json()["id"]))
+                    return size
+
+                stats = await measure(operation, args.requests, concurrency)
+                results.append(
+                    {"mode": mode, "size": size, "chunk_size": chunk_size} | stats
+                )
+                print_row("upload", results[-1])
+    return results
+
+
+async def seed_files(rows: int) -> list:
+    """
+    Дозаполняет таблицу files служебными строками до rows штук.
+
+    :param rows: Требуемое количество строк с file_format SEED_FORMAT.
+    :return: Идентификаторы засеянных строк.
+    """
+    async with db_session.session_factory() as session:
+        ids = list(
+            await session.scalars(select(Files.id).where(Files.file_format == SEED_FORMAT))
+        )
+        batch_size = 5000
+        for start in range(len(ids), rows, batch_size):
+            values = [
+                {
+                    "file_size": random.randint(1, 10 * MB),
+                    "file_path": f"benchmark/seed/{index}",
+                    "file_format": SEED_FORMAT,
+                    "file_old_name": f"seed-{index}.bin",
+                    "file_new_name": f"seed-{index}.bin",
+                    "file_extension": ".bin",
+                }
+                for index in range(start, min(start + batch_size, rows))
+            ]
+            ids.extend(await session.scalars(insert(Files).returning(Files.id), values))
+            await session.commit()
+    return ids
+
+
+async def cleanup_seed() -> None:
+    async with db_session.session_factory() as session:
+        await session.execute(delete(Files).where(Files.file_format == SEED_FORMAT))
+        await session.commit()
+
+
+async def cleanup_uploads(file_ids: list) -> None:
+    """
+    Удаляет файлы, загруженные замерами: строки вместе с агрегатами file_stats
+    и содержимое в хранилище (см. GarbageCollector.purge_deleted_files).
+
+    :param file_ids: Идентификаторы загруженных файлов.
+    :return: None
+    """
+    if not file_ids:
+        return
+    async with db_session.session_factory() as session:
+        await soft_delete_files(session, file_ids)
+    purged = await GarbageCollector(db_session.session_factory).purge_deleted_files(
+        file_ids=file_ids
+    )
+    print(f"[cleanup] removed {purged} uploaded files", file=sys.stderr)
+
+
+async def bench_listing(
+    client: httpx.AsyncClient, args: argparse.Namespace, total_rows: int
+) -> list[dict]:
+    """
+    Листинг с OFFSET на разной глубине и полный обход курсорной пагинацией.
+    """
+    results = []
+    page_size = args.page_size
+    max_page = max(total_rows // page_size, 1)
+    for depth in sorted({1, max_page // 10 or 1, max_page // 2 or 1, max_page}):
+
+        async def operation(index: int) -> int:
+            response = await client.get(
+                "/api/files/", params={"page_size": page_size, "page_number": depth}
+            )
+            response.raise_for_status()
+            return len(response.content)
+
+        stats = await measure(operation, args.requests, args.concurrency)
+        results.append({"mode": "offset", "page_number": depth, "page_size": page_size} | stats)
+        print_row("listing", results[-1])
+
+    pages = 0
+    rows = 0
+    cursor = None
+    latencies = []
+    started = time.perf_counter()
+    while True:
+        params = {"page_size": min(page_size * 10, 1000)}
+        if cursor:
+            params["cursor"] = cursor
+        start = time.perf_counter()
+        response = await client.get("/api/files/scan", params=params)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        page = response.json()
+        pages += 1
+        rows += len(page["items"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    results.append(
+        {
+            "mode": "scan",
+            "pages": pages,
+            "rows": rows,
+            "elapsed_s": round(elapsed, 4),
+            "rows_per_s": round(rows / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        }
+    )
+    print_row("listing", results[-1])
+    return results
+
+
+async def bench_lookup(
+    client: httpx.AsyncClient, args: argparse.Namespace, ids: list
+) -> list[dict]:
+    """
+    Получение метаданных по ID: случайные ID и один «горячий» ID.
+    """
+    results = []
+    hot_id = ids[0]
+    for mode in ("random", "hot"):
+
+        async def operation(index: int) -> int:
+            file_id = hot_id if mode == "hot" else random.choice(ids)
+            response = await client.get(f"/api/files/{file_id}")
+            response.raise_for_status()
+            return len(response.content)
+
+        stats = await measure(operation, args.requests * 10, args.concurrency)
+        results.append({"mode": mode} | stats)
+        print_row("lookup", results[-1])
+    return results
+
+
+def print_row(scenario: str, row: dict) -> None:
+    keys = ("mode", "function", "size", "chunk_size", "page_number", "concurrency")
+    label = " ".join(f"{key}={row[key]}" for key in keys if row.get(key) is not None)
+    print(
+        f"[{scenario}] {label}: p50={row.get('p50_ms')}ms p95={row.get('p95_ms')}ms "
+        f"p99={row.get('p99_ms')}ms req/s={row.get('req_per_s', '-')} "
+        f"MB/s={row.get('mb_per_s', '-')}",
+        file=sys.stderr,
+    )
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_client(base_url: str | None) -> httpx.AsyncClient:
+    timeout = httpx.Timeout(300.0)
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=timeout)
+    from main import app
+
+    return httpx.AsyncClient(
+        base_url=settings.HOST_URL,
+        transport=httpx.ASGITransport(app=app),
+        timeout=timeout,
+    )
+
+
+async def main(args: argparse.Namespace) -> dict:
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": args.base_url or "asgi",
+            "args": vars(args),
+        },
+        "results": {},
+    }
+    if "disk" in args.scenarios:
+        report["results"]["disk"] = await bench_disk(args)
+
+    async with make_client(args.base_url) as client:
+        if "upload" in args.scenarios:
+            uploaded_ids = []
+            try:
+                report["results"]["upload"] = await bench_upload(
+                    client, args, uploaded_ids
+                )
+            finally:
+                await cleanup_uploads(uploaded_ids)
+        if {"listing", "lookup"} & set(args.scenarios):
+            ids = await seed_files(args.seed_rows)
+            if "listing" in args.scenarios:
+                report["results"]["listing"] = await bench_listing(
+                    client, args, len(ids)
+                )
+            if "lookup" in args.scenarios:
+                report["results"]["lookup"] = await bench_lookup(client, args, ids)
+            if args.cleanup:
+                await cleanup_seed()
+    await db_session.engine.dispose()
+    return report
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--base-url",
+        help="Адрес работающего сервера; без него приложение запускается в процессе",
+    )
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        default=["disk", "upload", "listing", "lookup"],
+        choices=["disk", "upload", "listing", "lookup"],
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[16 * KB, 512 * KB, 4 * MB, 16 * MB]
+    )
+    parser.add_argument(
+        "--chunk-sizes", nargs="+", type=int, default=[64 * KB, MB, 4 * MB]
+    )
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed-rows", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument(
+        "--cleanup", action="store_true", help="Удалить засеянные строки после замеров"
+    )
+    parser.add_argument("--output", type=Path, help="Файл для JSON-результатов")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    result = asyncio.run(main(arguments))
+    output = json.dumps(result, indent=2, default=str)
+    if arguments.output:
+        arguments.output.write_text(output)
+    else:
+        print(output)
@@ -1,19 +1,61 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
-from pathlib import Path
 
 import uvicorn
 from fastapi import FastAPI
-from src.utils.logger import LOGGING
-from src.core.settings import settings
-from src.api.v1 import files
+from src.utils.logger import LOGGING, start_log_listeners, stop_log_listeners
+from src.core.settings import UPLOAD_DIR, settings
+from src.api.v1 import files, monitoring, uploads
+from src.db.session import db_session
+from src.services.admission import AdmissionMiddleware
+from src.services.atomic_write import reap_temp_files
+from src.services.compression import check_codec
+from src.services.crud.files import metadata_writer
+from src.services.file_stats import StatsRollup
+from src.services.garbage_collector import GarbageCollector
+from src.services.io_executor import io_executor
+from src.services.replication import ReplicationWorker
+from src.services.storage import close_storages
+from src.services.upload_metrics import UploadMetricsMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    media_dir = Path("./media")
-    media_dir.mkdir(exist_ok=True)
+    start_log_listeners()
+    check_codec()
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    # При нескольких рабочих процессах фоновые задачи запускает только процесс 0
+    primary = settings.server_settings.WORKER_INDEX == 0
+    reaper = None
+    if primary:
+        reaper = asyncio.create_task(reap_temp_files(db_session.session_factory))
+    replication_worker = None
+    if primary and settings.replication_settings.REPLICATION_ENABLED:
+        replication_worker = ReplicationWorker(db_session.session_factory)
+        await replication_worker.start()
+    garbage_collector = None
+    if primary and settings.gc_settings.GC_ENABLED:
+        garbage_collector = GarbageCollector(db_session.session_factory)
+        await garbage_collector.start()
+    stats_rollup = None
+    if primary:
+        stats_rollup = StatsRollup(db_session.session_factory)
+        await stats_rollup.start()
     yield
+    if reaper is not None:
+        reaper.cancel()
+        await asyncio.gather(reaper, return_exceptions=True)
+    if replication_worker is not None:
+        await replication_worker.stop()
+    if garbage_collector is not None:
+        await garbage_collector.stop()
+    if stats_rollup is not None:
+        await stats_rollup.stop()
+    await metadata_writer.stop()
+    await close_storages()
+    io_executor.shutdown(wait=True)
+    stop_log_listeners()
 
 
 app = FastAPI(
@@ -22,14 +64,25 @@ app = FastAPI(
     openapi_url="/api/openapi.json",
     lifespan=lifespan,
 )
+app.add_middleware(UploadMetricsMiddleware)
+# Внешний слой: отклонённые загрузки не читают тело и не попадают в метрики загрузок
+app.add_middleware(AdmissionMiddleware)
 
 app.include_router(files.router, prefix="/api/files", tags=["files"])
+app.include_router(uploads.router, prefix="/api/files/uploads", tags=["uploads"])
+app.include_router(monitoring.router, prefix="/api/monitoring", tags=["monitoring"])
+app.include_router(monitoring.metrics_router)
 
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        reload=True,
-        log_config=LOGGING,
-        log_level=logging.DEBUG,
-    )
+    if settings.server_settings.SERVER_MODE == "production":
+        from src.server import main
+
+        main()
+    else:
+        uvicorn.run(
+            "main:app",
+            reload=True,
+            log_config=LOGGING,
+            log_level=logging.DEBUG,
+        )
@@ -1,14 +1,41 @@
-from typing import Annotated
+from datetime import date, datetime
+from typing import Annotated, Literal
+from urllib.parse import unquote
 from uuid import UUID
 
-from fastapi import Depends, APIRouter, Query, HTTPException, Header
+from fastapi import Depends, APIRouter, Query, HTTPException, Header, Request, Response
 from fastapi import File, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import StreamingResponse
 
 from src.core.settings import settings
 from src.db.session import db_session
-from src.schemas.files import ShowFilesSchema
-from src.services.crud.files import save_file_to_base, get_file, get_files
+from src.schemas.files import (
+    ArchiveRequestSchema,
+    BatchUploadItemSchema,
+    FileStatsSchema,
+    FilesFilterSchema,
+    FilesPageSchema,
+    ShowFilesSchema,
+)
+from src.services.archive_files import build_archive_query, iter_archive
+from src.services.crud.files import (
+    save_file_to_base,
+    save_files_to_base,
+    save_raw_file_to_base,
+    count_files,
+    get_file,
+    get_files,
+    get_files_page,
+    soft_delete_file,
+)
+from src.services.download_file import accepts_encoding, build_file_response
+from src.services.export_files import (
+    EXPORT_MEDIA_TYPES,
+    build_export_query,
+    iter_export,
+)
+from src.services.file_stats import StatsGroup, get_file_stats
 from src.utils.raising_http_excp import RaiseHttpException
 
 router = APIRouter()
@@ -16,24 +43,191 @@ router = APIRouter()
 
 @router.get("/", response_model=list[ShowFilesSchema])
 async def files_from_db(
+    response: Response,
     page_size: int = Query(
         ge=1, le=100, description="Количество элементов на странице", default=1
     ),
     page_number: int = Query(ge=1, description="Номер страницы", default=1),
+    filters: FilesFilterSchema = Depends(),
+    with_total: bool = Query(
+        default=False, description="Вернуть итог в заголовке X-Total-Count"
+    ),
     session: AsyncSession = Depends(db_session.get_session),
 ):
     """
-    Получить список файлов из базы данных с пагинацией.
+    Получить список файлов из базы данных с фильтрами, сортировкой и пагинацией.
 
     - **page_size**: Количество элементов на странице (от 1 до 100).
     - **page_number**: Номер страницы для получения.
+    - **file_format** / **file_extension**: Точное совпадение (один из них).
+    - **size_min** / **size_max**: Диапазон размера, только с sort=file_size.
+    - **created_from** / **created_to**: Диапазон даты создания, только с sort=created_at.
+    - **name_prefix**: Начало имени, только с sort=name.
+    - **name_contains**: Подстрока имени (от 3 символов), сочетается с любыми фильтрами.
+    - **sort**: created_at, file_size или name; с '-' - по убыванию.
+    - **with_total**: Итог в заголовке X-Total-Count. Без фильтров и с фильтрами
+      только по file_format/file_extension он точный и берётся из агрегатов,
+      иначе точный до LISTING_EXACT_COUNT_LIMIT строк, дальше - оценка
+      планировщика (X-Total-Count-Exact: false).
 
     **Ответы**:
     - **200 OK**: Список файлов.
+    - **400 Bad Request**: Если сочетание фильтров и сортировки не обслуживается индексами.
     - **404 Not Found**: Если не найдено файлов (в случае пустой базы).
     """
-    return await get_files(
-        session=session, page_size=page_size, page_number=page_number
+    files = await get_files(
+        session=session, page_size=page_size, page_number=page_number, filters=filters
+    )
+    if with_total:
+        total, exact = await count_files(session=session, filters=filters)
+        response.headers["X-Total-Count"] = str(total)
+        response.headers["X-Total-Count-Exact"] = "true" if exact else "false"
+    return files
+
+
+@router.get("/stats", response_model=FileStatsSchema)
+async def files_stats(
+    group_by: list[StatsGroup] = Query(
+        default=["file_format"], description="Поля группировки"
+    ),
+    file_format: str | None = Query(default=None, description="MIME-тип файлов"),
+    file_extension: str | None = Query(default=None, description="Расширение файлов"),
+    day_from: date | None = Query(
+        default=None, description="Созданные не раньше этого дня (UTC)"
+    ),
+    day_to: date | None = Query(
+        default=None, description="Созданные не позже этого дня (UTC)"
+    ),
+    session: AsyncSession = Depends(db_session.get_session),
+):
+    """
+    Количество и суммарный размер неудалённых файлов по типу, расширению
+    и дню создания. Читаются агрегаты, которые обновляются при загрузке
+    и удалении файлов, поэтому запрос не сканирует таблицу файлов.
+
+    - **group_by**: file_format, file_extension и/или day (можно несколько).
+    - **file_format** / **file_extension**: Только файлы с этим типом или расширением.
+    - **day_from** / **day_to**: Диапазон дней создания, включительно.
+
+    **Ответы**:
+    - **200 OK**: Итоги и значения по группам.
+    """
+    groups = await get_file_stats(
+        session=session,
+        group_by=list(dict.fromkeys(group_by)),
+        file_format=file_format,
+        file_extension=file_extension,
+        day_from=day_from,
+        day_to=day_to,
+    )
+    return FileStatsSchema(
+        files_count=sum(group["files_count"] for group in groups),
+        total_size=sum(group["total_size"] for group in groups),
+        groups=groups,
+    )
+
+
+@router.get("/scan", response_model=FilesPageSchema)
+async def files_scan(
+    page_size: int = Query(
+        ge=1, le=1000, description="Количество элементов на странице", default=100
+    ),
+    cursor: str | None = Query(
+        default=None, description="Курсор next_cursor из предыдущего ответа"
+    ),
+    session: AsyncSession = Depends(db_session.get_session),
+):
+    """
+    Получить список файлов с курсорной пагинацией, упорядоченный по (created_at, id).
+    Подходит для полного обхода таблицы: глубина страницы не влияет на скорость.
+
+    - **page_size**: Количество элементов на странице (от 1 до 1000).
+    - **cursor**: Значение next_cursor из предыдущего ответа.
+
+    **Ответы**:
+    - **200 OK**: Страница файлов и курсор следующей страницы (null на последней).
+    - **400 Bad Request**: Если курсор повреждён.
+    """
+    items, next_cursor = await get_files_page(
+        session=session, page_size=page_size, cursor=cursor
+    )
+    return FilesPageSchema(items=items, next_cursor=next_cursor)
+
+
+@router.get("/export")
+async def files_export(
+    export_format: Literal["ndjson", "csv"] = Query(
+        default="ndjson", alias="format", description="Формат выгрузки"
+    ),
+    file_format: str | None = Query(default=None, description="MIME-тип файлов"),
+    created_from: datetime | None = Query(
+        default=None, description="Созданные не раньше этого момента"
+    ),
+    created_to: datetime | None = Query(
+        default=None, description="Созданные раньше этого момента"
+    ),
+    accept_encoding: str = Header(default=""),
+):
+    """
+    Выгрузить весь каталог файлов одним потоком в формате NDJSON или CSV.
+
+    Строки читаются серверным курсором пачками, поэтому память не зависит
+    от размера таблицы. Если клиент принимает gzip (Accept-Encoding
+    с ненулевым q), поток сжимается на лету.
+
+    - **format**: ndjson (по умолчанию) или csv.
+    - **file_format**: Только файлы с этим MIME-типом.
+    - **created_from** / **created_to**: Диапазон даты создания.
+
+    **Ответы**:
+    - **200 OK**: Поток строк каталога.
+    """
+    compress = accepts_encoding(accept_encoding, "gzip")
+    headers = {
+        "Content-Disposition": f'attachment; filename="files.{export_format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    stmt = build_export_query(
+        file_format=file_format, created_from=created_from, created_to=created_to
+    )
+    return StreamingResponse(
+        iter_export(stmt, export_format, compress=compress),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers=headers,
+    )
+
+
+@router.post("/archive")
+async def files_archive(archive_request: ArchiveRequestSchema):
+    """
+    Скачать несколько файлов одним ZIP-архивом.
+
+    Архив собирается на лету из хранилища и отдаётся потоком без временных
+    файлов (ZIP64 для файлов и архивов больше 4 ГБ). Уже сжатые форматы
+    сохраняются в архиве без сжатия, текстовые сжимаются. Одинаковые имена
+    дополняются номером, файлы, которых нет в хранилище, пропускаются.
+
+    - **ids**: Список ID файлов (не больше ARCHIVE_MAX_IDS).
+    - **filters**: Фильтры листинга (как в GET /api/files/), если ids не переданы.
+
+    **Ответы**:
+    - **200 OK**: Поток ZIP-архива.
+    - **400 Bad Request**: Если сочетание фильтров и сортировки не обслуживается индексами.
+    - **413 Payload Too Large**: Если передано больше ARCHIVE_MAX_IDS ID.
+    """
+    ids = archive_request.ids
+    if ids is not None and len(ids) > settings.ARCHIVE_MAX_IDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many files, at most {settings.ARCHIVE_MAX_IDS} allowed.",
+        )
+    stmt = build_archive_query(ids=ids, filters=archive_request.filters)
+    return StreamingResponse(
+        iter_archive(stmt),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="files.zip"'},
     )
 
 
@@ -56,6 +250,53 @@ async def file_from_db(
     return file
 
 
+@router.api_route("/{filed_id}/content", methods=["GET", "HEAD"])
+async def file_content(
+    filed_id: UUID,
+    session: AsyncSession = Depends(db_session.get_session),
+):
+    """
+    Скачать содержимое файла по его ID.
+
+    Поддерживаются заголовки Range (один или несколько диапазонов),
+    If-Range, If-None-Match и If-Modified-Since.
+
+    - **filed_id**: Уникальный идентификатор файла.
+
+    **Ответы**:
+    - **200 OK**: Содержимое файла целиком.
+    - **206 Partial Content**: Запрошенные диапазоны байт.
+    - **304 Not Modified**: Если файл не изменился.
+    - **404 Not Found**: Если файл с таким ID не найден.
+    - **416 Range Not Satisfiable**: Если диапазон выходит за пределы файла.
+    """
+    file = await get_file(filed_id=filed_id, session=session)
+    RaiseHttpException.check_is_exist(file)
+    return await build_file_response(file)
+
+
+@router.delete("/{filed_id}", status_code=204)
+async def delete_file(
+    filed_id: UUID,
+    session: AsyncSession = Depends(db_session.get_session),
+):
+    """
+    Удалить файл по его ID.
+
+    Файл сразу пропадает из выдачи, а строка в базе и файл на диске
+    удаляются сборщиком мусора через GC_RETENTION секунд.
+
+    - **filed_id**: Уникальный идентификатор файла.
+
+    **Ответы**:
+    - **204 No Content**: Файл удалён.
+    - **404 Not Found**: Если файл с таким ID не найден.
+    """
+    if not await soft_delete_file(session=session, filed_id=filed_id):
+        raise HTTPException(status_code=404, detail="Not found")
+    return Response(status_code=204)
+
+
 def validate_chunk_size_if_large(large: bool, chunk_size: int | None = None):
     if large and chunk_size is None:
         raise HTTPException(
@@ -91,3 +332,67 @@ async def upload_file(
     return await save_file_to_base(
         file=file, session=session, large=large, chunk_size=chunk_size
     )
+
+
+@router.post("/upload/stream", response_model=ShowFilesSchema)
+async def upload_raw_file(
+    request: Request,
+    file_name: str = Header(
+        alias="X-File-Name",
+        description="Имя файла (допускается percent-encoding для не-ASCII символов)",
+    ),
+    content_type: str = Header(default="application/octet-stream"),
+    content_length: int | None = Header(default=None, ge=0),
+    session: AsyncSession = Depends(db_session.get_session),
+):
+    """
+    Загрузить файл сырым телом запроса, без multipart.
+
+    Тело читается из потока запроса и пишется сразу в итоговое место хранения,
+    ограничение размера проверяется по мере поступления данных.
+
+    - **X-File-Name**: Исходное имя файла.
+    - **Content-Type**: MIME-тип файла (по умолчанию application/octet-stream).
+
+    **Ответы**:
+    - **200 OK**: Возвращает информацию о загруженном файле.
+    - **413 Payload Too Large**: Если размер файла превышает максимально допустимый размер.
+    """
+    if content_length is not None and content_length > settings.STEAM_MAX_SIZE_FILE:
+        raise HTTPException(status_code=413, detail="File is too large.")
+    filename = unquote(file_name)
+    if not filename.strip():
+        raise HTTPException(status_code=400, detail="X-File-Name must not be empty.")
+    return await save_raw_file_to_base(
+        chunks=request.stream(),
+        filename=filename,
+        content_type=content_type.split(";")[0].strip(),
+        max_size=settings.STEAM_MAX_SIZE_FILE,
+        session=session,
+    )
+
+
+@router.post("/upload/batch", response_model=list[BatchUploadItemSchema])
+async def upload_files_batch(
+    files: list[UploadFile] = File(...),
+    session: AsyncSession = Depends(db_session.get_session),
+):
+    """
+    Загрузить несколько файлов одним multipart-запросом.
+
+    Файлы пишутся на диск параллельно, метаданные всех сохранённых файлов
+    записываются в базу одним запросом. Ошибка одного файла не отменяет
+    сохранение остальных.
+
+    - **files**: Файлы, которые загружаются через POST запрос.
+
+    **Ответы**:
+    - **200 OK**: Результат по каждому файлу: status_code, detail и сохранённый файл.
+    - **413 Payload Too Large**: Если в запросе больше файлов, чем допустимо.
+    """
+    if len(files) > settings.BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many files, at most {settings.BATCH_MAX_FILES} allowed.",
+        )
+    return await save_files_to_base(files=files, session=session)
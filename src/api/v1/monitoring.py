@@ -0,0 +1,119 @@
+from fastapi import APIRouter
+from starlette.responses import Response
+
+from src.db.session import db_session
+from src.services.admission import admission_controller
+from src.services.cache import file_cache
+from src.services.crud.files import metadata_writer
+from src.services.garbage_collector import gc_stats
+from src.services.io_executor import io_executor
+from src.services.prometheus import PROMETHEUS_CONTENT_TYPE
+from src.utils.metrics import REGISTRY
+
+router = APIRouter()
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    Метрики в текстовом формате Prometheus: длительности этапов загрузки,
+    пропускная способность, загрузки в процессе, пулы соединений и потоков,
+    групповая запись метаданных, кеш и сборщик мусора.
+    """
+    return Response(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/db-pool")
+async def db_pool_stats():
+    """
+    Состояние пула соединений с базой данных.
+
+    - **checked_out**: Соединения, выданные в данный момент.
+    - **saturation**: Доля занятых соединений от pool_size + max_overflow.
+    - **checkout_wait_seconds**: Гистограмма времени ожидания выдачи соединения (p50/p95/p99).
+    - **checkout_timeouts**: Количество ожиданий, завершившихся по таймауту.
+
+    **Ответы**:
+    - **200 OK**: Статистика пула.
+    """
+    return db_session.pool_stats()
+
+
+@router.get("/admission")
+async def admission_stats():
+    """
+    Состояние допуска загрузок (ADMISSION_*) в этом процессе.
+
+    - **in_flight** / **in_flight_bytes**: Допущенные загрузки и учтённые байты их тел.
+    - **clients**: Клиенты с загрузками в процессе.
+    - **admitted**: Допущенные загрузки с момента запуска.
+    - **rejected**: Отказы по причинам: uploads, bytes (503) и client (429).
+
+    **Ответы**:
+    - **200 OK**: Статистика допуска.
+    """
+    return admission_controller.stats()
+
+
+@router.get("/cache")
+async def file_cache_stats():
+    """
+    Счётчики кеша метаданных файлов.
+
+    - **local_hits** / **shared_hits**: Попадания в кеш процесса и в общий кеш.
+    - **misses**: Промахи, закончившиеся запросом в базу данных.
+
+    **Ответы**:
+    - **200 OK**: Статистика кеша (null, если кеш выключен).
+    """
+    return file_cache.stats() if file_cache is not None else None
+
+
+@router.get("/io-executor")
+async def io_executor_stats():
+    """
+    Состояние пула потоков для файловых операций.
+
+    - **queued**: Операции, ожидающие свободного потока (глубина очереди).
+    - **in_flight**: Выполняющиеся операции.
+    - **queue_wait_seconds**: Гистограмма времени ожидания в очереди (p50/p95/p99).
+    - **task_duration_seconds**: Гистограмма длительности операций.
+
+    **Ответы**:
+    - **200 OK**: Статистика пула.
+    """
+    return io_executor.stats()
+
+
+@router.get("/metadata-writer")
+async def metadata_writer_stats():
+    """
+    Состояние групповой записи метаданных (METADATA_WRITER_ENABLED).
+
+    - **pending**: Строки, ожидающие записи.
+    - **batch_size**: Гистограмма размеров пачек.
+    - **queue_wait_seconds**: Гистограмма времени ожидания строки до записи пачки.
+    - **commit_duration_seconds**: Гистограмма длительности вставки и commit пачки.
+
+    **Ответы**:
+    - **200 OK**: Статистика записи метаданных.
+    """
+    return metadata_writer.stats()
+
+
+@router.get("/gc")
+async def garbage_collector_stats():
+    """
+    Счётчики сборщика мусора с момента запуска процесса.
+
+    - **purged_files**: Окончательно удалённые строки файлов.
+    - **unlinked_files**: Удалённые с диска файлы.
+    - **orphan_files**: Файлы на диске без строк в базе.
+    - **missing_files**: Строки, файлов которых нет на диске.
+    - **expired_upload_sessions**: Удалённые просроченные сессии загрузки.
+
+    **Ответы**:
+    - **200 OK**: Статистика сборщика мусора.
+    """
+    return gc_stats()
@@ -0,0 +1,160 @@
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from src.core.settings import STORAGE_ROOT, settings
+from src.db.session import db_session
+from src.schemas.files import ShowFilesSchema
+from src.schemas.upload_sessions import (
+    CreateUploadSessionSchema,
+    ShowUploadSessionSchema,
+)
+from src.services.crud.upload_sessions import (
+    complete_upload_session,
+    create_upload_session,
+    delete_upload_session,
+    get_upload_session,
+    mark_part_received,
+    to_show_schema,
+)
+from src.services.resumable_upload import get_part_range, get_parts_count, write_part
+from src.utils.raising_http_excp import RaiseHttpException
+
+router = APIRouter()
+
+
+@router.post(
+    "/",
+    response_model=ShowUploadSessionSchema,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_upload(
+    data: CreateUploadSessionSchema,
+    session: AsyncSession = Depends(db_session.get_session),
+):
+    """
+    Создать сессию возобновляемой загрузки.
+
+    Место на диске выделяется под каждую часть при её загрузке, части можно
+    загружать параллельно и в любом порядке.
+
+    - **file_name**: Исходное имя файла.
+    - **file_format**: MIME-тип файла.
+    - **file_size**: Полный размер файла в байтах.
+    - **part_size**: Размер части в байтах (по умолчанию 8MB).
+
+    **Ответы**:
+    - **201 Created**: Возвращает сессию загрузки.
+    - **400 Bad Request**: Если размер части меньше допустимого.
+    - **413 Payload Too Large**: Если размер файла превышает максимально допустимый размер.
+    - **422 Unprocessable Entity**: Если размер части больше 2 GB.
+    """
+    if data.file_size > settings.RESUMABLE_MAX_SIZE_FILE:
+        raise HTTPException(status_code=413, detail="File is too large.")
+    if data.part_size is not None and data.part_size < settings.UPLOAD_PART_MIN_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"part_size must be at least {settings.UPLOAD_PART_MIN_SIZE} bytes.",
+        )
+    upload = await create_upload_session(session, data)
+    return to_show_schema(upload)
+
+
+@router.get("/{upload_id}", response_model=ShowUploadSessionSchema)
+async def get_upload(
+    upload_id: UUID,
+    session: AsyncSession = Depends(db_session.get_session),
+):
+    """
+    Получить состояние сессии загрузки: список уже принятых частей.
+    Используется клиентом для возобновления после обрыва соединения.
+
+    **Ответы**:
+    - **200 OK**: Возвращает сессию загрузки.
+    - **404 Not Found**: Если сессия не найдена или истекла.
+    """
+    upload = await get_upload_session(session, upload_id)
+    RaiseHttpException.check_is_exist(upload)
+    return to_show_schema(upload)
+
+
+@router.put("/{upload_id}/parts/{index}", response_model=ShowUploadSessionSchema)
+async def upload_part(
+    request: Request,
+    upload_id: UUID,
+    index: int = Path(ge=0, description="Номер части, начиная с нуля"),
+    session: AsyncSession = Depends(db_session.get_session),
+):
+    """
+    Загрузить часть файла сырым телом запроса.
+    Часть пишется в файл сессии по своему смещению, повторная
+    загрузка той же части перезаписывает её.
+
+    **Ответы**:
+    - **200 OK**: Возвращает обновлённую сессию загрузки.
+    - **400 Bad Request**: Если размер части не совпадает с ожидаемым.
+    - **404 Not Found**: Если сессия или часть с таким номером не найдена.
+    - **507 Insufficient Storage**: Если на диске нет места под часть.
+    """
+    upload = await get_upload_session(session, upload_id)
+    RaiseHttpException.check_is_exist(upload)
+    if index >= get_parts_count(upload.file_size, upload.part_size):
+        raise HTTPException(status_code=404, detail="Part not found")
+    # Соединение с базой не держим, пока принимается тело части
+    await session.commit()
+
+    offset, part_size = get_part_range(upload, index)
+    await write_part(
+        path=STORAGE_ROOT / upload.temp_path,
+        offset=offset,
+        expected_size=part_size,
+        chunks=request.stream(),
+    )
+    await mark_part_received(session, upload_id, index)
+    await session.refresh(upload)
+    return to_show_schema(upload)
+
+
+@router.post("/{upload_id}/complete", response_model=ShowFilesSchema)
+async def complete_upload(
+    upload_id: UUID,
+    session: AsyncSession = Depends(db_session.get_session),
+):
+    """
+    Завершить загрузку: файл переносится в хранилище без склейки частей
+    и записывается в базу данных.
+
+    **Ответы**:
+    - **200 OK**: Возвращает информацию о загруженном файле.
+    - **404 Not Found**: Если сессия не найдена или истекла.
+    - **409 Conflict**: Если приняты не все части.
+    """
+    upload = await get_upload_session(session, upload_id, for_update=True)
+    RaiseHttpException.check_is_exist(upload)
+    parts_count = get_parts_count(upload.file_size, upload.part_size)
+    missing = sorted(set(range(parts_count)) - set(upload.received_parts))
+    if missing:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload is incomplete, missing parts: {missing[:100]}",
+        )
+    return await complete_upload_session(session, upload)
+
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload(
+    upload_id: UUID,
+    session: AsyncSession = Depends(db_session.get_session),
+):
+    """
+    Отменить сессию загрузки и освободить место на диске.
+
+    **Ответы**:
+    - **204 No Content**: Сессия удалена.
+    - **404 Not Found**: Если сессия не найдена или истекла.
+    """
+    upload = await get_upload_session(session, upload_id)
+    RaiseHttpException.check_is_exist(upload)
+    await delete_upload_session(session, upload)
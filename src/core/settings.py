@@ -1,11 +1,17 @@
+import os
 from pathlib import Path
+from typing import Literal
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
-UPLOAD_DIR = BASE_DIR / "media"
+# Корень хранилища: Files.file_path и пути сессий загрузки задаются относительно него
+STORAGE_ROOT = Path(os.getenv("STORAGE_ROOT", BASE_DIR)).resolve()
+UPLOAD_DIR = STORAGE_ROOT / "media"
+BLOBS_DIR = UPLOAD_DIR / "blobs"
+UPLOAD_SESSIONS_DIR = UPLOAD_DIR / ".uploads"
 
 
 class DBSettings(BaseSettings):
@@ -14,12 +20,107 @@ class DBSettings(BaseSettings):
     DB_USER: str = 'postgres'
     DB_PASS: str = 'postgres'
     DB_NAME: str = 'postgres'
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # seconds
+    DB_POOL_RECYCLE: int = 1800  # seconds, -1 disables recycling
+    DB_POOL_PRE_PING: bool = True
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500
 
     @property
     def DATABASE_URL_ASYNC(self):
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
 
+class ReplicationSettings(BaseSettings):
+    REPLICATION_ENABLED: bool = False
+    CLOUD_STORAGE_URL: str = "https://fake-cloud-storage.com/upload"
+    REPLICATION_CONCURRENCY: int = 8
+    REPLICATION_BATCH_SIZE: int = 32
+    REPLICATION_POLL_INTERVAL: float = 1.0  # seconds
+    REPLICATION_LEASE: int = 600  # seconds, after which a claimed job is retried
+    REPLICATION_MAX_ATTEMPTS: int = 10
+    REPLICATION_BACKOFF_BASE: float = 2.0  # seconds
+    REPLICATION_BACKOFF_MAX: float = 3600.0  # seconds
+    REPLICATION_TIMEOUT: float = 300.0  # seconds per upload
+    REPLICATION_CHUNK_SIZE: int = 1024 * 256  # 256 kb
+
+
+class GCSettings(BaseSettings):
+    GC_ENABLED: bool = False
+    GC_INTERVAL: float = 300.0  # seconds between purges of soft-deleted files
+    GC_RETENTION: int = 60 * 60 * 24 * 7  # seconds a soft-deleted file is kept
+    GC_BATCH_SIZE: int = 500
+    GC_MAX_DELETES_PER_SECOND: float = 200.0  # unlink rate limit
+    GC_SCAN_INTERVAL: float = 60 * 60 * 24  # seconds between orphan/missing scans
+    GC_SCAN_FILES_PER_SECOND: float = 2000.0  # stat rate limit while scanning
+    GC_ORPHAN_MIN_AGE: int = 60 * 60 * 24  # seconds, younger files are never orphans
+    # report - только логировать строки без файла, soft_delete - помечать удалёнными
+    GC_MISSING_FILE_ACTION: Literal["report", "soft_delete"] = "report"
+
+
+class StorageSettings(BaseSettings):
+    # Хранилище новых загрузок by_type: local - media/, s3 - S3-совместимое хранилище
+    STORAGE_BACKEND: Literal["local", "s3"] = "local"
+    S3_ENDPOINT_URL: str = "http://localhost:9000"
+    S3_BUCKET: str = "files"
+    S3_REGION: str = "us-east-1"
+    S3_ACCESS_KEY: str = ""
+    S3_SECRET_KEY: str = ""
+    S3_PREFIX: str = ""  # prepended to Files.file_path in object keys
+    S3_PART_SIZE: int = 1024 * 1024 * 8  # 8 mb, at least 5 mb
+    S3_UPLOAD_CONCURRENCY: int = 4  # parts of one upload sent in parallel
+    S3_MAX_CONNECTIONS: int = 64
+    S3_TIMEOUT: float = 300.0  # seconds per request, for GET - per connect and read
+    S3_MAX_RETRIES: int = 3
+
+
+class AdmissionSettings(BaseSettings):
+    # Лимиты одновременных загрузок на процесс, сверх них - сразу 503/429 с Retry-After
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_UPLOADS: int = 64  # 0 - no limit
+    ADMISSION_MAX_IN_FLIGHT_BYTES: int = 1024 * 1024 * 256  # 256 mb of received bodies, 0 - no limit
+    ADMISSION_MAX_UPLOADS_PER_CLIENT: int = 32  # 0 - no limit
+    # Больше этого потоковая загрузка (/upload/stream, части) в бюджете байт не занимает,
+    # multipart-загрузки учитываются целиком
+    ADMISSION_MAX_BUFFERED_BYTES_PER_UPLOAD: int = 1024 * 1024 * 8  # 8 mb
+    ADMISSION_RETRY_AFTER: int = 1  # seconds
+    # Клиент определяется по X-Forwarded-For (только за доверенным прокси)
+    ADMISSION_TRUST_FORWARDED_FOR: bool = False
+
+
+class StatsSettings(BaseSettings):
+    STATS_ROLLUP_INTERVAL: float = 60.0  # seconds between rollups of file_stats_deltas
+    # Итог листинга: точный count(*) до этого числа строк, дальше - оценка планировщика
+    LISTING_EXACT_COUNT_LIMIT: int = 10000
+
+
+class LogSettings(BaseSettings):
+    # Запись логов в фоновом потоке через QueueHandler/QueueListener
+    LOG_QUEUE_ENABLED: bool = True
+    LOG_RENDERER: Literal["text", "json"] = "text"
+    LOG_DIR: Path = BASE_DIR / "logs"
+    LOG_LEVEL: str = "INFO"
+    LOG_FILE_MAX_BYTES: int = 1024 * 1024 * 50  # 50 mb
+    LOG_FILE_BACKUP_COUNT: int = 5
+    LOG_ACCESS_SAMPLE_RATE: float = 1.0  # share of successful requests logged
+    LOG_ACCESS_MAX_PER_SECOND: float = 0.0  # 0 - no limit, errors are always logged
+
+
+class ServerSettings(BaseSettings):
+    # dev - один процесс с автоперезагрузкой, production - несколько процессов (src.server)
+    SERVER_MODE: Literal["dev", "production"] = "dev"
+    SERVER_WORKERS: int = 0  # 0 - по числу доступных ядер
+    SERVER_REUSE_PORT: bool = True  # свой сокет с SO_REUSEPORT у каждого процесса
+    SERVER_BACKLOG: int = 2048
+    SERVER_LIMIT_MAX_REQUESTS: int = 10000  # requests before a worker is recycled, 0 - never
+    SERVER_MAX_REQUESTS_JITTER: int = 1000  # random extra requests so workers don't restart together
+    SERVER_GRACEFUL_TIMEOUT: float = 30.0  # seconds
+    SERVER_KEEPALIVE_TIMEOUT: int = 5  # seconds
+    # Номер процесса, задаётся супервизором. Фоновые задачи работают только в процессе 0
+    WORKER_INDEX: int = 0
+
+
 class Settings(BaseSettings):
     PROJECT_TITLE: str = 'my_app'
     PROJECT_HOST: str = "localhost"
@@ -30,7 +131,51 @@ class Settings(BaseSettings):
     )
     MAX_SIZE_FILE: int = 1024 * 1024  # 1 mb
     STEAM_MAX_SIZE_FILE: int = 1024 * 1024 * 20  # 20 mb
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1 mb
+    # by_type - media/<content_type>/<имя>, content_addressed - media/blobs/<sha256>
+    STORAGE_LAYOUT: Literal["by_type", "content_addressed"] = "by_type"
+    # by_type: уровни подкаталогов по префиксу хеша имени, 0 - плоский каталог типа
+    STORAGE_SHARD_DEPTH: int = 2
+    STORAGE_SHARD_WIDTH: int = 2  # hex chars per level, 2 -> 256 directories
+    # Сжатие текстовых форматов при записи (by_type), zstd без zstandard -> gzip
+    COMPRESSION_CODEC: Literal["none", "zstd", "gzip"] = "none"
+    COMPRESSION_LEVEL: int = 3
+    BATCH_MAX_FILES: int = 1000
+    BATCH_UPLOAD_CONCURRENCY: int = 16
+    RESUMABLE_MAX_SIZE_FILE: int = 1024 * 1024 * 1024 * 50  # 50 gb
+    UPLOAD_PART_MIN_SIZE: int = 1024 * 64  # 64 kb
+    UPLOAD_PART_DEFAULT_SIZE: int = 1024 * 1024 * 8  # 8 mb
+    UPLOAD_SESSION_TTL: int = 60 * 60 * 24  # 24 hours
+    # Выключается в production-режиме с несколькими процессами (кеш процесса не общий)
+    FILE_CACHE_ENABLED: bool = True
+    FILE_CACHE_SIZE: int = 10000
+    FILE_CACHE_TTL: float = 60.0  # seconds
+    # none - только кеш процесса, memory - локальная замена общего кеша
+    FILE_CACHE_SHARED_BACKEND: Literal["none", "memory"] = "none"
+    FILE_CACHE_SHARED_TTL: float = 300.0  # seconds
+    # Групповая запись метаданных одиночных загрузок одним INSERT
+    METADATA_WRITER_ENABLED: bool = False
+    METADATA_WRITER_MAX_DELAY: float = 0.005  # seconds
+    METADATA_WRITER_MAX_BATCH: int = 256
+    # none - без сброса на диск, fdatasync - на каждый файл, group - групповой сброс
+    FSYNC_POLICY: Literal["none", "fdatasync", "group"] = "none"
+    FSYNC_GROUP_WINDOW: float = 0.002  # seconds
+    TEMP_FILE_MIN_AGE: int = 60 * 60  # seconds, younger temp files are not reaped
+    IO_EXECUTOR_WORKERS: int = 32  # threads of the pool for file operations
+    EXPORT_BATCH_SIZE: int = 5000  # rows fetched from the server-side cursor at once
+    ARCHIVE_MAX_IDS: int = 10000
+    # Загрузки дольше порога передаются в trace hooks с длительностями этапов
+    TRACE_SLOW_REQUEST_SECONDS: float | None = None
+    DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1 mb
+    DOWNLOAD_MAX_RANGES: int = 16
     db_settings: DBSettings = DBSettings()
+    replication_settings: ReplicationSettings = ReplicationSettings()
+    gc_settings: GCSettings = GCSettings()
+    storage_settings: StorageSettings = StorageSettings()
+    admission_settings: AdmissionSettings = AdmissionSettings()
+    stats_settings: StatsSettings = StatsSettings()
+    log_settings: LogSettings = LogSettings()
+    server_settings: ServerSettings = ServerSettings()
 
 
 settings = Settings()
@@ -1,12 +1,52 @@
+import os
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from src.core.settings import settings
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from src.core.settings import settings, DBSettings
+from src.utils.metrics import Counter, Histogram
+
+POOL_CHECKOUT_WAIT = Histogram()
+POOL_CHECKOUT_TIMEOUTS = Counter()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, замеряющий время ожидания выдачи соединения.
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
 
 
 class DatabaseHelper:
-    def __init__(self, db_url) -> None:
+    def __init__(self, db_url, db_settings: DBSettings = settings.db_settings) -> None:
+        url = make_url(db_url).update_query_dict(
+            {
+                "prepared_statement_cache_size": str(
+                    db_settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+                )
+            }
+        )
+        self.db_settings = db_settings
         self.engine = create_async_engine(
-            url=db_url,
+            url=url,
             echo=False,
+            poolclass=InstrumentedQueuePool,
+            pool_size=db_settings.DB_POOL_SIZE,
+            max_overflow=db_settings.DB_MAX_OVERFLOW,
+            pool_timeout=db_settings.DB_POOL_TIMEOUT,
+            pool_recycle=db_settings.DB_POOL_RECYCLE,
+            pool_pre_ping=db_settings.DB_POOL_PRE_PING,
         )
         self.session_factory = async_sessionmaker(
             bind=self.engine,
@@ -14,11 +54,43 @@ class DatabaseHelper:
             autocommit=False,
             expire_on_commit=False,
         )
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self.reset_after_fork)
+
+    def reset_after_fork(self) -> None:
+        """
+        Заменяет пул соединений в дочернем процессе после fork, не закрывая
+        унаследованные соединения: ими продолжает пользоваться родитель.
+        Рабочие процессы src.server запускаются через spawn и создают движок
+        заново, это защита для серверов, которые делают fork после импорта приложения.
+        """
+        self.engine.sync_engine.dispose(close=False)
 
     async def get_session(self) -> AsyncSession:
         async with self.session_factory() as session:
             yield session
             await session.close()
 
+    def pool_stats(self) -> dict:
+        """
+        Текущее состояние пула соединений и статистика ожидания выдачи соединения.
+
+        :return: Словарь с размером пула, занятыми соединениями, насыщением и гистограммой ожидания.
+        """
+        pool = self.engine.pool
+        max_overflow = self.db_settings.DB_MAX_OVERFLOW
+        capacity = pool.size() + max(max_overflow, 0)
+        checked_out = pool.checkedout()
+        return {
+            "pool_size": pool.size(),
+            "max_overflow": max_overflow,
+            "checked_out": checked_out,
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "saturation": checked_out / capacity if capacity else 1.0,
+            "checkout_timeouts": POOL_CHECKOUT_TIMEOUTS.value,
+            "checkout_wait_seconds": POOL_CHECKOUT_WAIT.snapshot(),
+        }
+
 
 db_session: DatabaseHelper = DatabaseHelper(settings.db_settings.DATABASE_URL_ASYNC)
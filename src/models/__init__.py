@@ -1,2 +1,6 @@
-__all__ = ("Files",)
+__all__ = ("Blobs", "Files", "FileStats", "FileStatsDeltas", "Replications", "UploadSessions")
+from .blobs import Blobs
 from .files import Files
+from .file_stats import FileStats, FileStatsDeltas
+from .replications import Replications
+from .upload_sessions import UploadSessions
@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, String
+from sqlalchemy.orm import Mapped, mapped_column
+from src.models.base import Base
+
+
+class Blobs(Base):
+    """
+    Таблица блобов контентно-адресуемого хранилища.
+    Каждый блоб хранится на диске один раз, ref_count - число ссылающихся строк Files.
+    """
+
+    __tablename__ = "blobs"
+
+    digest: Mapped[str] = mapped_column(
+        String(64), unique=True, comment="SHA-256 of the content"
+    )
+    file_path: Mapped[str] = mapped_column(
+        String(255), comment="The relative path to the blob"
+    )
+    file_size: Mapped[int] = mapped_column(BigInteger, comment="Blob size in bytes")
+    ref_count: Mapped[int] = mapped_column(
+        default=1, comment="Number of files referencing the blob"
+    )
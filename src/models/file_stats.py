@@ -0,0 +1,52 @@
+from datetime import date
+
+from sqlalchemy import BigInteger, Date, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from src.models.base import Base
+
+
+class FileStats(Base):
+    """
+    Таблица агрегатов неудалённых файлов: количество и суммарный размер
+    по типу, расширению и дню создания. Пополняется из file_stats_deltas
+    фоновой свёрткой (StatsRollup).
+    """
+
+    __tablename__ = "file_stats"
+    __table_args__ = (
+        UniqueConstraint(
+            "file_format", "file_extension", "day", name="uq_file_stats_group"
+        ),
+    )
+
+    file_format: Mapped[str] = mapped_column(String(255), comment="The file format")
+    file_extension: Mapped[str] = mapped_column(
+        String(255), comment="The file extension"
+    )
+    day: Mapped[date] = mapped_column(Date, comment="Day the files were created (UTC)")
+    files_count: Mapped[int] = mapped_column(BigInteger, comment="Number of files")
+    total_size: Mapped[int] = mapped_column(
+        BigInteger, comment="Total size of the files in bytes"
+    )
+
+
+class FileStatsDeltas(Base):
+    """
+    Изменения агрегатов file_stats, ещё не свёрнутые в неё. Транзакции вставки
+    и удаления файлов только добавляют строки сюда, поэтому параллельные
+    загрузки одного типа не ждут блокировку общей строки агрегата.
+    """
+
+    __tablename__ = "file_stats_deltas"
+
+    file_format: Mapped[str] = mapped_column(String(255), comment="The file format")
+    file_extension: Mapped[str] = mapped_column(
+        String(255), comment="The file extension"
+    )
+    day: Mapped[date] = mapped_column(Date, comment="Day the files were created (UTC)")
+    files_count: Mapped[int] = mapped_column(
+        BigInteger, comment="Change of the number of files"
+    )
+    total_size: Mapped[int] = mapped_column(
+        BigInteger, comment="Change of the total size in bytes"
+    )
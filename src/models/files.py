@@ -1,7 +1,10 @@
-from sqlalchemy import String
+from sqlalchemy import BigInteger, Index, String, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.models.base import Base
 
+# Индексы листинга строятся только по неудалённым строкам
+LIVE_ROWS = text("deleted_at IS NULL")
+
 
 class Files(Base):
     """
@@ -9,8 +12,54 @@ class Files(Base):
     """
 
     __tablename__ = "files"
+    __table_args__ = (
+        Index(
+            "ix_files_live_created_at_id",
+            "created_at",
+            "id",
+            postgresql_where=LIVE_ROWS,
+        ),
+        Index(
+            "ix_files_live_format_created_at_id",
+            "file_format",
+            "created_at",
+            "id",
+            postgresql_where=LIVE_ROWS,
+        ),
+        Index(
+            "ix_files_live_extension_created_at_id",
+            "file_extension",
+            "created_at",
+            "id",
+            postgresql_where=LIVE_ROWS,
+        ),
+        Index(
+            "ix_files_live_size_id",
+            "file_size",
+            "id",
+            postgresql_where=LIVE_ROWS,
+        ),
+        Index(
+            "ix_files_live_name_id",
+            text('file_old_name COLLATE "C"'),
+            "id",
+            postgresql_where=LIVE_ROWS,
+        ),
+        Index(
+            "ix_files_deleted_at",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+        ),
+        Index(
+            "ix_files_live_name_trgm",
+            "file_old_name",
+            postgresql_using="gin",
+            postgresql_ops={"file_old_name": "gin_trgm_ops"},
+            postgresql_where=LIVE_ROWS,
+        ),
+    )
 
-    file_size: Mapped[int] = mapped_column(comment="File size in bytes")
+    file_size: Mapped[int] = mapped_column(BigInteger, comment="File size in bytes")
     file_path: Mapped[str] = mapped_column(
         String(255), comment="The relative path to the file"
     )
@@ -24,3 +73,18 @@ class Files(Base):
     file_extension: Mapped[str] = mapped_column(
         String(255), comment="The file extension"
     )
+    content_hash: Mapped[str | None] = mapped_column(
+        String(64), index=True, comment="SHA-256 of the content in the blob store"
+    )
+    codec: Mapped[str | None] = mapped_column(
+        String(16), comment="Storage codec (zstd, gzip), NULL - stored as is"
+    )
+    stored_size: Mapped[int | None] = mapped_column(
+        BigInteger, comment="Size of the file on disk in bytes"
+    )
+    storage_backend: Mapped[str | None] = mapped_column(
+        String(16), comment="Storage backend holding the file (s3), NULL - local"
+    )
+    replication_status: Mapped[str | None] = mapped_column(
+        String(16), comment="Cloud replication status: pending, replicated or failed"
+    )
@@ -0,0 +1,35 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import DateTime, ForeignKey, Index, Text, func
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from src.models.base import Base
+
+
+class Replications(Base):
+    """
+    Outbox-таблица заданий на репликацию файлов в облачное хранилище.
+    Строка создаётся в одной транзакции с файлом и удаляется после успешной отправки.
+    """
+
+    __tablename__ = "replications"
+    __table_args__ = (Index("ix_replications_next_attempt_at", "next_attempt_at"),)
+
+    file_id: Mapped[UUID] = mapped_column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("files.id", ondelete="CASCADE"),
+        unique=True,
+        comment="The replicated file",
+    )
+    attempts: Mapped[int] = mapped_column(
+        default=0, server_default="0", comment="Number of failed attempts"
+    )
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        comment="The earliest time of the next attempt",
+    )
+    last_error: Mapped[str | None] = mapped_column(
+        Text, comment="The error of the last failed attempt"
+    )
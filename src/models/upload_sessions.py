@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+from src.models.base import Base
+
+
+class UploadSessions(Base):
+    """
+    Таблица сессий возобновляемой загрузки.
+    Файл создаётся разреженным, место под часть выделяется при её загрузке,
+    части пишутся в него по смещению в любом порядке, номера принятых частей
+    хранятся в received_parts.
+    """
+
+    __tablename__ = "upload_sessions"
+
+    file_name: Mapped[str] = mapped_column(
+        String(255), comment="The original name of the file"
+    )
+    file_format: Mapped[str] = mapped_column(String(255), comment="The file format")
+    file_size: Mapped[int] = mapped_column(
+        BigInteger, comment="Total file size in bytes"
+    )
+    part_size: Mapped[int] = mapped_column(comment="Part size in bytes")
+    temp_path: Mapped[str] = mapped_column(
+        String(255), comment="The relative path to the preallocated file"
+    )
+    received_parts: Mapped[list[int]] = mapped_column(
+        ARRAY(Integer),
+        default=list,
+        server_default="{}",
+        comment="Indexes of the parts already written",
+    )
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), comment="The session expiration time"
+    )
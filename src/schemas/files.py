@@ -1,3 +1,9 @@
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Literal
+
+from pydantic import Field, model_validator
+
 from src.schemas.base import BaseSchema
 from uuid import UUID
 
@@ -9,11 +15,80 @@ class FilesSchema(BaseSchema):
     file_new_name: str
     file_extension: str
     file_path: str
+    content_hash: str | None = None
+    codec: str | None = None
+    stored_size: int | None = None
+    storage_backend: str | None = None
 
 
 class CreateFilesSchema(FilesSchema):
-    pass
+    # Временный файл, который переименовывается в file_path после commit
+    temp_path: Path | None = Field(default=None, exclude=True)
+    # StagedObject хранилища, публикуется после commit
+    staged: Any = Field(default=None, exclude=True)
 
 
 class ShowFilesSchema(FilesSchema):
     id: UUID
+    replication_status: str | None = None
+
+
+class FilesPageSchema(BaseSchema):
+    items: list[ShowFilesSchema]
+    next_cursor: str | None = None
+
+
+class BatchUploadItemSchema(BaseSchema):
+    file_old_name: str
+    status_code: int
+    detail: str | None = None
+    file: ShowFilesSchema | None = None
+
+
+class FilesFilterSchema(BaseSchema):
+    file_format: str | None = Field(default=None, description="MIME-тип файла")
+    file_extension: str | None = Field(default=None, description="Расширение, например .txt")
+    size_min: int | None = Field(default=None, ge=0, description="Минимальный размер в байтах")
+    size_max: int | None = Field(default=None, ge=0, description="Максимальный размер в байтах")
+    created_from: datetime | None = Field(
+        default=None, description="Созданные не раньше этого момента"
+    )
+    created_to: datetime | None = Field(
+        default=None, description="Созданные раньше этого момента"
+    )
+    name_prefix: str | None = Field(
+        default=None, min_length=1, description="Начало исходного имени файла"
+    )
+    name_contains: str | None = Field(
+        default=None, min_length=3, description="Подстрока исходного имени (от 3 символов)"
+    )
+    sort: Literal[
+        "created_at", "-created_at", "file_size", "-file_size", "name", "-name"
+    ] = Field(default="created_at", description="Поле сортировки, '-' - по убыванию")
+
+
+class ArchiveRequestSchema(BaseSchema):
+    ids: list[UUID] | None = Field(default=None, min_length=1, description="ID файлов")
+    filters: FilesFilterSchema | None = Field(
+        default=None, description="Фильтры листинга, если ID не переданы"
+    )
+
+    @model_validator(mode="after")
+    def check_source(self):
+        if (self.ids is None) == (self.filters is None):
+            raise ValueError("Exactly one of ids or filters must be set.")
+        return self
+
+
+class FileStatsGroupSchema(BaseSchema):
+    file_format: str | None = None
+    file_extension: str | None = None
+    day: date | None = None
+    files_count: int
+    total_size: int
+
+
+class FileStatsSchema(BaseSchema):
+    files_count: int
+    total_size: int
+    groups: list[FileStatsGroupSchema]
@@ -0,0 +1,28 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import Field
+
+from src.core.settings import settings
+from src.schemas.base import BaseSchema
+
+# Колонка part_size - 32-битный Integer
+MAX_PART_SIZE = min(settings.RESUMABLE_MAX_SIZE_FILE, 2**31 - 1)
+
+
+class CreateUploadSessionSchema(BaseSchema):
+    file_name: str = Field(min_length=1, max_length=255)
+    file_format: str = Field(default="application/octet-stream", max_length=255)
+    file_size: int = Field(ge=1)
+    part_size: int | None = Field(default=None, ge=1, le=MAX_PART_SIZE)
+
+
+class ShowUploadSessionSchema(BaseSchema):
+    id: UUID
+    file_name: str
+    file_format: str
+    file_size: int
+    part_size: int
+    parts_count: int
+    received_parts: list[int]
+    expires_at: datetime
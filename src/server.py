@@ -0,0 +1,274 @@
+"""
+Запуск приложения в production-режиме: несколько рабочих процессов uvicorn
+под управлением супервизора.
+
+    python -m src.server --workers 8
+
+Каждый процесс запускается через spawn, поэтому заново импортирует приложение
+и создаёт свой движок SQLAlchemy с собственным пулом соединений asyncpg.
+При SERVER_REUSE_PORT у каждого процесса свой сокет с SO_REUSEPORT,
+и входящие соединения между ними распределяет ядро, иначе процессы принимают
+соединения с одного общего сокета. Сокеты открывает супервизор, поэтому
+при перезапуске процесса очередь его сокета не теряется. Процесс, обработавший
+SERVER_LIMIT_MAX_REQUESTS запросов (плюс случайная добавка до
+SERVER_MAX_REQUESTS_JITTER), завершается после ответа на текущие запросы,
+и супервизор запускает вместо него новый с тем же номером.
+Фоновые задачи (уборка временных файлов, репликация, сборщик мусора)
+работают только в процессе с номером 0.
+"""
+
+import argparse
+import importlib.util
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import threading
+import time
+from multiprocessing.process import BaseProcess
+
+import uvicorn
+
+from src.core.settings import settings
+from src.utils.logger import build_logging_config
+
+logger = logging.getLogger(__name__)
+
+APP = "main:app"
+RESTART_DELAY = 1.0  # seconds between restarts of a worker that keeps crashing
+
+
+def resolve_workers(workers: int) -> int:
+    """
+    Число рабочих процессов: workers или, если оно не больше 0,
+    число ядер, доступных процессу.
+
+    :param workers: Заданное число процессов.
+    :return: Число процессов.
+    """
+    if workers > 0:
+        return workers
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def resolve_loop() -> str:
+    if importlib.util.find_spec("uvloop"):
+        return "uvloop"
+    logger.warning("uvloop is not installed, falling back to the asyncio event loop")
+    return "asyncio"
+
+
+def resolve_http() -> str:
+    if importlib.util.find_spec("httptools"):
+        return "httptools"
+    logger.warning("httptools is not installed, falling back to the h11 HTTP parser")
+    return "h11"
+
+
+def worker_request_limit(limit: int, jitter: int) -> int | None:
+    """
+    Лимит запросов для очередного процесса. Случайная добавка не даёт
+    процессам, запущенным одновременно, одновременно и перезапуститься.
+
+    :param limit: SERVER_LIMIT_MAX_REQUESTS, 0 - без перезапуска.
+    :param jitter: SERVER_MAX_REQUESTS_JITTER.
+    :return: Лимит или None.
+    """
+    if limit <= 0:
+        return None
+    return limit + random.randint(0, max(jitter, 0))
+
+
+def bind_socket(host: str, port: int, reuse_port: bool, backlog: int) -> socket.socket:
+    """
+    Открывает слушающий сокет.
+
+    :param host: Адрес.
+    :param port: Порт.
+    :param reuse_port: Включить SO_REUSEPORT, чтобы другие процессы
+        могли слушать тот же порт своими сокетами.
+    :param backlog: Длина очереди соединений.
+    :return: Сокет.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    try:
+        sock.bind((host, port))
+        sock.listen(backlog)
+    except OSError:
+        sock.close()
+        raise
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(index: int, workers: int, options: dict, sock: socket.socket) -> None:
+    """
+    Точка входа рабочего процесса.
+
+    :param index: Номер процесса.
+    :param workers: Число рабочих процессов.
+    :param options: Параметры запуска, собранные супервизором.
+    :param sock: Слушающий сокет, открытый супервизором.
+    :return: None
+    """
+    os.environ["WORKER_INDEX"] = str(index)
+    settings.server_settings.WORKER_INDEX = index
+    # Приложение импортируется ниже, поэтому его модули видят фактический режим
+    settings.server_settings.SERVER_MODE = "production"
+    settings.server_settings.SERVER_WORKERS = workers
+    config = uvicorn.Config(
+        APP,
+        loop=options["loop"],
+        http=options["http"],
+        backlog=options["backlog"],
+        log_config=build_logging_config(f"logs.worker-{index}.log"),
+        limit_max_requests=worker_request_limit(
+            options["limit_max_requests"], options["max_requests_jitter"]
+        ),
+        timeout_keep_alive=options["keepalive_timeout"],
+        timeout_graceful_shutdown=options["graceful_timeout"],
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    """
+    Запускает рабочие процессы, перезапускает завершившиеся
+    и останавливает все процессы по SIGINT/SIGTERM.
+    """
+
+    def __init__(self, workers: int, options: dict) -> None:
+        self.workers = workers
+        self.options = options
+        self.processes: dict[int, BaseProcess] = {}
+        self.started_at: dict[int, float] = {}
+        self.should_exit = threading.Event()
+        self.sockets: dict[int, socket.socket] = {}
+        self._context = multiprocessing.get_context("spawn")
+
+    def open_sockets(self) -> None:
+        reuse_port = self.options["reuse_port"]
+        host, port, backlog = self.options["host"], self.options["port"], self.options["backlog"]
+        shared = None if reuse_port else bind_socket(host, port, False, backlog)
+        for index in range(self.workers):
+            self.sockets[index] = shared or bind_socket(host, port, True, backlog)
+
+    def spawn(self, index: int) -> None:
+        process = self._context.Process(
+            target=run_worker,
+            args=(index, self.workers, self.options, self.sockets[index]),
+            name=f"worker-{index}",
+        )
+        process.start()
+        self.processes[index] = process
+        self.started_at[index] = time.monotonic()
+        logger.info("Started worker %s [%s]", index, process.pid)
+
+    def restart_exited(self) -> None:
+        for index, process in list(self.processes.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            if process.exitcode:
+                logger.warning("Worker %s exited with code %s", index, process.exitcode)
+                if time.monotonic() - self.started_at[index] < RESTART_DELAY:
+                    time.sleep(RESTART_DELAY)
+            else:
+                logger.info("Worker %s recycled", index)
+            if not self.should_exit.is_set():
+                self.spawn(index)
+
+    def handle_exit(self, signum, frame) -> None:
+        self.should_exit.set()
+
+    def shutdown(self) -> None:
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.options["graceful_timeout"]
+        for index, process in self.processes.items():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning("Worker %s did not stop in time, killing", index)
+                process.kill()
+                process.join()
+        for sock in set(self.sockets.values()):
+            sock.close()
+
+    def run(self) -> None:
+        signal.signal(signal.SIGINT, self.handle_exit)
+        signal.signal(signal.SIGTERM, self.handle_exit)
+        self.open_sockets()
+        logger.info(
+            "Serving on %s:%s with %s workers (loop=%s, http=%s, reuse_port=%s)",
+            self.options["host"],
+            self.options["port"],
+            self.workers,
+            self.options["loop"],
+            self.options["http"],
+            self.options["reuse_port"],
+        )
+        for index in range(self.workers):
+            self.spawn(index)
+        try:
+            while not self.should_exit.wait(0.5):
+                self.restart_exited()
+        finally:
+            self.shutdown()
+
+
+def run_production(**overrides) -> None:
+    """
+    Запускает супервизор с параметрами из ServerSettings.
+
+    :param overrides: Параметры, заменяющие значения из настроек.
+    :return: None
+    """
+    server_settings = settings.server_settings
+    options = {
+        "host": settings.PROJECT_HOST,
+        "port": settings.PROJECT_PORT,
+        "workers": server_settings.SERVER_WORKERS,
+        "reuse_port": server_settings.SERVER_REUSE_PORT and hasattr(socket, "SO_REUSEPORT"),
+        "backlog": server_settings.SERVER_BACKLOG,
+        "limit_max_requests": server_settings.SERVER_LIMIT_MAX_REQUESTS,
+        "max_requests_jitter": server_settings.SERVER_MAX_REQUESTS_JITTER,
+        "graceful_timeout": server_settings.SERVER_GRACEFUL_TIMEOUT,
+        "keepalive_timeout": server_settings.SERVER_KEEPALIVE_TIMEOUT,
+        "loop": resolve_loop(),
+        "http": resolve_http(),
+    }
+    options.update({key: value for key, value in overrides.items() if value is not None})
+    Supervisor(resolve_workers(options.pop("workers")), options).run()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--workers", type=int, help="0 - по числу ядер")
+    parser.add_argument("--limit-max-requests", type=int, help="0 - без перезапуска")
+    parser.add_argument(
+        "--reuse-port", action=argparse.BooleanOptionalAction, default=None
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    run_production(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        limit_max_requests=args.limit_max_requests,
+        reuse_port=args.reuse_port,
+    )
+
+
+if __name__ == "__main__":
+    main()
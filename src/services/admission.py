@@ -0,0 +1,227 @@
+import logging
+from collections import Counter as ClientCounter
+from dataclasses import dataclass
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.settings import settings
+from src.services.upload_metrics import UPLOAD_PATH_PREFIX, is_upload_request
+from src.utils.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_REJECTED = {
+    "uploads": Counter(),
+    "bytes": Counter(),
+    "client": Counter(),
+}
+
+
+@dataclass(frozen=True)
+class Rejection:
+    reason: str  # key of ADMISSION_REJECTED
+    status_code: int
+    detail: str
+
+
+class AdmissionController:
+    """
+    Ограничивает одновременные загрузки процесса: их общее число, сумму
+    байт тел запросов, которые загрузки держат в памяти и во временных файлах,
+    и число загрузок одного клиента. Запрос сверх лимита не ждёт в очереди,
+    а сразу получает отказ, поэтому время ответа допущенных загрузок
+    и занятость пула соединений с базой остаются предсказуемыми.
+
+    Байты учитываются по мере получения тела (charge), а не по объявленному
+    размеру, поэтому одна большая или медленная загрузка не закрывает
+    допуск остальным.
+
+    Все операции выполняются в цикле событий, поэтому блокировки не нужны.
+    """
+
+    def __init__(
+        self,
+        max_uploads: int,
+        max_in_flight_bytes: int,
+        max_uploads_per_client: int,
+    ) -> None:
+        self.max_uploads = max_uploads
+        self.max_in_flight_bytes = max_in_flight_bytes
+        self.max_uploads_per_client = max_uploads_per_client
+        self.in_flight = 0
+        self.in_flight_bytes = 0
+        self._clients: ClientCounter[str] = ClientCounter()
+        self.admitted = 0
+
+    def try_acquire(self, client: str) -> Rejection | None:
+        """
+        Допускает загрузку, если она укладывается в лимиты числа загрузок
+        и бюджет байт ещё не исчерпан уже полученными телами.
+
+        :param client: Ключ клиента (адрес).
+        :return: None, если загрузка допущена, иначе причина отказа.
+        """
+        if self.max_uploads_per_client and (
+            self._clients[client] >= self.max_uploads_per_client
+        ):
+            return Rejection("client", 429, "Too many concurrent uploads from client.")
+        if self.max_uploads and self.in_flight >= self.max_uploads:
+            return Rejection("uploads", 503, "Too many concurrent uploads.")
+        if self.max_in_flight_bytes and self.in_flight_bytes >= self.max_in_flight_bytes:
+            return Rejection("bytes", 503, "Upload byte budget is exhausted.")
+        self.in_flight += 1
+        self._clients[client] += 1
+        self.admitted += 1
+        return None
+
+    def charge(self, size: int) -> None:
+        """
+        Учитывает в бюджете полученные байты тела допущенной загрузки.
+
+        :param size: Количество байт.
+        :return: None
+        """
+        self.in_flight_bytes += size
+
+    def release(self, client: str, size: int) -> None:
+        """
+        Завершает загрузку и возвращает в бюджет учтённые за неё байты.
+
+        :param client: Ключ клиента.
+        :param size: Сумма байт, учтённых через charge.
+        :return: None
+        """
+        self.in_flight -= 1
+        self.in_flight_bytes -= size
+        self._clients[client] -= 1
+        if not self._clients[client]:
+            del self._clients[client]
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "in_flight_bytes": self.in_flight_bytes,
+            "clients": self.clients,
+            "max_uploads": self.max_uploads,
+            "max_in_flight_bytes": self.max_in_flight_bytes,
+            "max_uploads_per_client": self.max_uploads_per_client,
+            "admitted": self.admitted,
+            "rejected": {
+                reason: int(counter.value) for reason, counter in ADMISSION_REJECTED.items()
+            },
+        }
+
+
+admission_controller = AdmissionController(
+    max_uploads=settings.admission_settings.ADMISSION_MAX_UPLOADS,
+    max_in_flight_bytes=settings.admission_settings.ADMISSION_MAX_IN_FLIGHT_BYTES,
+    max_uploads_per_client=settings.admission_settings.ADMISSION_MAX_UPLOADS_PER_CLIENT,
+)
+
+
+def get_client_key(scope: Scope) -> str:
+    """
+    Ключ клиента для лимита на клиента: адрес соединения или, при
+    ADMISSION_TRUST_FORWARDED_FOR, первый адрес из X-Forwarded-For.
+
+    :param scope: ASGI scope запроса.
+    :return: Адрес клиента.
+    """
+    if settings.admission_settings.ADMISSION_TRUST_FORWARDED_FOR:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else ""
+
+
+def is_streamed_upload(scope: Scope) -> bool:
+    """
+    Проверяет, что загрузка пишет тело в хранилище потоком: сырое тело
+    (/upload/stream) или часть возобновляемой загрузки. Multipart-загрузки
+    (/upload, /upload/batch) python-multipart сохраняет во временные файлы целиком.
+
+    :param scope: ASGI scope запроса.
+    :return: True для потоковых загрузок.
+    """
+    path = scope["path"]
+    if scope["method"] == "POST":
+        return path.rstrip("/") == f"{UPLOAD_PATH_PREFIX}/stream"
+    return path.startswith(f"{UPLOAD_PATH_PREFIX}s/") and "/parts/" in path
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware, пропускающий запросы загрузки через admission_controller
+    до чтения тела. Отклонённые запросы получают 503 (лимиты процесса)
+    или 429 (лимит клиента) с заголовком Retry-After.
+
+    Каждый полученный блок тела учитывается в бюджете байт. Потоковые
+    загрузки (is_streamed_upload) учитываются не больше
+    ADMISSION_MAX_BUFFERED_BYTES_PER_UPLOAD: больше этого в памяти они
+    не держат. Multipart-загрузки учитываются целиком, так как их тело
+    до обработки лежит во временных файлах.
+    """
+
+    def __init__(
+        self, app: ASGIApp, controller: AdmissionController = admission_controller
+    ) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            not settings.admission_settings.ADMISSION_ENABLED
+            or not is_upload_request(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        client = get_client_key(scope)
+        rejection = self.controller.try_acquire(client)
+        if rejection is not None:
+            ADMISSION_REJECTED[rejection.reason].inc()
+            logger.debug(
+                "Upload from %s rejected (%s), %s uploads in flight",
+                client,
+                rejection.reason,
+                self.controller.in_flight,
+            )
+            response = JSONResponse(
+                {"detail": rejection.detail},
+                status_code=rejection.status_code,
+                headers={
+                    "Retry-After": str(settings.admission_settings.ADMISSION_RETRY_AFTER),
+                    "Connection": "close",
+                },
+            )
+            await response(scope, receive, send)
+            return
+
+        limit = (
+            settings.admission_settings.ADMISSION_MAX_BUFFERED_BYTES_PER_UPLOAD
+            if is_streamed_upload(scope)
+            else None
+        )
+        charged = 0
+
+        async def receive_body() -> Message:
+            nonlocal charged
+            message = await receive()
+            if message["type"] == "http.request":
+                size = len(message.get("body", b""))
+                if limit is not None:
+                    size = min(size, limit - charged)
+                self.controller.charge(size)
+                charged += size
+            return message
+
+        try:
+            await self.app(scope, receive_body, send)
+        finally:
+            self.controller.release(client, charged)
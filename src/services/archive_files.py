@@ -0,0 +1,192 @@
+import logging
+import zipfile
+from datetime import datetime
+from pathlib import PurePosixPath
+from typing import AsyncIterator, Sequence
+from uuid import UUID
+
+from sqlalchemy import Select, select
+
+from src.core.settings import settings
+from src.db.session import db_session
+from src.models.files import Files
+from src.schemas.files import FilesFilterSchema
+from src.services.compression import get_codec, is_compressible, iter_decompressed
+from src.services.io_executor import run_io
+from src.services.listing import build_listing_query
+from src.services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLUMNS = (
+    Files.id,
+    Files.file_old_name,
+    Files.file_format,
+    Files.file_size,
+    Files.file_path,
+    Files.codec,
+    Files.storage_backend,
+    Files.created_at,
+)
+# Самая ранняя дата, которую можно записать в заголовок ZIP
+ZIP_MIN_DATE = (1980, 1, 1, 0, 0, 0)
+
+
+def build_archive_query(
+    ids: Sequence[UUID] | None = None, filters: FilesFilterSchema | None = None
+) -> Select:
+    """
+    Формирует запрос файлов архива: по списку ID или по фильтрам листинга.
+    Выбираются только колонки, нужные для чтения содержимого.
+
+    :param ids: ID файлов.
+    :param filters: Фильтры и сортировка листинга.
+    :raises HTTPException: 400, если сочетание фильтров не обслуживается индексами.
+    :return: Запрос SQLAlchemy.
+    """
+    if ids is not None:
+        return (
+            select(*ARCHIVE_COLUMNS)
+            .where(Files.id.in_(ids), Files.deleted_at.is_(None))
+            .order_by(Files.created_at, Files.id)
+        )
+    return build_listing_query(filters).with_only_columns(*ARCHIVE_COLUMNS)
+
+
+class ZipSink:
+    """
+    Несмещаемый поток, в который пишет ZipFile. Записанные байты забираются
+    после каждой операции, поэтому в памяти находится не больше одного блока.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self) -> None:
+        return None
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class ArchiveNames:
+    """
+    Имена элементов архива: исходные имена файлов, одинаковые имена
+    дополняются номером - «report (1).txt».
+    """
+
+    def __init__(self) -> None:
+        self._used: set[str] = set()
+
+    def unique(self, name: str) -> str:
+        name = name.replace("\\", "_").replace("/", "_").strip() or "file"
+        candidate, number = name, 0
+        path = PurePosixPath(name)
+        while candidate in self._used:
+            number += 1
+            candidate = f"{path.stem} ({number}){path.suffix}"
+        self._used.add(candidate)
+        return candidate
+
+
+def build_zip_info(
+    name: str, file_size: int, file_format: str, created_at: datetime
+) -> zipfile.ZipInfo:
+    """
+    Заголовок элемента архива. Уже сжатые форматы (изображения, архивы, видео)
+    сохраняются без сжатия (STORE), текстовые - DEFLATE.
+
+    :param name: Имя элемента.
+    :param file_size: Исходный размер файла: по нему ZipFile решает, нужен ли ZIP64.
+    :param file_format: MIME-тип файла.
+    :param created_at: Дата создания файла.
+    :return: ZipInfo.
+    """
+    date_time = max(created_at.timetuple()[:6], ZIP_MIN_DATE)
+    zip_info = zipfile.ZipInfo(name, date_time=date_time)
+    if is_compressible(file_format):
+        zip_info.compress_type = zipfile.ZIP_DEFLATED
+    else:
+        zip_info.compress_type = zipfile.ZIP_STORED
+    zip_info.file_size = file_size
+    return zip_info
+
+
+async def iter_file_content(row) -> AsyncIterator[bytes] | None:
+    """
+    Открывает содержимое файла в его хранилище, распаковывая файлы,
+    сохранённые со сжатием.
+
+    :param row: Строка запроса build_archive_query.
+    :return: Асинхронный итератор исходных блоков или None, если объекта нет.
+    """
+    chunks = get_storage(row.storage_backend).get_stream(
+        row.file_path, chunk_size=settings.DOWNLOAD_CHUNK_SIZE
+    )
+    try:
+        first_chunk = await anext(chunks)
+    except FileNotFoundError:
+        return None
+    except StopAsyncIteration:
+        first_chunk = b""
+
+    async def content() -> AsyncIterator[bytes]:
+        yield first_chunk
+        async for chunk in chunks:
+            yield chunk
+
+    codec = get_codec(row.codec)
+    if codec is not None:
+        return iter_decompressed(content(), codec)
+    return content()
+
+
+async def iter_archive(stmt: Select) -> AsyncIterator[bytes]:
+    """
+    Собирает ZIP-архив (ZIP64 для больших файлов и архивов) на лету из файлов
+    запроса и отдаёт его потоком. Временные файлы не создаются: ZipFile пишет
+    в несмещаемый поток с дескрипторами данных после содержимого, в памяти
+    остаётся только центральный каталог (по записи на файл).
+    Файлы, которых нет в хранилище, пропускаются.
+    Используется собственная сессия, так как поток живёт дольше обработчика запроса.
+
+    :param stmt: Запрос из build_archive_query.
+    :return: Асинхронный итератор блоков архива.
+    """
+    batch_size = settings.EXPORT_BATCH_SIZE
+    sink = ZipSink()
+    names = ArchiveNames()
+    archive = zipfile.ZipFile(sink, "w")
+
+    async with db_session.session_factory() as session:
+        result = await session.stream(stmt.execution_options(yield_per=batch_size))
+        async for rows in result.partitions(batch_size):
+            for row in rows:
+                content = await iter_file_content(row)
+                if content is None:
+                    logger.warning(
+                        "File %s is missing in storage, skipped in archive", row.id
+                    )
+                    continue
+                zip_info = build_zip_info(
+                    names.unique(row.file_old_name),
+                    row.file_size,
+                    row.file_format,
+                    row.created_at,
+                )
+                entry = archive.open(zip_info, "w")
+                async for chunk in content:
+                    await run_io(entry.write, chunk)
+                    if data := sink.drain():
+                        yield data
+                entry.close()
+                yield sink.drain()
+
+    archive.close()
+    yield sink.drain()
@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Iterable
+from uuid import uuid4
+
+from sqlalchemy import select
+
+from src.core.settings import BLOBS_DIR, STORAGE_ROOT, UPLOAD_DIR, UPLOAD_SESSIONS_DIR, settings
+from src.models.files import Files
+from src.schemas.files import CreateFilesSchema
+from src.services.io_executor import run_io
+from src.services.upload_metrics import stage
+
+logger = logging.getLogger(__name__)
+
+TEMP_FILE_PATTERN = re.compile(r"^\.(?P<name>.+)\.[0-9a-f]{16}\.tmp$")
+
+
+def get_temp_path(file_path: Path) -> Path:
+    """
+    Возвращает уникальное временное имя в том же каталоге, что и итоговый файл,
+    чтобы переименование было атомарным.
+
+    :param file_path: Итоговый путь к файлу.
+    :return: Путь к временному файлу.
+    """
+    return file_path.with_name(f".{file_path.name}.{uuid4().hex[:16]}.tmp")
+
+
+def _fsync_paths(paths: Iterable[Path], data_only: bool = False) -> None:
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            if data_only and not path.is_dir():
+                os.fdatasync(fd)
+            else:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class GroupSyncer:
+    """
+    Групповой сброс на диск: запросы от параллельных загрузок копятся
+    в течение окна FSYNC_GROUP_WINDOW, и собранные пути сбрасываются
+    (fdatasync, для каталогов fsync) пачкой в одной задаче пула.
+    """
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self._pending: list[tuple[list[Path], asyncio.Future]] = []
+        self._flusher: asyncio.Task | None = None
+
+    async def sync(self, paths: Iterable[Path]) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((list(paths), future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush())
+        await future
+
+    async def _flush(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self.window)
+            batch, self._pending = self._pending, []
+            try:
+                await run_io(
+                    _fsync_paths,
+                    dict.fromkeys(path for paths, _ in batch for path in paths),
+                    data_only=True,
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+
+
+group_syncer = GroupSyncer(window=settings.FSYNC_GROUP_WINDOW)
+
+
+async def sync_paths(*paths: Path) -> None:
+    """
+    Сбрасывает файлы или каталоги на диск согласно FSYNC_POLICY:
+    none - не сбрасывать, fdatasync - сразу для каждого пути,
+    group - групповым сбросом вместе с параллельными загрузками.
+
+    :param paths: Пути к файлам или каталогам.
+    :return: None
+    """
+    if settings.FSYNC_POLICY == "none" or not paths:
+        return
+    with stage("fsync"):
+        if settings.FSYNC_POLICY == "group":
+            await group_syncer.sync(paths)
+        else:
+            await run_io(_fsync_paths, paths, data_only=True)
+
+
+async def publish_file(row: CreateFilesSchema) -> None:
+    """
+    Переименовывает временный файл в итоговый путь. Вызывается после
+    фиксации метаданных в базе данных, поэтому по итоговому пути
+    не бывает файлов, которых нет в базе.
+
+    Для блоба, который уже есть на диске, временный файл просто удаляется.
+    Если блоб был удалён сборщиком мусора между проверкой и commit,
+    он восстанавливается из временного файла.
+
+    Файл, записанный через хранилище (row.staged), публикуется самим хранилищем.
+
+    :param row: Метаданные файла с заполненным temp_path или staged.
+    :return: None
+    """
+    if row.staged is not None:
+        with stage("publish"):
+            await row.staged.publish()
+        row.staged = None
+        return
+    if row.temp_path is None:
+        return
+    file_path = STORAGE_ROOT / row.file_path
+    with stage("publish"):
+        if row.content_hash and await run_io(file_path.exists):
+            await run_io(row.temp_path.unlink, missing_ok=True)
+            row.temp_path = None
+            return
+        await run_io(os.replace, row.temp_path, file_path)
+        row.temp_path = None
+    await sync_paths(file_path.parent)
+
+
+async def discard_file(row: CreateFilesSchema) -> None:
+    """
+    Удаляет временный файл (или записанный в хранилище объект),
+    метаданные которого не удалось сохранить.
+
+    :param row: Метаданные файла.
+    :return: None
+    """
+    if row.staged is not None:
+        await row.staged.discard()
+        row.staged = None
+    if row.temp_path is not None:
+        await run_io(row.temp_path.unlink, missing_ok=True)
+        row.temp_path = None
+
+
+def _find_temp_files(min_age: float) -> list[Path]:
+    deadline = time.time() - min_age
+    found = []
+    for root, dirs, names in os.walk(UPLOAD_DIR):
+        root_path = Path(root)
+        if root_path == UPLOAD_SESSIONS_DIR:
+            dirs.clear()
+            continue
+        incoming = root_path == BLOBS_DIR / ".incoming"
+        for name in names:
+            if incoming or TEMP_FILE_PATTERN.match(name):
+                path = root_path / name
+                try:
+                    if path.stat().st_mtime < deadline:
+                        found.append(path)
+                except FileNotFoundError:
+                    continue
+    return found
+
+
+async def reap_temp_files(session_factory, min_age: float | None = None) -> int:
+    """
+    Удаляет временные файлы, оставшиеся после сбоев. Файлы моложе min_age
+    не трогаются, так как могут принадлежать идущей загрузке другого процесса.
+    Если процесс упал между фиксацией в базе и переименованием, а запись
+    ссылается на отсутствующий итоговый файл, переименование завершается.
+
+    :param session_factory: Фабрика асинхронных сессий SQLAlchemy.
+    :param min_age: Минимальный возраст файла в секундах (по умолчанию TEMP_FILE_MIN_AGE).
+    :return: Количество удалённых файлов.
+    """
+    if min_age is None:
+        min_age = settings.TEMP_FILE_MIN_AGE
+    temp_files = await run_io(_find_temp_files, min_age)
+    targets = {}
+    for path in temp_files:
+        match = TEMP_FILE_PATTERN.match(path.name)
+        if match:
+            targets[path] = path.with_name(match["name"])
+
+    committed = set()
+    if targets:
+        async with session_factory() as session:
+            relative = [str(target.relative_to(STORAGE_ROOT)) for target in targets.values()]
+            for start in range(0, len(relative), 1000):
+                committed.update(
+                    await session.scalars(
+                        select(Files.file_path).where(
+                            Files.file_path.in_(relative[start : start + 1000])
+                        )
+                    )
+                )
+
+    removed = 0
+    for path in temp_files:
+        target = targets.get(path)
+        if (
+            target is not None
+            and str(target.relative_to(STORAGE_ROOT)) in committed
+            and not await run_io(target.exists)
+        ):
+            logger.warning("Recovering committed file %s from %s", target, path.name)
+            await run_io(os.replace, path, target)
+            continue
+        await run_io(path.unlink, missing_ok=True)
+        removed += 1
+    if temp_files:
+        logger.info("Reaped %s orphaned temp files", removed)
+    return removed
@@ -0,0 +1,232 @@
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from src.core.settings import settings
+from src.models.files import Files
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCache:
+    """
+    Кеш в памяти процесса с вытеснением по LRU и временем жизни записей.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Any, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Any) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Any, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Any) -> None:
+        self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SharedCache(ABC):
+    """
+    Общий для всех процессов уровень кеша (например, Redis или memcached).
+    Значения хранятся строками, как в сетевом кеше.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: float) -> None: ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+
+class InMemorySharedCache(SharedCache):
+    """
+    Локальная замена общего кеша для разработки и тестов.
+    """
+
+    def __init__(self) -> None:
+        self._data: dict[str, tuple[float, str]] = {}
+
+    async def get(self, key: str) -> str | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+def encode_file(file: Files) -> dict:
+    """
+    Преобразует объект Files в словарь значений колонок.
+
+    :param file: Объект Files.
+    :return: Словарь {имя колонки: значение}.
+    """
+    return {column.key: getattr(file, column.key) for column in Files.__table__.columns}
+
+
+def decode_file(row: dict) -> Files:
+    """
+    Восстанавливает отсоединённый от сессии объект Files из словаря колонок.
+
+    :param row: Словарь {имя колонки: значение}.
+    :return: Объект Files.
+    """
+    return Files(**row)
+
+
+def dump_row(row: dict) -> str:
+    """
+    Сериализует словарь колонок для общего уровня кеша.
+
+    :param row: Словарь {имя колонки: значение}.
+    :return: JSON-строка.
+    """
+    return json.dumps(row, default=str)
+
+
+def load_row(raw: str) -> dict:
+    """
+    Разбирает JSON-строку из общего уровня кеша, восстанавливая UUID и даты.
+
+    :param raw: JSON-строка, полученная из dump_row.
+    :return: Словарь {имя колонки: значение}.
+    """
+    row = json.loads(raw)
+    for column in Files.__table__.columns:
+        value = row.get(column.key)
+        if value is None:
+            continue
+        if column.type.python_type is datetime:
+            row[column.key] = datetime.fromisoformat(value)
+        elif column.type.python_type is UUID:
+            row[column.key] = UUID(value)
+    return row
+
+
+class FileMetadataCache:
+    """
+    Двухуровневый кеш метаданных файлов: LRU/TTL в памяти процесса
+    и необязательный общий уровень. Метаданные после загрузки почти
+    не меняются, поэтому при изменении или удалении файла запись
+    просто инвалидируется на обоих уровнях.
+    """
+
+    key_prefix = "files:"
+
+    def __init__(
+        self,
+        local: LocalCache,
+        shared: SharedCache | None = None,
+        shared_ttl: float = 300,
+    ) -> None:
+        self.local = local
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    async def get(self, file_id: UUID) -> Files | None:
+        row = self.local.get(file_id)
+        if row is not None:
+            self.local_hits += 1
+            return decode_file(row)
+        if self.shared is not None:
+            raw = await self.shared.get(f"{self.key_prefix}{file_id}")
+            if raw is not None:
+                self.shared_hits += 1
+                row = load_row(raw)
+                self.local.set(file_id, row)
+                return decode_file(row)
+        self.misses += 1
+        return None
+
+    async def set(self, file: Files) -> None:
+        row = encode_file(file)
+        self.local.set(file.id, row)
+        if self.shared is not None:
+            await self.shared.set(
+                f"{self.key_prefix}{file.id}", dump_row(row), self.shared_ttl
+            )
+
+    async def invalidate(self, file_id: UUID) -> None:
+        self.local.delete(file_id)
+        if self.shared is not None:
+            await self.shared.delete(f"{self.key_prefix}{file_id}")
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.shared_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.local_hits + self.shared_hits) / lookups
+            if lookups
+            else None,
+            "local_size": len(self.local),
+        }
+
+
+def create_file_cache() -> FileMetadataCache | None:
+    """
+    Создаёт кеш метаданных файлов по настройкам FILE_CACHE_*.
+    В production-режиме с несколькими процессами кеш выключается: оба уровня
+    (и FILE_CACHE_SHARED_BACKEND=memory) живут в памяти процесса, и удаление
+    файла в одном процессе оставило бы устаревшую запись в остальных.
+
+    :return: Объект FileMetadataCache или None, если кеш выключен.
+    """
+    if not settings.FILE_CACHE_ENABLED:
+        return None
+    server_settings = settings.server_settings
+    if server_settings.SERVER_MODE == "production" and server_settings.SERVER_WORKERS != 1:
+        logger.warning(
+            "File metadata cache is disabled: it is local to the process "
+            "and the server runs several workers"
+        )
+        return None
+    shared = None
+    if settings.FILE_CACHE_SHARED_BACKEND == "memory":
+        shared = InMemorySharedCache()
+    return FileMetadataCache(
+        local=LocalCache(maxsize=settings.FILE_CACHE_SIZE, ttl=settings.FILE_CACHE_TTL),
+        shared=shared,
+        shared_ttl=settings.FILE_CACHE_SHARED_TTL,
+    )
+
+
+file_cache: FileMetadataCache | None = create_file_cache()
@@ -1,19 +1,58 @@
+from pathlib import Path
 from uuid import UUID
 
 import aiohttp
 
+from src.core.settings import settings
+from src.services.compression import Codec, iter_decompressed
+from src.services.storage import local_storage
+from src.services.storage.base import StorageBackend
 
-async def upload_to_cloud(file_path: str, uuid: UUID) -> None:
+
+class CloudStorageError(Exception):
+    """
+    Облачное хранилище не приняло файл.
+    """
+
+
+async def upload_to_cloud(
+    http_session: aiohttp.ClientSession,
+    file_path: Path | str,
+    uuid: UUID,
+    filename: str | None = None,
+    codec: Codec | None = None,
+    storage: StorageBackend = local_storage,
+) -> None:
     """
-    Эмуляция отправки в облачное хранилище.
-    :param file_path: Строковый путь, где файл находится.
+    Отправляет файл в облачное хранилище потоковым multipart-запросом.
+    Соединения берутся из пула переданной сессии aiohttp.
+
+    :param http_session: Общая сессия aiohttp с пулом соединений.
+    :param file_path: Путь (ключ в хранилище storage), где файл находится.
     :param uuid: Уникальный идентификатор сохраненного в базе файла
+    :param filename: Имя файла, передаваемое в облачное хранилище.
+    :param codec: Кодек, которым файл сжат на диске (в облако уходит исходное содержимое).
+    :param storage: Хранилище, из которого читается файл.
+    :raises CloudStorageError: Если хранилище ответило ошибкой.
     :return: None
     """
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            "https://fake-cloud-storage.com/upload",
-            data={"uuid": str(uuid), "file": open(file_path, "rb")},
-        ) as response:
-            if response.status != 200:
-                raise Exception("Failed to upload to cloud storage")
+    chunks = storage.get_stream(
+        str(file_path), chunk_size=settings.replication_settings.REPLICATION_CHUNK_SIZE
+    )
+    if codec is not None:
+        chunks = iter_decompressed(chunks, codec)
+    form = aiohttp.FormData()
+    form.add_field("uuid", str(uuid))
+    form.add_field(
+        "file",
+        chunks,
+        filename=filename or Path(file_path).name,
+        content_type="application/octet-stream",
+    )
+    async with http_session.post(
+        settings.replication_settings.CLOUD_STORAGE_URL, data=form
+    ) as response:
+        if response.status != 200:
+            raise CloudStorageError(
+                f"Failed to upload to cloud storage: HTTP {response.status}"
+            )
@@ -0,0 +1,201 @@
+import logging
+import zlib
+from abc import ABC, abstractmethod
+from typing import AsyncIterable, AsyncIterator, Protocol
+
+from src.core.settings import settings
+from src.services.io_executor import run_io
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_PREFIXES = ("text/",)
+COMPRESSIBLE_SUFFIXES = ("+json", "+xml")
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/xml",
+    "application/csv",
+    "application/javascript",
+    "application/x-yaml",
+    "application/yaml",
+    "application/sql",
+    "application/x-sh",
+    "image/svg+xml",
+}
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class Decompressor(Protocol):
+    def decompress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class Codec(ABC):
+    """
+    Кодек хранения. name записывается в Files.codec и совпадает
+    со значением Content-Encoding, под которым содержимое отдаётся клиенту как есть.
+    """
+
+    name: str
+
+    @abstractmethod
+    def compressor(self) -> Compressor: ...
+
+    @abstractmethod
+    def decompressor(self) -> Decompressor: ...
+
+
+class GzipCodec(Codec):
+    name = "gzip"
+
+    def compressor(self) -> Compressor:
+        return zlib.compressobj(settings.COMPRESSION_LEVEL, wbits=31)
+
+    def decompressor(self) -> Decompressor:
+        return zlib.decompressobj(wbits=31)
+
+
+class _ZstdDecompressor:
+    def __init__(self) -> None:
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class ZstdCodec(Codec):
+    name = "zstd"
+
+    def compressor(self) -> Compressor:
+        return zstandard.ZstdCompressor(level=settings.COMPRESSION_LEVEL).compressobj()
+
+    def decompressor(self) -> Decompressor:
+        return _ZstdDecompressor()
+
+
+CODECS: dict[str, Codec] = {"gzip": GzipCodec()}
+if zstandard is not None:
+    CODECS["zstd"] = ZstdCodec()
+
+
+def is_compressible(content_type: str) -> bool:
+    """
+    Проверяет, имеет ли смысл сжимать содержимое этого типа.
+    Изображения, архивы, видео и прочие уже сжатые форматы не сжимаются.
+
+    :param content_type: MIME-тип файла.
+    :return: True для текстовых форматов.
+    """
+    content_type = content_type.split(";", 1)[0].strip().lower()
+    return (
+        content_type in COMPRESSIBLE_TYPES
+        or content_type.startswith(COMPRESSIBLE_PREFIXES)
+        or content_type.endswith(COMPRESSIBLE_SUFFIXES)
+    )
+
+
+def get_codec(name: str | None) -> Codec | None:
+    """
+    Возвращает кодек, которым сохранён файл.
+
+    :param name: Значение Files.codec.
+    :raises RuntimeError: Если кодек недоступен (например, не установлен zstandard).
+    :return: Кодек или None для несжатых файлов.
+    """
+    if name is None:
+        return None
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise RuntimeError(f"Storage codec {name!r} is not available") from None
+
+
+def select_codec(content_type: str) -> Codec | None:
+    """
+    Выбирает кодек для нового файла по COMPRESSION_CODEC и типу содержимого.
+    Если выбран zstd, а пакет zstandard не установлен, используется gzip
+    (предупреждение пишется один раз при запуске, см. check_codec).
+
+    :param content_type: MIME-тип файла.
+    :return: Кодек или None, если файл хранится без сжатия.
+    """
+    name = settings.COMPRESSION_CODEC
+    if name == "none" or not is_compressible(content_type):
+        return None
+    if name not in CODECS:
+        name = "gzip"
+    return CODECS[name]
+
+
+def check_codec() -> None:
+    """
+    Предупреждает при запуске, если кодек COMPRESSION_CODEC недоступен
+    и новые файлы будут сжиматься gzip.
+
+    :return: None
+    """
+    name = settings.COMPRESSION_CODEC
+    if name != "none" and name not in CODECS:
+        logger.warning("Storage codec %s is not available, falling back to gzip", name)
+
+
+def compress(data: bytes, codec: Codec) -> bytes:
+    """
+    Сжимает содержимое целиком.
+
+    :param data: Исходное содержимое.
+    :param codec: Кодек хранения.
+    :return: Сжатое содержимое.
+    """
+    compressor = codec.compressor()
+    return compressor.compress(data) + compressor.flush()
+
+
+async def iter_compressed(
+    chunks: AsyncIterable[bytes], codec: Codec
+) -> AsyncIterator[bytes]:
+    """
+    Сжимает поток блоков. Сжатие выполняется в пуле потоков,
+    чтобы не занимать цикл событий.
+
+    :param chunks: Асинхронный итератор исходных блоков.
+    :param codec: Кодек хранения.
+    :return: Асинхронный итератор сжатых блоков.
+    """
+    compressor = codec.compressor()
+    async for chunk in chunks:
+        if data := await run_io(compressor.compress, chunk):
+            yield data
+    yield compressor.flush()
+
+
+async def iter_decompressed(
+    chunks: AsyncIterable[bytes], codec: Codec
+) -> AsyncIterator[bytes]:
+    """
+    Распаковывает поток блоков, сохранённых кодеком codec.
+
+    :param chunks: Асинхронный итератор сжатых блоков.
+    :param codec: Кодек хранения.
+    :return: Асинхронный итератор исходных блоков.
+    """
+    decompressor = codec.decompressor()
+    async for chunk in chunks:
+        if data := await run_io(decompressor.decompress, chunk):
+            yield data
+    if data := decompressor.flush():
+        yield data
@@ -1,11 +1,109 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterable, Sequence
 from uuid import UUID
-from sqlalchemy import select
+from sqlalchemy import Select, func, insert as sa_insert, select, text, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.db.session import db_session
+from src.models.blobs import Blobs
 from src.models.files import Files
-from fastapi import UploadFile
+from src.core.settings import settings
+from src.schemas.files import (
+    BatchUploadItemSchema,
+    CreateFilesSchema,
+    FilesFilterSchema,
+)
+from fastapi import HTTPException, UploadFile
 
-from src.services.cloud_storage import upload_to_cloud
-from src.services.upload_file import save_file_to_disk
+from src.services.atomic_write import discard_file, publish_file
+from src.services.cache import file_cache
+from src.services.file_stats import get_file_stats, record_file_stats
+from src.services.listing import build_listing_query
+from src.services.metadata_writer import MetadataWriter
+from src.services.replication import (
+    enqueue_replications,
+    initial_replication_status,
+)
+from src.services.upload_file import save_file_to_disk, save_raw_file_to_disk
+from src.services.upload_metrics import stage
+from src.utils.pagination import decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+
+async def add_blob_references(
+    session: AsyncSession, files: Sequence[Files | CreateFilesSchema]
+) -> None:
+    """
+    Увеличивает счётчики ссылок на блобы (или создаёт записи о блобах) для файлов
+    из контентно-адресуемого хранилища одним запросом. Выполняется в транзакции
+    вставки файлов.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param files: Файлы, часть из которых может ссылаться на блобы.
+    :return: None
+    """
+    references: dict[str, dict] = {}
+    for file in files:
+        if not file.content_hash:
+            continue
+        reference = references.setdefault(
+            file.content_hash,
+            {
+                "digest": file.content_hash,
+                "file_path": file.file_path,
+                "file_size": file.file_size,
+                "ref_count": 0,
+            },
+        )
+        reference["ref_count"] += 1
+    if not references:
+        return
+
+    stmt = insert(Blobs).values(list(references.values()))
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Blobs.digest],
+            set_={"ref_count": Blobs.ref_count + stmt.excluded.ref_count},
+        )
+    )
+
+
+async def save_file_metadata(
+    session: AsyncSession, row_file_data: CreateFilesSchema
+) -> Files:
+    """
+    Записывает метаданные сохранённого файла в базу данных и после commit
+    переименовывает временный файл в итоговый путь. Если опубликовать файл
+    не удалось (например, S3 не завершил multipart-загрузку), запись
+    помечается удалённой, чтобы не ссылаться на отсутствующий объект.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param row_file_data: Метаданные файла.
+    :return: Объект Files, представляющий запись сохранённого файла в базе данных.
+    """
+    saved_file = Files(
+        **row_file_data.model_dump(),
+        replication_status=initial_replication_status(),
+    )
+    with stage("db_insert"):
+        session.add(saved_file)
+        await add_blob_references(session, [saved_file])
+        await session.flush()
+        await record_file_stats(session, [saved_file])
+        if saved_file.replication_status:
+            await enqueue_replications(session, [saved_file.id])
+        await session.commit()
+    try:
+        await publish_file(row_file_data)
+    except Exception:
+        await soft_delete_files(session, [saved_file.id])
+        raise
+    with stage("refresh"):
+        await session.refresh(saved_file)
+    return saved_file
 
 
 async def save_file_to_base(
@@ -16,6 +114,8 @@ async def save_file_to_base(
 ) -> Files:
     """
     Сохраняет файл на диск и записывает его метаданные в базу данных.
+    При METADATA_WRITER_ENABLED метаданные записываются одной пачкой
+    с параллельными загрузками через metadata_writer.
 
     :param file: Объект UploadFile, содержащий информацию и данные загружаемого файла.
     :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
@@ -26,14 +126,165 @@ async def save_file_to_base(
     row_file_data = await save_file_to_disk(
         file=file, large=large, chunk_size=chunk_size
     )
-    saved_file = Files(**row_file_data.model_dump())
-    session.add(saved_file)
-    await session.commit()
-    await session.refresh(saved_file)
+    try:
+        if settings.METADATA_WRITER_ENABLED:
+            return await metadata_writer.write(row_file_data)
+        return await save_file_metadata(session, row_file_data)
+    except Exception:
+        await discard_file(row_file_data)
+        raise
 
-    # await upload_to_cloud(file_path=saved_file.file_path, uuid=saved_file.id)
 
-    return saved_file
+async def insert_files(
+    session: AsyncSession, rows: Sequence[CreateFilesSchema]
+) -> list[Files | BaseException]:
+    """
+    Вставляет метаданные нескольких файлов одним запросом INSERT ... RETURNING,
+    фиксирует транзакцию и переименовывает временные файлы в итоговые пути.
+    Записи файлов, которые не удалось опубликовать, помечаются удалёнными,
+    а их временные файлы (объекты хранилища) удаляются; остальные файлы пачки
+    остаются сохранёнными.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param rows: Метаданные сохранённых файлов.
+    :return: Объект Files или ошибка публикации для каждой строки в порядке rows.
+    """
+    if not rows:
+        return []
+    replication_status = initial_replication_status()
+    with stage("db_insert"):
+        saved_files = await session.scalars(
+            sa_insert(Files).returning(Files, sort_by_parameter_order=True),
+            [
+                row.model_dump() | {"replication_status": replication_status}
+                for row in rows
+            ],
+        )
+        saved_files = list(saved_files)
+        await add_blob_references(session, rows)
+        await record_file_stats(session, saved_files)
+        if replication_status:
+            await enqueue_replications(session, [file.id for file in saved_files])
+        await session.commit()
+    published = await asyncio.gather(
+        *(publish_file(row) for row in rows), return_exceptions=True
+    )
+    failed = [
+        (row, saved_file, result)
+        for row, saved_file, result in zip(rows, saved_files, published)
+        if isinstance(result, BaseException)
+    ]
+    if failed:
+        for row, saved_file, error in failed:
+            logger.warning('When publish file "%s" error: %s', row.file_path, error)
+        await soft_delete_files(session, [saved_file.id for _, saved_file, _ in failed])
+        await asyncio.gather(*(discard_file(row) for row, _, _ in failed))
+    return [
+        result if isinstance(result, BaseException) else saved_file
+        for saved_file, result in zip(saved_files, published)
+    ]
+
+
+metadata_writer = MetadataWriter(
+    db_session.session_factory,
+    insert_files,
+    max_delay=settings.METADATA_WRITER_MAX_DELAY,
+    max_batch=settings.METADATA_WRITER_MAX_BATCH,
+)
+
+
+async def save_files_to_base(
+    files: list[UploadFile],
+    session: AsyncSession,
+) -> list[BatchUploadItemSchema]:
+    """
+    Сохраняет пачку файлов: файлы пишутся на диск параллельно, после чего
+    метаданные всех успешно записанных файлов вставляются одним запросом.
+
+    :param files: Список объектов UploadFile.
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :return: Результат по каждому файлу в порядке files, включая ошибки.
+    """
+    semaphore = asyncio.Semaphore(settings.BATCH_UPLOAD_CONCURRENCY)
+
+    async def save_one(file: UploadFile) -> CreateFilesSchema | HTTPException:
+        if file.size is not None and file.size > settings.MAX_SIZE_FILE:
+            return HTTPException(status_code=413, detail="File is too large.")
+        async with semaphore:
+            try:
+                return await save_file_to_disk(file=file)
+            except HTTPException as e:
+                return e
+
+    saved = await asyncio.gather(*(save_one(file) for file in files))
+    rows = [row for row in saved if isinstance(row, CreateFilesSchema)]
+    try:
+        inserted = iter(await insert_files(session, rows))
+    except Exception as e:
+        logger.warning("When insert batch of %s files error: %s", len(rows), e)
+        await session.rollback()
+        await asyncio.gather(*(discard_file(row) for row in rows))
+        saved = [
+            HTTPException(status_code=500, detail="Failed to save file metadata.")
+            if isinstance(row, CreateFilesSchema)
+            else row
+            for row in saved
+        ]
+        inserted = iter(())
+
+    results = []
+    for file, row in zip(files, saved):
+        if isinstance(row, CreateFilesSchema):
+            row = next(inserted)
+            if isinstance(row, BaseException):
+                row = HTTPException(status_code=500, detail="Failed to save file.")
+        if isinstance(row, HTTPException):
+            results.append(
+                BatchUploadItemSchema(
+                    file_old_name=file.filename,
+                    status_code=row.status_code,
+                    detail=row.detail,
+                )
+            )
+        else:
+            results.append(
+                BatchUploadItemSchema(
+                    file_old_name=file.filename,
+                    status_code=200,
+                    file=row,
+                )
+            )
+    return results
+
+
+async def save_raw_file_to_base(
+    chunks: AsyncIterable[bytes],
+    filename: str,
+    content_type: str,
+    max_size: int,
+    session: AsyncSession,
+) -> Files:
+    """
+    Сохраняет тело запроса на диск потоком и записывает метаданные файла в базу данных
+    (при METADATA_WRITER_ENABLED - пачкой через metadata_writer).
+
+    :param chunks: Асинхронный итератор блоков тела запроса.
+    :param filename: Исходное имя файла, переданное клиентом.
+    :param content_type: MIME-тип файла.
+    :param max_size: Максимально допустимый размер файла в байтах.
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :return: Объект Files, представляющий запись сохранённого файла в базе данных.
+    """
+    row_file_data = await save_raw_file_to_disk(
+        chunks=chunks, filename=filename, content_type=content_type, max_size=max_size
+    )
+    try:
+        if settings.METADATA_WRITER_ENABLED:
+            return await metadata_writer.write(row_file_data)
+        return await save_file_metadata(session, row_file_data)
+    except Exception:
+        await discard_file(row_file_data)
+        raise
 
 
 async def get_file(
@@ -47,23 +298,161 @@ async def get_file(
     :param filed_id: UUID файла, который нужно получить.
     :return: Объект Files, представляющий файл из базы данных, или None, если файл не найден.
     """
-    file = await session.scalar(select(Files).where(Files.id == filed_id))
+    if file_cache is not None and (file := await file_cache.get(filed_id)):
+        return file
+    file = await session.scalar(
+        select(Files).where(Files.id == filed_id, Files.deleted_at.is_(None))
+    )
+    if file is not None and file_cache is not None:
+        await file_cache.set(file)
     return file
 
 
+async def soft_delete_files(session: AsyncSession, file_ids: Sequence[UUID]) -> int:
+    """
+    Помечает файлы удалёнными и вычитает их из агрегатов file_stats
+    в одной транзакции. Строки и файлы в хранилище удаляются позже
+    сборщиком мусора, через GC_RETENTION секунд.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param file_ids: UUID файлов, которые нужно удалить.
+    :return: Количество файлов, помеченных удалёнными.
+    """
+    deleted = (
+        await session.execute(
+            update(Files)
+            .where(Files.id.in_(file_ids), Files.deleted_at.is_(None))
+            .values(deleted_at=func.now())
+            .returning(
+                Files.file_format, Files.file_extension, Files.file_size, Files.created_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+    ).all()
+    await record_file_stats(session, deleted, sign=-1)
+    await session.commit()
+    return len(deleted)
+
+
+async def soft_delete_file(
+    session: AsyncSession,
+    filed_id: UUID,
+) -> bool:
+    """
+    Помечает файл удалённым и вычитает его из агрегатов file_stats.
+    Строка и файл на диске удаляются позже сборщиком мусора,
+    через GC_RETENTION секунд.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param filed_id: UUID файла, который нужно удалить.
+    :return: True, если файл был помечен удалённым, False, если он не найден.
+    """
+    deleted = await soft_delete_files(session, [filed_id])
+    if deleted and file_cache is not None:
+        await file_cache.invalidate(filed_id)
+    return bool(deleted)
+
+
 async def get_files(
     page_size: int,
     page_number: int,
     session: AsyncSession,
+    filters: FilesFilterSchema | None = None,
 ) -> list[Files]:
     """
-    Возвращает список файлов из базы данных с поддержкой пагинации.
+    Возвращает список неудалённых файлов из базы данных с фильтрами,
+    сортировкой и поддержкой пагинации.
 
     :param page_size: Количество файлов, возвращаемых на одной странице.
     :param page_number: Номер страницы для пагинации.
     :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param filters: Фильтры и сортировка (по умолчанию - все файлы по дате создания).
+    :raises HTTPException: 400, если сочетание фильтров не обслуживается индексами.
     :return: Список объектов Files, представляющих файлы из базы данных.
     """
     page_from = page_size * (page_number - 1)
-    file = await session.scalars(select(Files).offset(page_from).limit(page_size))
+    stmt = build_listing_query(filters or FilesFilterSchema())
+    file = await session.scalars(stmt.offset(page_from).limit(page_size))
     return list(file)
+
+
+async def estimate_rows(session: AsyncSession, stmt: Select) -> int:
+    """
+    Оценка числа строк запроса по плану (EXPLAIN), без его выполнения.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param stmt: Запрос SQLAlchemy.
+    :return: Оценка планировщика.
+    """
+    compiled = stmt.compile(
+        dialect=session.bind.dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = await session.scalar(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_files(
+    session: AsyncSession, filters: FilesFilterSchema | None = None
+) -> tuple[int, bool]:
+    """
+    Итог листинга без чтения всей выборки. Без фильтров и с фильтрами
+    только по file_format/file_extension он берётся из агрегатов file_stats.
+    Иначе строки считаются точно, но не дальше LISTING_EXACT_COUNT_LIMIT:
+    для больших выборок возвращается оценка планировщика.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param filters: Фильтры листинга.
+    :raises HTTPException: 400, если сочетание фильтров не обслуживается индексами.
+    :return: Итог и признак того, что он точный.
+    """
+    filters = filters or FilesFilterSchema()
+    stmt = build_listing_query(filters).order_by(None)
+    used = filters.model_dump(exclude={"sort"}, exclude_none=True)
+    if used.keys() <= {"file_format", "file_extension"}:
+        (total,) = await get_file_stats(session, group_by=(), **used)
+        return total["files_count"], True
+
+    limit = settings.stats_settings.LISTING_EXACT_COUNT_LIMIT
+    exact = await session.scalar(
+        select(func.count()).select_from(
+            stmt.with_only_columns(Files.id).limit(limit + 1).subquery()
+        )
+    )
+    if exact <= limit:
+        return exact, True
+    return max(await estimate_rows(session, stmt), limit + 1), False
+
+
+async def get_files_page(
+    page_size: int,
+    cursor: str | None,
+    session: AsyncSession,
+) -> tuple[list[Files], str | None]:
+    """
+    Возвращает страницу файлов с курсорной (keyset) пагинацией по (created_at, id).
+    В отличие от OFFSET, стоимость запроса не зависит от глубины страницы,
+    а вставка новых строк не сдвигает уже пройденные.
+
+    :param page_size: Количество файлов, возвращаемых на одной странице.
+    :param cursor: Курсор из предыдущего ответа или None для первой страницы.
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :return: Список объектов Files и курсор следующей страницы (None на последней).
+    """
+    stmt = (
+        select(Files)
+        .where(Files.deleted_at.is_(None))
+        .order_by(Files.created_at, Files.id)
+        .limit(page_size + 1)
+    )
+    if cursor:
+        created_at, file_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(Files.created_at, Files.id) > tuple_(created_at, file_id)
+        )
+    files = list(await session.scalars(stmt))
+    if len(files) <= page_size:
+        return files, None
+    files = files[:page_size]
+    return files, encode_cursor(files[-1].created_at, files[-1].id)
@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.settings import STORAGE_ROOT, UPLOAD_SESSIONS_DIR, settings
+from src.models.files import Files
+from src.models.upload_sessions import UploadSessions
+from src.schemas.upload_sessions import (
+    CreateUploadSessionSchema,
+    ShowUploadSessionSchema,
+)
+from src.services.crud.files import save_file_metadata
+from src.services.resumable_upload import (
+    create_upload_file,
+    finalize_upload,
+    get_parts_count,
+    remove_upload_file,
+)
+
+
+def to_show_schema(upload: UploadSessions) -> ShowUploadSessionSchema:
+    """
+    Преобразует сессию загрузки в схему ответа.
+
+    :param upload: Сессия загрузки.
+    :return: Объект ShowUploadSessionSchema.
+    """
+    return ShowUploadSessionSchema(
+        id=upload.id,
+        file_name=upload.file_name,
+        file_format=upload.file_format,
+        file_size=upload.file_size,
+        part_size=upload.part_size,
+        parts_count=get_parts_count(upload.file_size, upload.part_size),
+        received_parts=sorted(upload.received_parts),
+        expires_at=upload.expires_at,
+    )
+
+
+async def create_upload_session(
+    session: AsyncSession, data: CreateUploadSessionSchema
+) -> UploadSessions:
+    """
+    Создаёт сессию возобновляемой загрузки и разреженный файл под неё.
+    Место на диске выделяется по мере загрузки частей.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param data: Параметры загружаемого файла.
+    :return: Объект UploadSessions.
+    """
+    upload_id = uuid4()
+    temp_path = UPLOAD_SESSIONS_DIR / f"{upload_id.hex}.part"
+    await create_upload_file(temp_path, data.file_size)
+
+    upload = UploadSessions(
+        id=upload_id,
+        file_name=data.file_name,
+        file_format=data.file_format,
+        file_size=data.file_size,
+        part_size=data.part_size or settings.UPLOAD_PART_DEFAULT_SIZE,
+        temp_path=str(temp_path.relative_to(STORAGE_ROOT)),
+        received_parts=[],
+        expires_at=datetime.now(timezone.utc)
+        + timedelta(seconds=settings.UPLOAD_SESSION_TTL),
+    )
+    session.add(upload)
+    await session.commit()
+    return upload
+
+
+async def get_upload_session(
+    session: AsyncSession, upload_id: UUID, for_update: bool = False
+) -> UploadSessions | None:
+    """
+    Получает не просроченную сессию загрузки по её идентификатору.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param upload_id: UUID сессии загрузки.
+    :param for_update: Заблокировать строку до конца транзакции.
+    :return: Объект UploadSessions или None, если сессия не найдена или истекла.
+    """
+    stmt = select(UploadSessions).where(
+        UploadSessions.id == upload_id,
+        UploadSessions.expires_at > func.now(),
+    )
+    if for_update:
+        stmt = stmt.with_for_update()
+    return await session.scalar(stmt)
+
+
+async def mark_part_received(
+    session: AsyncSession, upload_id: UUID, index: int
+) -> None:
+    """
+    Атомарно добавляет номер части в список принятых (повторная загрузка части идемпотентна).
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param upload_id: UUID сессии загрузки.
+    :param index: Номер принятой части.
+    :return: None
+    """
+    await session.execute(
+        update(UploadSessions)
+        .where(
+            UploadSessions.id == upload_id,
+            func.array_position(UploadSessions.received_parts, index).is_(None),
+        )
+        .values(received_parts=func.array_append(UploadSessions.received_parts, index))
+    )
+    await session.commit()
+
+
+async def complete_upload_session(
+    session: AsyncSession, upload: UploadSessions
+) -> Files:
+    """
+    Завершает сессию: переносит файл в итоговое место и записывает его метаданные.
+    Удаление сессии и вставка файла выполняются в одной транзакции.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param upload: Заблокированная сессия загрузки, все части которой приняты.
+    :return: Объект Files, представляющий запись сохранённого файла в базе данных.
+    """
+    row_file_data = await finalize_upload(upload)
+    await session.delete(upload)
+    return await save_file_metadata(session, row_file_data)
+
+
+async def delete_upload_session(session: AsyncSession, upload: UploadSessions) -> None:
+    """
+    Отменяет сессию загрузки и удаляет её файл.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param upload: Сессия загрузки.
+    :return: None
+    """
+    await session.delete(upload)
+    await session.commit()
+    await remove_upload_file(upload)
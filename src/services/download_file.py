@@ -0,0 +1,394 @@
+import logging
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from secrets import token_hex
+from urllib.parse import quote
+
+from fastapi import HTTPException
+from starlette import status
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from src.core.settings import settings
+from src.models.files import Files
+from src.services.compression import Codec, get_codec, iter_decompressed
+from src.services.io_executor import open_file
+from src.services.storage import get_storage
+from src.services.storage.base import ObjectStat, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+def parse_range_header(
+    range_header: str, file_size: int
+) -> list[tuple[int, int]] | None:
+    """
+    Разбирает заголовок Range в список диапазонов байт.
+
+    Пересекающиеся и соседние диапазоны объединяются. Синтаксически некорректный
+    заголовок игнорируется (возвращается None), как того требует RFC 9110.
+
+    :param range_header: Значение заголовка Range.
+    :param file_size: Размер файла в байтах.
+    :raises HTTPException: 416, если ни один из диапазонов не попадает в файл.
+    :return: Список пар (начало, конец) с невключаемым концом или None.
+    """
+    unit, _, ranges_spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not ranges_spec.strip():
+        return None
+
+    ranges: list[tuple[int, int]] = []
+    for part in ranges_spec.split(","):
+        start_str, sep, end_str = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if not start_str:
+                suffix = int(end_str)
+                if suffix <= 0:
+                    continue
+                start, end = max(file_size - suffix, 0), file_size
+            else:
+                start = int(start_str)
+                end = int(end_str) + 1 if end_str else file_size
+        except ValueError:
+            return None
+        if start >= file_size:
+            continue
+        if end <= start:
+            return None
+        ranges.append((start, min(end, file_size)))
+
+    if not ranges:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{file_size}"},
+        )
+    if len(ranges) > settings.DOWNLOAD_MAX_RANGES:
+        return None
+
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def build_etag(file: Files, stat: ObjectStat) -> str:
+    """
+    Формирует сильный ETag. Для файлов из контентно-адресуемого хранилища
+    это хеш содержимого, для остальных - идентификатор, размер и время изменения.
+
+    :param file: Объект Files с метаданными файла.
+    :param stat: Размер и время изменения файла в хранилище.
+    :return: Значение ETag в кавычках.
+    """
+    if file.content_hash:
+        return f'"{file.content_hash}"'
+    return f'"{file.id.hex}-{stat.size:x}-{stat.mtime_ns:x}"'
+
+
+def etag_matches(header_value: str, etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match (слабое сравнение).
+
+    :param header_value: Значение заголовка If-None-Match.
+    :param etag: Текущий ETag файла.
+    :return: True, если ETag совпадает или указан "*".
+    """
+    if header_value.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in header_value.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def not_modified_since(header_value: str, last_modified: datetime) -> bool:
+    """
+    Проверяет заголовок If-Modified-Since.
+
+    :param header_value: Значение заголовка If-Modified-Since.
+    :param last_modified: Время последнего изменения файла.
+    :return: True, если файл не менялся после указанной даты.
+    """
+    try:
+        since = parsedate_to_datetime(header_value)
+    except (TypeError, ValueError):
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+def accepts_encoding(header_value: str | None, encoding: str) -> bool:
+    """
+    Проверяет, принимает ли клиент указанную кодировку (заголовок Accept-Encoding).
+
+    :param header_value: Значение заголовка Accept-Encoding.
+    :param encoding: Кодировка, например gzip или zstd.
+    :return: True, если кодировка (или "*") указана с ненулевым q.
+    """
+    if not header_value:
+        return False
+    accepted = {}
+    for item in header_value.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+
+class FileContentResponse(Response):
+    """
+    Отдаёт содержимое файла с поддержкой Range, ETag и Last-Modified.
+
+    Файл из локальной файловой системы читается напрямую с диска, из остальных
+    хранилищ - потоком get_stream, в обоих случаях блоками DOWNLOAD_CHUNK_SIZE.
+
+    Сжатый на диске файл отдаётся как есть с Content-Encoding, если клиент
+    принимает эту кодировку (диапазоны тогда относятся к сжатому представлению),
+    иначе распаковывается потоком, без поддержки Range.
+    """
+
+    def __init__(
+        self,
+        storage: StorageBackend,
+        key: str,
+        stat: ObjectStat,
+        etag: str,
+        media_type: str,
+        filename: str,
+        codec: Codec | None = None,
+        content_size: int | None = None,
+    ) -> None:
+        self.storage = storage
+        self.key = key
+        self.path = storage.local_path(key)
+        self.file_size = stat.size
+        self.codec = codec
+        self.content_size = content_size
+        self.etag = etag
+        self.media_type = media_type
+        self.last_modified = datetime.fromtimestamp(stat.mtime, tz=timezone.utc)
+        self.status_code = status.HTTP_200_OK
+        self.background = None
+        self.init_headers(
+            {
+                "accept-ranges": "bytes",
+                "etag": etag,
+                "last-modified": format_datetime(self.last_modified, usegmt=True),
+                "content-disposition": (
+                    f"attachment; filename*=utf-8''{quote(filename)}"
+                ),
+            }
+        )
+        if codec is not None:
+            self.headers["vary"] = "Accept-Encoding"
+
+    def _is_not_modified(self, request_headers: Headers) -> bool:
+        if if_none_match := request_headers.get("if-none-match"):
+            return etag_matches(if_none_match, self.etag)
+        if if_modified_since := request_headers.get("if-modified-since"):
+            return not_modified_since(if_modified_since, self.last_modified)
+        return False
+
+    def _range_applies(self, request_headers: Headers) -> bool:
+        if_range = request_headers.get("if-range")
+        if not if_range:
+            return True
+        if if_range.startswith(('"', "W/")):
+            return if_range == self.etag
+        return not_modified_since(if_range, self.last_modified)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        send_body = scope["method"].upper() != "HEAD"
+        decode = False
+        if self.codec is not None:
+            if accepts_encoding(request_headers.get("accept-encoding"), self.codec.name):
+                self.etag = f'{self.etag[:-1]}-{self.codec.name}"'
+                self.headers["etag"] = self.etag
+                self.headers["content-encoding"] = self.codec.name
+            else:
+                decode = True
+                self.headers["accept-ranges"] = "none"
+
+        if self._is_not_modified(request_headers):
+            headers = [
+                (key, value)
+                for key, value in self.raw_headers
+                if key in (b"etag", b"last-modified", b"accept-ranges", b"vary")
+            ]
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": status.HTTP_304_NOT_MODIFIED,
+                    "headers": headers,
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if decode:
+            await self._send_decoded(send, send_body)
+            return
+
+        ranges = None
+        range_header = request_headers.get("range")
+        if range_header and self._range_applies(request_headers):
+            try:
+                ranges = parse_range_header(range_header, self.file_size)
+            except HTTPException as exc:
+                response = Response(
+                    status_code=exc.status_code,
+                    headers={"content-range": f"bytes */{self.file_size}"},
+                )
+                await response(scope, receive, send)
+                return
+
+        if not ranges:
+            self.headers["content-length"] = str(self.file_size)
+            segments = [(0, self.file_size)]
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.status_code = status.HTTP_206_PARTIAL_CONTENT
+            self.headers["content-length"] = str(end - start)
+            self.headers["content-range"] = f"bytes {start}-{end - 1}/{self.file_size}"
+            segments = [ranges[0]]
+        else:
+            boundary = token_hex(16)
+            self.status_code = status.HTTP_206_PARTIAL_CONTENT
+            self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+            segments = self._multipart_segments(ranges, boundary)
+            self.headers["content-length"] = str(
+                sum(
+                    len(segment) if isinstance(segment, bytes) else segment[1] - segment[0]
+                    for segment in segments
+                )
+            )
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if not send_body:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await self._send_segments(send, segments)
+
+    async def _send_decoded(self, send: Send, send_body: bool) -> None:
+        self.headers["content-length"] = str(self.content_size)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if send_body:
+            chunks = self.storage.get_stream(self.key)
+            async for chunk in iter_decompressed(chunks, self.codec):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    def _multipart_segments(
+        self, ranges: list[tuple[int, int]], boundary: str
+    ) -> list[bytes | tuple[int, int]]:
+        segments: list[bytes | tuple[int, int]] = []
+        for start, end in ranges:
+            segments.append(
+                (
+                    f"--{boundary}\r\n"
+                    f"Content-Type: {self.media_type}\r\n"
+                    f"Content-Range: bytes {start}-{end - 1}/{self.file_size}\r\n\r\n"
+                ).encode("latin-1")
+            )
+            segments.append((start, end))
+            segments.append(b"\r\n")
+        segments.append(f"--{boundary}--\r\n".encode("latin-1"))
+        return segments
+
+    async def _send_segments(
+        self, send: Send, segments: list[bytes | tuple[int, int]]
+    ) -> None:
+        if self.path is None:
+            await self._send_storage_segments(send, segments)
+            return
+        chunk_size = settings.DOWNLOAD_CHUNK_SIZE
+        async with open_file(self.path, "rb") as file:
+            for segment in segments:
+                if isinstance(segment, bytes):
+                    await send(
+                        {"type": "http.response.body", "body": segment, "more_body": True}
+                    )
+                    continue
+                start, end = segment
+                await file.seek(start)
+                remaining = end - start
+                while remaining > 0:
+                    chunk = await file.read(min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send(
+                        {"type": "http.response.body", "body": chunk, "more_body": True}
+                    )
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _send_storage_segments(
+        self, send: Send, segments: list[bytes | tuple[int, int]]
+    ) -> None:
+        for segment in segments:
+            if isinstance(segment, bytes):
+                await send({"type": "http.response.body", "body": segment, "more_body": True})
+                continue
+            start, end = segment
+            async for chunk in self.storage.get_stream(self.key, start, end):
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def build_file_response(file: Files) -> FileContentResponse:
+    """
+    Готовит ответ с содержимым файла, сохранённого по ключу Files.file_path
+    в хранилище Files.storage_backend.
+
+    :param file: Объект Files с метаданными файла.
+    :raises HTTPException: 404, если файла нет в хранилище.
+    :return: Объект FileContentResponse.
+    """
+    storage = get_storage(file.storage_backend)
+    stat = await storage.stat(file.file_path)
+    if stat is None:
+        logger.warning(
+            'File "%s" of record %s is missing in %s storage',
+            file.file_path,
+            file.id,
+            storage.name,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="File content not found"
+        )
+    return FileContentResponse(
+        storage=storage,
+        key=file.file_path,
+        stat=stat,
+        etag=build_etag(file, stat),
+        media_type=file.file_format,
+        filename=file.file_old_name,
+        codec=get_codec(file.codec),
+        content_size=file.file_size,
+    )
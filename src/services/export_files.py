@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Literal
+from uuid import UUID
+
+from sqlalchemy import Select, select
+
+from src.core.settings import settings
+from src.db.session import db_session
+from src.models.files import Files
+
+EXPORT_COLUMNS = (
+    Files.id,
+    Files.file_old_name,
+    Files.file_new_name,
+    Files.file_format,
+    Files.file_extension,
+    Files.file_size,
+    Files.file_path,
+    Files.content_hash,
+    Files.replication_status,
+    Files.created_at,
+    Files.updated_at,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def build_export_query(
+    file_format: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+) -> Select:
+    """
+    Формирует запрос выгрузки неудалённых файлов: только нужные колонки,
+    без создания объектов ORM, в порядке (created_at, id), чтобы использовать
+    индекс ix_files_live_created_at_id.
+
+    :param file_format: Только файлы с этим MIME-типом.
+    :param created_from: Только файлы, созданные не раньше этого момента.
+    :param created_to: Только файлы, созданные раньше этого момента.
+    :return: Запрос SQLAlchemy.
+    """
+    stmt = (
+        select(*EXPORT_COLUMNS)
+        .where(Files.deleted_at.is_(None))
+        .order_by(Files.created_at, Files.id)
+    )
+    if file_format is not None:
+        stmt = stmt.where(Files.file_format == file_format)
+    if created_from is not None:
+        stmt = stmt.where(Files.created_at >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(Files.created_at < created_to)
+    return stmt
+
+
+def encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def encode_ndjson(rows) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, map(encode_value, row))), ensure_ascii=False)
+        + "\n"
+        for row in rows
+    ).encode()
+
+
+def encode_csv(rows, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows([map(encode_value, row) for row in rows])
+    return buffer.getvalue().encode()
+
+
+async def iter_export(
+    stmt: Select,
+    export_format: Literal["ndjson", "csv"],
+    compress: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Выгружает строки запроса потоком через серверный курсор.
+    В памяти одновременно находится не больше EXPORT_BATCH_SIZE строк.
+    Используется собственная сессия, так как поток живёт дольше обработчика запроса.
+
+    :param stmt: Запрос из build_export_query.
+    :param export_format: Формат выгрузки: ndjson или csv.
+    :param compress: Сжимать поток в gzip.
+    :return: Асинхронный итератор блоков ответа.
+    """
+    batch_size = settings.EXPORT_BATCH_SIZE
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    if export_format == "csv":
+        chunk = encode_csv([], header=True)
+        yield compressor.compress(chunk) if compressor else chunk
+
+    async with db_session.session_factory() as session:
+        result = await session.stream(stmt.execution_options(yield_per=batch_size))
+        async for rows in result.partitions(batch_size):
+            if export_format == "csv":
+                chunk = encode_csv(rows)
+            else:
+                chunk = encode_ndjson(rows)
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+                if not chunk:
+                    continue
+            yield chunk
+
+    if compressor is not None:
+        yield compressor.flush()
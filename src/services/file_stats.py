@@ -0,0 +1,196 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, timezone
+from typing import Iterable, Literal, Sequence
+
+from sqlalchemy import BigInteger, delete, func, insert, literal_column, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.settings import settings
+from src.models.file_stats import FileStats, FileStatsDeltas
+from src.utils.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+STATS_ROLLUP_GROUPS = Counter()
+
+StatsGroup = Literal["file_format", "file_extension", "day"]
+STATS_COLUMNS = ("file_format", "file_extension", "day", "files_count", "total_size")
+
+
+async def record_file_stats(
+    session: AsyncSession, files: Iterable, sign: int = 1
+) -> None:
+    """
+    Добавляет изменения агрегатов для вставленных (sign=1) или помеченных
+    удалёнными (sign=-1) файлов одним запросом. Выполняется в транзакции
+    изменения файлов, поэтому агрегаты не расходятся с таблицей files.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param files: Объекты или строки с file_format, file_extension, file_size и created_at.
+    :param sign: 1 для новых файлов, -1 для удалённых.
+    :return: None
+    """
+    groups: dict[tuple[str, str, date], list[int]] = defaultdict(lambda: [0, 0])
+    for file in files:
+        day = file.created_at.astimezone(timezone.utc).date()
+        group = groups[(file.file_format, file.file_extension, day)]
+        group[0] += sign
+        group[1] += sign * file.file_size
+    if not groups:
+        return
+    await session.execute(
+        insert(FileStatsDeltas),
+        [
+            {
+                "file_format": file_format,
+                "file_extension": file_extension,
+                "day": day,
+                "files_count": files_count,
+                "total_size": total_size,
+            }
+            for (file_format, file_extension, day), (
+                files_count,
+                total_size,
+            ) in groups.items()
+        ],
+    )
+
+
+async def rollup_file_stats(session: AsyncSession) -> int:
+    """
+    Сворачивает накопленные изменения в file_stats одним запросом:
+    DELETE ... RETURNING из file_stats_deltas, группировка и upsert.
+    Изменения транзакций, зафиксированных позже начала свёртки, остаются
+    до следующего прохода.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :return: Количество обновлённых групп file_stats.
+    """
+    moved = (
+        delete(FileStatsDeltas)
+        .returning(*(getattr(FileStatsDeltas, name) for name in STATS_COLUMNS))
+        .cte("moved")
+    )
+    grouped = select(
+        func.gen_random_uuid(),
+        moved.c.file_format,
+        moved.c.file_extension,
+        moved.c.day,
+        func.sum(moved.c.files_count),
+        func.sum(moved.c.total_size),
+    ).group_by(moved.c.file_format, moved.c.file_extension, moved.c.day)
+    stmt = pg_insert(FileStats).from_select(
+        ["id", *STATS_COLUMNS], grouped, include_defaults=False
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_file_stats_group",
+        set_={
+            "files_count": FileStats.files_count + stmt.excluded.files_count,
+            "total_size": FileStats.total_size + stmt.excluded.total_size,
+            "updated_at": func.now(),
+        },
+    ).returning(literal_column("1"))
+    rows = (await session.execute(stmt)).all()
+    await session.commit()
+    return len(rows)
+
+
+def _stats_source():
+    """
+    Свёрнутые агрегаты вместе с ещё не свёрнутыми изменениями,
+    поэтому результат точен независимо от того, когда прошла свёртка.
+    """
+    return union_all(
+        select(*(getattr(FileStats, name) for name in STATS_COLUMNS)),
+        select(*(getattr(FileStatsDeltas, name) for name in STATS_COLUMNS)),
+    ).subquery("stats")
+
+
+async def get_file_stats(
+    session: AsyncSession,
+    group_by: Sequence[StatsGroup] = ("file_format",),
+    file_format: str | None = None,
+    file_extension: str | None = None,
+    day_from: date | None = None,
+    day_to: date | None = None,
+) -> list[dict]:
+    """
+    Количество и суммарный размер неудалённых файлов по группам из агрегатов,
+    без чтения таблицы files.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param group_by: Поля группировки (пустой список - общий итог).
+    :param file_format: Только файлы с этим MIME-типом.
+    :param file_extension: Только файлы с этим расширением.
+    :param day_from: Созданные не раньше этого дня (UTC).
+    :param day_to: Созданные не позже этого дня (UTC).
+    :return: Список групп: поля группировки, files_count и total_size.
+    """
+    stats = _stats_source()
+    group_columns = [stats.c[name] for name in group_by]
+    stmt = (
+        select(
+            *group_columns,
+            func.coalesce(func.sum(stats.c.files_count), 0)
+            .cast(BigInteger)
+            .label("files_count"),
+            func.coalesce(func.sum(stats.c.total_size), 0)
+            .cast(BigInteger)
+            .label("total_size"),
+        )
+        .group_by(*group_columns)
+        .order_by(*group_columns)
+    )
+    if group_columns:
+        stmt = stmt.having(func.sum(stats.c.files_count) != 0)
+    if file_format is not None:
+        stmt = stmt.where(stats.c.file_format == file_format)
+    if file_extension is not None:
+        stmt = stmt.where(stats.c.file_extension == file_extension)
+    if day_from is not None:
+        stmt = stmt.where(stats.c.day >= day_from)
+    if day_to is not None:
+        stmt = stmt.where(stats.c.day <= day_to)
+    return [dict(row._mapping) for row in await session.execute(stmt)]
+
+
+class StatsRollup:
+    """
+    Фоновая свёртка file_stats_deltas в file_stats раз в STATS_ROLLUP_INTERVAL
+    секунд, чтобы чтение агрегатов не суммировало растущую таблицу изменений.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self.session_factory = session_factory
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="stats-rollup")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.warning("Stats rollup failed: %s", e)
+            await asyncio.sleep(settings.stats_settings.STATS_ROLLUP_INTERVAL)
+
+    async def run_once(self) -> int:
+        """
+        Один проход свёртки.
+
+        :return: Количество обновлённых групп file_stats.
+        """
+        async with self.session_factory() as session:
+            groups = await rollup_file_stats(session)
+        STATS_ROLLUP_GROUPS.inc(groups)
+        return groups
@@ -0,0 +1,362 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import Counter as Multiset
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, Sequence
+from uuid import UUID
+
+from sqlalchemy import bindparam, delete, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.settings import BLOBS_DIR, STORAGE_ROOT, UPLOAD_DIR, settings
+from src.models.blobs import Blobs
+from src.models.files import Files
+from src.models.upload_sessions import UploadSessions
+from src.services.atomic_write import TEMP_FILE_PATTERN
+from src.services.cache import file_cache
+from src.services.file_stats import record_file_stats
+from src.services.io_executor import run_io
+from src.services.storage import get_storage
+from src.utils.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+GC_PURGED_FILES = Counter()
+GC_UNLINKED_FILES = Counter()
+GC_ORPHAN_FILES = Counter()
+GC_MISSING_FILES = Counter()
+GC_EXPIRED_UPLOAD_SESSIONS = Counter()
+
+
+class RateLimiter:
+    """
+    Ограничивает частоту операций: не больше rate операций в секунду
+    в среднем, без накопления запаса на время простоя.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next_at = 0.0
+
+    async def acquire(self, count: int = 1) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        self._next_at = max(self._next_at, now)
+        delay = self._next_at - now
+        self._next_at += self.interval * count
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _walk_files(min_age: float) -> Iterator[Path]:
+    deadline = time.time() - min_age
+    skip_dirs = {BLOBS_DIR / ".incoming"}
+    for root, dirs, names in os.walk(UPLOAD_DIR):
+        root_path = Path(root)
+        dirs[:] = [name for name in dirs if root_path / name not in skip_dirs]
+        for name in names:
+            if TEMP_FILE_PATTERN.match(name):
+                continue
+            path = root_path / name
+            try:
+                stat_result = path.lstat()
+            except FileNotFoundError:
+                continue
+            # ctime меняется и при создании жёсткой ссылки (relocate_files)
+            if max(stat_result.st_mtime, stat_result.st_ctime) < deadline:
+                yield path
+
+
+def _next_batch(iterator: Iterator[Path], size: int) -> list[Path]:
+    return list(itertools.islice(iterator, size))
+
+
+def _missing_paths(paths: list[str]) -> set[str]:
+    return {path for path in paths if not (STORAGE_ROOT / path).exists()}
+
+
+class GarbageCollector:
+    """
+    Фоновая сборка мусора в хранилище:
+
+    - удаляет строки, помеченные удалёнными дольше GC_RETENTION секунд,
+      и их файлы (блобы - когда на них не осталось ссылок);
+    - удаляет просроченные сессии возобновляемой загрузки и их файлы;
+    - раз в GC_SCAN_INTERVAL ищет файлы на диске без строк в базе (удаляет)
+      и строки без файлов (GC_MISSING_FILE_ACTION).
+
+    Работа идёт пачками по GC_BATCH_SIZE, удаление и обход файлов ограничены
+    по частоте, чтобы не занимать диск целиком в часы нагрузки.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        gc_settings = settings.gc_settings
+        self.session_factory = session_factory
+        self._unlink_limiter = RateLimiter(gc_settings.GC_MAX_DELETES_PER_SECOND)
+        self._scan_limiter = RateLimiter(gc_settings.GC_SCAN_FILES_PER_SECOND)
+        self._last_scan_at: float | None = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="garbage-collector")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        gc_settings = settings.gc_settings
+        while True:
+            try:
+                scan = (
+                    self._last_scan_at is None
+                    or time.monotonic() - self._last_scan_at
+                    >= gc_settings.GC_SCAN_INTERVAL
+                )
+                await self.run_once(scan=scan)
+                if scan:
+                    self._last_scan_at = time.monotonic()
+            except Exception as e:
+                logger.warning("Garbage collector iteration failed: %s", e)
+            await asyncio.sleep(gc_settings.GC_INTERVAL)
+
+    async def run_once(self, scan: bool = False) -> None:
+        """
+        Один проход сборки мусора.
+
+        :param scan: Также искать файлы без строк и строки без файлов.
+        :return: None
+        """
+        await self.purge_deleted_files()
+        await self.purge_upload_sessions()
+        if scan:
+            await self.remove_orphan_files()
+            await self.find_missing_files()
+
+    async def _unlink(self, relative_path: str, storage_backend: str | None = None) -> None:
+        await self._unlink_limiter.acquire()
+        await get_storage(storage_backend).delete(relative_path)
+        GC_UNLINKED_FILES.inc()
+
+    async def purge_deleted_files(self, file_ids: Sequence[UUID] | None = None) -> int:
+        """
+        Окончательно удаляет строки, помеченные удалёнными дольше GC_RETENTION.
+        Блобы без ссылок удаляются с диска до commit удаления строки блоба:
+        параллельная загрузка того же содержимого ждёт блокировку строки
+        и после commit создаёт блоб заново из своего временного файла.
+
+        :param file_ids: Удалить только эти строки из помеченных удалёнными,
+            не дожидаясь GC_RETENTION.
+        :return: Количество удалённых строк.
+        """
+        gc_settings = settings.gc_settings
+        if file_ids is None:
+            cutoff = datetime.now(timezone.utc) - timedelta(seconds=gc_settings.GC_RETENTION)
+            condition = Files.deleted_at < cutoff
+        else:
+            condition = Files.deleted_at.is_not(None) & Files.id.in_(file_ids)
+        purged = 0
+        while True:
+            async with self.session_factory() as session:
+                rows = (
+                    await session.execute(
+                        select(
+                            Files.id,
+                            Files.file_path,
+                            Files.content_hash,
+                            Files.storage_backend,
+                        )
+                        .where(condition)
+                        .order_by(Files.deleted_at)
+                        .limit(gc_settings.GC_BATCH_SIZE)
+                        .with_for_update(skip_locked=True)
+                    )
+                ).all()
+                if not rows:
+                    break
+                row_ids = [row.id for row in rows]
+                await session.execute(
+                    delete(Files)
+                    .where(Files.id.in_(row_ids))
+                    .execution_options(synchronize_session=False)
+                )
+
+                references = Multiset(row.content_hash for row in rows if row.content_hash)
+                if references:
+                    await session.execute(
+                        update(Blobs.__table__)
+                        .where(Blobs.digest == bindparam("b_digest"))
+                        .values(ref_count=Blobs.ref_count - bindparam("b_count")),
+                        [
+                            {"b_digest": digest, "b_count": count}
+                            for digest, count in references.items()
+                        ],
+                    )
+                    dead_blobs = await session.scalars(
+                        delete(Blobs)
+                        .where(Blobs.digest.in_(references), Blobs.ref_count <= 0)
+                        .returning(Blobs.file_path)
+                        .execution_options(synchronize_session=False)
+                    )
+                    for file_path in dead_blobs.all():
+                        await self._unlink(file_path)
+
+                # Одинаковый путь может быть у нескольких строк (совпадение имени и времени)
+                file_paths = {
+                    (row.file_path, row.storage_backend)
+                    for row in rows
+                    if not row.content_hash
+                }
+                if file_paths:
+                    file_paths -= {
+                        tuple(row)
+                        for row in await session.execute(
+                            select(Files.file_path, Files.storage_backend).where(
+                                Files.file_path.in_([path for path, _ in file_paths])
+                            )
+                        )
+                    }
+                await session.commit()
+
+            for file_path, storage_backend in file_paths:
+                await self._unlink(file_path, storage_backend)
+            if file_cache is not None:
+                for file_id in row_ids:
+                    await file_cache.invalidate(file_id)
+            purged += len(rows)
+            GC_PURGED_FILES.inc(len(rows))
+            logger.info("Purged %s soft-deleted files", len(rows))
+        return purged
+
+    async def purge_upload_sessions(self) -> int:
+        """
+        Удаляет просроченные сессии возобновляемой загрузки и их файлы.
+
+        :return: Количество удалённых сессий.
+        """
+        purged = 0
+        while True:
+            async with self.session_factory() as session:
+                rows = (
+                    await session.execute(
+                        select(UploadSessions.id, UploadSessions.temp_path)
+                        .where(UploadSessions.expires_at < datetime.now(timezone.utc))
+                        .limit(settings.gc_settings.GC_BATCH_SIZE)
+                        .with_for_update(skip_locked=True)
+                    )
+                ).all()
+                if not rows:
+                    break
+                await session.execute(
+                    delete(UploadSessions)
+                    .where(UploadSessions.id.in_([row.id for row in rows]))
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+            for row in rows:
+                await self._unlink(row.temp_path)
+            purged += len(rows)
+            GC_EXPIRED_UPLOAD_SESSIONS.inc(len(rows))
+        if purged:
+            logger.info("Removed %s expired upload sessions", purged)
+        return purged
+
+    async def remove_orphan_files(self) -> int:
+        """
+        Удаляет файлы на диске, на которые не ссылается ни одна строка
+        (files, blobs или upload_sessions). Файлы моложе GC_ORPHAN_MIN_AGE
+        не трогаются: они могут принадлежать идущей загрузке или переносу.
+
+        :return: Количество удалённых файлов.
+        """
+        gc_settings = settings.gc_settings
+        iterator = _walk_files(gc_settings.GC_ORPHAN_MIN_AGE)
+        removed = 0
+        while batch := await run_io(_next_batch, iterator, gc_settings.GC_BATCH_SIZE):
+            await self._scan_limiter.acquire(len(batch))
+            paths = {str(path.relative_to(STORAGE_ROOT)) for path in batch}
+            async with self.session_factory() as session:
+                for column in (Files.file_path, Blobs.file_path, UploadSessions.temp_path):
+                    paths -= set(await session.scalars(select(column).where(column.in_(paths))))
+            for file_path in paths:
+                logger.warning("Removing orphaned file %s", file_path)
+                await self._unlink(file_path)
+            removed += len(paths)
+            GC_ORPHAN_FILES.inc(len(paths))
+        return removed
+
+    async def find_missing_files(self) -> int:
+        """
+        Ищет неудалённые строки, файла которых нет на диске. В зависимости
+        от GC_MISSING_FILE_ACTION строки только логируются или помечаются удалёнными.
+        Файлы во внешних хранилищах (storage_backend) не проверяются.
+
+        :return: Количество найденных строк.
+        """
+        gc_settings = settings.gc_settings
+        created_before = datetime.now(timezone.utc) - timedelta(
+            seconds=gc_settings.GC_ORPHAN_MIN_AGE
+        )
+        found = 0
+        cursor = None
+        while True:
+            stmt = (
+                select(Files.id, Files.file_path, Files.created_at)
+                .where(
+                    Files.deleted_at.is_(None),
+                    Files.storage_backend.is_(None),
+                    Files.created_at < created_before,
+                )
+                .order_by(Files.created_at, Files.id)
+                .limit(gc_settings.GC_BATCH_SIZE)
+            )
+            if cursor is not None:
+                stmt = stmt.where(tuple_(Files.created_at, Files.id) > cursor)
+            async with self.session_factory() as session:
+                rows = (await session.execute(stmt)).all()
+                if not rows:
+                    break
+                cursor = tuple_(rows[-1].created_at, rows[-1].id)
+                await self._scan_limiter.acquire(len(rows))
+                missing = await run_io(_missing_paths, [row.file_path for row in rows])
+                missing_ids = [row.id for row in rows if row.file_path in missing]
+                for file_id in missing_ids:
+                    logger.warning("File %s is missing on disk", file_id)
+                if missing_ids and gc_settings.GC_MISSING_FILE_ACTION == "soft_delete":
+                    deleted = await session.execute(
+                        update(Files)
+                        .where(Files.id.in_(missing_ids), Files.deleted_at.is_(None))
+                        .values(deleted_at=datetime.now(timezone.utc))
+                        .returning(
+                            Files.file_format,
+                            Files.file_extension,
+                            Files.file_size,
+                            Files.created_at,
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+                    await record_file_stats(session, deleted.all(), sign=-1)
+                    await session.commit()
+                    if file_cache is not None:
+                        for file_id in missing_ids:
+                            await file_cache.invalidate(file_id)
+            found += len(missing_ids)
+            GC_MISSING_FILES.inc(len(missing_ids))
+        return found
+
+
+def gc_stats() -> dict:
+    return {
+        "purged_files": GC_PURGED_FILES.value,
+        "unlinked_files": GC_UNLINKED_FILES.value,
+        "orphan_files": GC_ORPHAN_FILES.value,
+        "missing_files": GC_MISSING_FILES.value,
+        "expired_upload_sessions": GC_EXPIRED_UPLOAD_SESSIONS.value,
+    }
@@ -0,0 +1,110 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+import aiofiles
+
+from src.core.settings import settings
+from src.utils.metrics import Histogram
+
+T = TypeVar("T")
+
+IO_QUEUE_WAIT = Histogram()
+IO_TASK_DURATION = Histogram()
+
+
+class InstrumentedThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    Пул потоков для файловых операций, считающий глубину очереди,
+    количество выполняющихся задач и время ожидания в очереди.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        super().__init__(max_workers=max_workers, thread_name_prefix="storage-io")
+        self.queued = 0
+        self.in_flight = 0
+        self.max_queued = 0
+        self._stats_lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> Future:
+        submitted_at = time.perf_counter()
+        started = False
+
+        def call() -> T:
+            nonlocal started
+            started_at = time.perf_counter()
+            with self._stats_lock:
+                started = True
+                self.queued -= 1
+                self.in_flight += 1
+            IO_QUEUE_WAIT.observe(started_at - submitted_at)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._stats_lock:
+                    self.in_flight -= 1
+                IO_TASK_DURATION.observe(time.perf_counter() - started_at)
+
+        def on_done(future: Future) -> None:
+            # Отменённая до запуска задача не вызывает call.
+            with self._stats_lock:
+                if not started:
+                    self.queued -= 1
+
+        with self._stats_lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        future = super().submit(call)
+        future.add_done_callback(on_done)
+        return future
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self._max_workers,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "in_flight": self.in_flight,
+            "queue_wait_seconds": IO_QUEUE_WAIT.snapshot(),
+            "task_duration_seconds": IO_TASK_DURATION.snapshot(),
+        }
+
+
+def create_io_executor() -> InstrumentedThreadPoolExecutor:
+    """
+    Создаёт пул для файловых операций по настройкам IO_EXECUTOR_*.
+
+    :return: Объект InstrumentedThreadPoolExecutor.
+    """
+    return InstrumentedThreadPoolExecutor(max_workers=settings.IO_EXECUTOR_WORKERS)
+
+
+io_executor = create_io_executor()
+
+
+async def run_io(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Выполняет блокирующую файловую операцию в пуле io_executor,
+    не занимая цикл событий и пул потоков по умолчанию.
+
+    :param func: Блокирующая функция.
+    :return: Результат func.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        io_executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+def open_file(path: Path, mode: str = "rb"):
+    """
+    Открывает файл через aiofiles, направляя все операции с ним в io_executor.
+
+    :param path: Путь к файлу.
+    :param mode: Режим открытия файла.
+    :return: Асинхронный контекстный менеджер aiofiles.
+    """
+    return aiofiles.open(path, mode, executor=io_executor)
@@ -0,0 +1,104 @@
+from fastapi import HTTPException
+from sqlalchemy import Select, select
+
+from src.models.files import Files
+from src.schemas.files import FilesFilterSchema
+
+SORT_COLUMNS = {
+    "created_at": Files.created_at,
+    "file_size": Files.file_size,
+    # Сортировка и поиск по префиксу в порядке байтов, как в ix_files_live_name_id
+    "name": Files.file_old_name.collate("C"),
+}
+
+# Сортировка -> допустимые фильтры на равенство (по одному),
+# для которых есть индекс (фильтр, поле сортировки, id).
+INDEX_SHAPES = {
+    "created_at": {None, "file_format", "file_extension"},
+    "file_size": {None},
+    "name": {None},
+}
+
+# Фильтр по диапазону -> сортировка, индекс которой его обслуживает.
+RANGE_FILTERS = {
+    "created_from": "created_at",
+    "created_to": "created_at",
+    "size_min": "file_size",
+    "size_max": "file_size",
+    "name_prefix": "name",
+}
+
+
+def check_index_shape(filters: FilesFilterSchema) -> None:
+    """
+    Отклоняет сочетания фильтров и сортировки, которые не обслуживаются
+    индексами ix_files_live_*: такие запросы читали бы всю таблицу
+    и сортировали её целиком.
+
+    Фильтр name_contains обслуживается триграммным индексом и сужает
+    выборку сам, поэтому с ним допустимы любые сочетания.
+
+    :param filters: Фильтры и сортировка листинга.
+    :raises HTTPException: 400, если сочетание не поддерживается.
+    :return: None
+    """
+    if filters.name_contains is not None:
+        return
+    sort_key = filters.sort.lstrip("-")
+    equality = [
+        name
+        for name in ("file_format", "file_extension")
+        if getattr(filters, name) is not None
+    ]
+    if len(equality) > 1 or (equality[0] if equality else None) not in INDEX_SHAPES[
+        sort_key
+    ]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Filter by {' and '.join(equality)} is not supported with sort "
+            f"{filters.sort}. Supported: one of file_format, file_extension "
+            f"with sort by created_at.",
+        )
+    for name, range_sort in RANGE_FILTERS.items():
+        if getattr(filters, name) is not None and range_sort != sort_key:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Filter {name} requires sort={range_sort} or -{range_sort}.",
+            )
+
+
+def build_listing_query(filters: FilesFilterSchema) -> Select:
+    """
+    Формирует запрос листинга неудалённых файлов с фильтрами и сортировкой.
+
+    :param filters: Фильтры и сортировка листинга.
+    :raises HTTPException: 400, если сочетание не обслуживается индексами.
+    :return: Запрос SQLAlchemy без OFFSET/LIMIT.
+    """
+    check_index_shape(filters)
+    stmt = select(Files).where(Files.deleted_at.is_(None))
+    if filters.file_format is not None:
+        stmt = stmt.where(Files.file_format == filters.file_format)
+    if filters.file_extension is not None:
+        stmt = stmt.where(Files.file_extension == filters.file_extension)
+    if filters.size_min is not None:
+        stmt = stmt.where(Files.file_size >= filters.size_min)
+    if filters.size_max is not None:
+        stmt = stmt.where(Files.file_size <= filters.size_max)
+    if filters.created_from is not None:
+        stmt = stmt.where(Files.created_at >= filters.created_from)
+    if filters.created_to is not None:
+        stmt = stmt.where(Files.created_at < filters.created_to)
+    if filters.name_prefix is not None:
+        stmt = stmt.where(
+            SORT_COLUMNS["name"].startswith(filters.name_prefix, autoescape=True)
+        )
+    if filters.name_contains is not None:
+        stmt = stmt.where(
+            Files.file_old_name.contains(filters.name_contains, autoescape=True)
+        )
+
+    column = SORT_COLUMNS[filters.sort.lstrip("-")]
+    if filters.sort.startswith("-"):
+        return stmt.order_by(column.desc(), Files.id.desc())
+    return stmt.order_by(column, Files.id)
@@ -0,0 +1,151 @@
+import asyncio
+import contextvars
+import logging
+import time
+from typing import Awaitable, Callable, Sequence
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.models.files import Files
+from src.schemas.files import CreateFilesSchema
+from src.utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+METADATA_BATCH_SIZE = Histogram(buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024))
+METADATA_COMMIT_DURATION = Histogram()
+METADATA_QUEUE_WAIT = Histogram()
+
+InsertFiles = Callable[
+    [AsyncSession, Sequence[CreateFilesSchema]], Awaitable[list[Files | BaseException]]
+]
+
+
+class MetadataWriter:
+    """
+    Групповая запись метаданных файлов: вставки от параллельных запросов
+    копятся не дольше max_delay секунд (или до max_batch строк) и фиксируются
+    одним многострочным INSERT ... RETURNING в одной транзакции, после чего
+    каждый запрос получает свою строку. Это заменяет один WAL flush на каждую
+    загрузку одним flush на пачку.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        insert: InsertFiles,
+        max_delay: float,
+        max_batch: int,
+    ) -> None:
+        self.session_factory = session_factory
+        self.insert = insert
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self._pending: list[tuple[CreateFilesSchema, float, asyncio.Future]] = []
+        self._batch_full = asyncio.Event()
+        self._flusher: asyncio.Task | None = None
+
+    async def write(self, row: CreateFilesSchema) -> Files:
+        """
+        Ставит строку в очередь и ждёт фиксации её пачки.
+
+        :param row: Метаданные сохранённого файла.
+        :return: Объект Files, представляющий запись сохранённого файла в базе данных.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((row, time.perf_counter(), future))
+        if len(self._pending) >= self.max_batch:
+            self._batch_full.set()
+        if self._flusher is None or self._flusher.done():
+            # Пачка общая для многих запросов, её этапы не относятся к трассе первого из них
+            self._flusher = asyncio.create_task(
+                self._run(), name="metadata-writer", context=contextvars.Context()
+            )
+        return await future
+
+    async def stop(self) -> None:
+        """
+        Дожидается записи всех строк, поставленных в очередь.
+        """
+        if self._flusher is not None:
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+
+    async def _run(self) -> None:
+        while self._pending:
+            if len(self._pending) < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_full.clear()
+            batch = self._pending[: self.max_batch]
+            del self._pending[: self.max_batch]
+            if len(self._pending) >= self.max_batch:
+                self._batch_full.set()
+            await self._flush(batch)
+
+    async def _flush(
+        self, batch: list[tuple[CreateFilesSchema, float, asyncio.Future]]
+    ) -> None:
+        started_at = time.perf_counter()
+        for _, queued_at, _ in batch:
+            METADATA_QUEUE_WAIT.observe(started_at - queued_at)
+        METADATA_BATCH_SIZE.observe(len(batch))
+        try:
+            async with self.session_factory() as session:
+                saved_files = await self.insert(session, [row for row, _, _ in batch])
+        except SQLAlchemyError as e:
+            # Одна ошибочная строка не должна отклонять всю пачку.
+            logger.warning(
+                "Batch insert of %s files failed, retrying one by one: %s",
+                len(batch),
+                e,
+            )
+            for item in batch:
+                await self._flush_one(*item)
+            return
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            METADATA_COMMIT_DURATION.observe(time.perf_counter() - started_at)
+        for (_, _, future), saved_file in zip(batch, saved_files):
+            self._resolve(future, saved_file)
+
+    async def _flush_one(
+        self, row: CreateFilesSchema, queued_at: float, future: asyncio.Future
+    ) -> None:
+        try:
+            async with self.session_factory() as session:
+                (saved_file,) = await self.insert(session, [row])
+        except Exception as e:
+            saved_file = e
+        self._resolve(future, saved_file)
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result: Files | BaseException) -> None:
+        # Ошибка публикации одного файла отклоняет только его запрос
+        if future.done():
+            return
+        if isinstance(result, BaseException):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> dict:
+        return {
+            "max_delay": self.max_delay,
+            "max_batch": self.max_batch,
+            "pending": self.pending,
+            "batch_size": METADATA_BATCH_SIZE.snapshot(),
+            "queue_wait_seconds": METADATA_QUEUE_WAIT.snapshot(),
+            "commit_duration_seconds": METADATA_COMMIT_DURATION.snapshot(),
+        }
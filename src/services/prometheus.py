@@ -0,0 +1,227 @@
+from src.db.session import POOL_CHECKOUT_TIMEOUTS, POOL_CHECKOUT_WAIT, db_session
+from src.services.admission import ADMISSION_REJECTED, admission_controller
+from src.services.cache import file_cache
+from src.services.crud.files import metadata_writer
+from src.services.file_stats import STATS_ROLLUP_GROUPS
+from src.services.garbage_collector import (
+    GC_EXPIRED_UPLOAD_SESSIONS,
+    GC_MISSING_FILES,
+    GC_ORPHAN_FILES,
+    GC_PURGED_FILES,
+    GC_UNLINKED_FILES,
+)
+from src.services.io_executor import IO_QUEUE_WAIT, IO_TASK_DURATION, io_executor
+from src.services.metadata_writer import (
+    METADATA_BATCH_SIZE,
+    METADATA_COMMIT_DURATION,
+    METADATA_QUEUE_WAIT,
+)
+from src.services.upload_metrics import (
+    UPLOAD_RECEIVE_RATE,
+    UPLOAD_RECEIVED_BYTES,
+    UPLOAD_REQUEST_DURATION,
+    UPLOAD_STAGE_DURATION,
+    UPLOAD_WRITE_RATE,
+    UPLOAD_WRITTEN_BYTES,
+    UPLOADS_IN_FLIGHT,
+)
+from src.utils.metrics import REGISTRY, MetricsRegistry
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def register_metrics(registry: MetricsRegistry) -> None:
+    """
+    Регистрирует метрики загрузок, допуска загрузок, пула соединений, пула потоков,
+    групповой записи метаданных, кеша, сборщика мусора и свёртки статистики.
+
+    :param registry: Реестр метрик.
+    :return: None
+    """
+    registry.register(
+        "upload_stage_duration_seconds",
+        "Duration of upload stages.",
+        "histogram",
+        lambda: [
+            ({"stage": name}, histogram) for name, histogram in UPLOAD_STAGE_DURATION.items()
+        ],
+    )
+    registry.register(
+        "upload_request_duration_seconds",
+        "Duration of upload requests.",
+        "histogram",
+        UPLOAD_REQUEST_DURATION,
+    )
+    registry.register(
+        "uploads_in_flight", "Upload requests being processed.", "gauge", UPLOADS_IN_FLIGHT
+    )
+    registry.register(
+        "upload_received_bytes_total",
+        "Request body bytes received by upload endpoints.",
+        "counter",
+        UPLOAD_RECEIVED_BYTES,
+    )
+    registry.register(
+        "upload_written_bytes_total",
+        "Bytes written to disk by uploads.",
+        "counter",
+        UPLOAD_WRITTEN_BYTES,
+    )
+    registry.register(
+        "upload_receive_bytes_per_second",
+        "Upload receive throughput over the last minute.",
+        "gauge",
+        UPLOAD_RECEIVE_RATE,
+    )
+    registry.register(
+        "upload_write_bytes_per_second",
+        "Upload disk write throughput over the last minute.",
+        "gauge",
+        UPLOAD_WRITE_RATE,
+    )
+
+    registry.register(
+        "admission_in_flight",
+        "Uploads admitted and being processed.",
+        "gauge",
+        lambda: [({}, admission_controller.in_flight)],
+    )
+    registry.register(
+        "admission_in_flight_bytes",
+        "Received request body bytes charged to admitted uploads.",
+        "gauge",
+        lambda: [({}, admission_controller.in_flight_bytes)],
+    )
+    registry.register(
+        "admission_clients",
+        "Clients with admitted uploads.",
+        "gauge",
+        lambda: [({}, admission_controller.clients)],
+    )
+    registry.register(
+        "admission_admitted_total",
+        "Uploads admitted.",
+        "counter",
+        lambda: [({}, admission_controller.admitted)],
+    )
+    registry.register(
+        "admission_rejected_total",
+        "Uploads rejected by reason: uploads, bytes or client limit.",
+        "counter",
+        lambda: [
+            ({"reason": reason}, counter) for reason, counter in ADMISSION_REJECTED.items()
+        ],
+    )
+
+    registry.register(
+        "db_pool_size",
+        "Configured connection pool size.",
+        "gauge",
+        lambda: [({}, db_session.engine.pool.size())],
+    )
+    registry.register(
+        "db_pool_checked_out",
+        "Connections currently checked out.",
+        "gauge",
+        lambda: [({}, db_session.engine.pool.checkedout())],
+    )
+    registry.register(
+        "db_pool_overflow",
+        "Connections opened above the pool size.",
+        "gauge",
+        lambda: [({}, db_session.engine.pool.overflow())],
+    )
+    registry.register(
+        "db_pool_checkout_wait_seconds",
+        "Time spent waiting for a pooled connection.",
+        "histogram",
+        POOL_CHECKOUT_WAIT,
+    )
+    registry.register(
+        "db_pool_checkout_timeouts_total",
+        "Connection checkouts that timed out.",
+        "counter",
+        POOL_CHECKOUT_TIMEOUTS,
+    )
+
+    registry.register(
+        "io_executor_queued",
+        "File operations waiting for a worker thread.",
+        "gauge",
+        lambda: [({}, io_executor.queued)],
+    )
+    registry.register(
+        "io_executor_in_flight",
+        "File operations being executed.",
+        "gauge",
+        lambda: [({}, io_executor.in_flight)],
+    )
+    registry.register(
+        "io_executor_queue_wait_seconds",
+        "Time file operations spend queued.",
+        "histogram",
+        IO_QUEUE_WAIT,
+    )
+    registry.register(
+        "io_executor_task_duration_seconds",
+        "Duration of file operations.",
+        "histogram",
+        IO_TASK_DURATION,
+    )
+
+    registry.register(
+        "metadata_writer_pending",
+        "Rows waiting for a group commit.",
+        "gauge",
+        lambda: [({}, metadata_writer.pending)],
+    )
+    registry.register(
+        "metadata_writer_batch_size", "Rows per group commit.", "histogram", METADATA_BATCH_SIZE
+    )
+    registry.register(
+        "metadata_writer_queue_wait_seconds",
+        "Time rows wait for their group commit.",
+        "histogram",
+        METADATA_QUEUE_WAIT,
+    )
+    registry.register(
+        "metadata_writer_commit_duration_seconds",
+        "Duration of group insert and commit.",
+        "histogram",
+        METADATA_COMMIT_DURATION,
+    )
+
+    if file_cache is not None:
+        registry.register(
+            "file_cache_lookups_total",
+            "File metadata cache lookups by result.",
+            "counter",
+            lambda: [
+                ({"result": "local_hit"}, file_cache.local_hits),
+                ({"result": "shared_hit"}, file_cache.shared_hits),
+                ({"result": "miss"}, file_cache.misses),
+            ],
+        )
+
+    for name, counter, help_text in (
+        ("gc_purged_files_total", GC_PURGED_FILES, "Soft-deleted rows purged."),
+        ("gc_unlinked_files_total", GC_UNLINKED_FILES, "Files removed from disk."),
+        ("gc_orphan_files_total", GC_ORPHAN_FILES, "Files on disk without rows."),
+        ("gc_missing_files_total", GC_MISSING_FILES, "Rows whose files are missing."),
+        (
+            "gc_expired_upload_sessions_total",
+            GC_EXPIRED_UPLOAD_SESSIONS,
+            "Expired upload sessions removed.",
+        ),
+    ):
+        registry.register(name, help_text, "counter", counter)
+
+    registry.register(
+        "stats_rollup_groups_total",
+        "File stats groups updated by rollups.",
+        "counter",
+        STATS_ROLLUP_GROUPS,
+    )
+
+
+register_metrics(REGISTRY)
@@ -0,0 +1,169 @@
+"""
+Перенос уже загруженных файлов в текущую раскладку каталогов
+(STORAGE_SHARD_DEPTH/STORAGE_SHARD_WIDTH) без остановки сервиса.
+
+    python -m src.services.relocate_files --batch-size 500
+
+Файлы обходятся пачками по (created_at, id). Для каждой пачки:
+жёсткая ссылка по новому пути -> обновление file_path -> commit -> удаление
+старого пути. До commit файл читается по старому пути, после - по новому,
+поэтому читатели не видят отсутствующего файла. Старые пути удаляются
+не раньше, чем через --grace секунд, чтобы истекли записи о них в кешах
+метаданных других процессов. Повторный запуск после сбоя безопасен.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import time
+from collections import deque
+from pathlib import Path
+
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.settings import STORAGE_ROOT, settings
+from src.db.session import db_session
+from src.models.files import Files
+from src.services.cache import file_cache
+from src.services.io_executor import run_io
+from src.services.upload_file import build_target_folder
+
+logger = logging.getLogger(__name__)
+
+
+def link_file(source: Path, target: Path) -> None:
+    """
+    Создаёт жёсткую ссылку target на source (копирует, если это другая ФС).
+    Уже существующий target, указывающий на тот же файл, не считается ошибкой.
+
+    :param source: Текущий путь к файлу.
+    :param target: Новый путь к файлу.
+    :return: None
+    """
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.exists():
+        if target.samefile(source):
+            return
+        raise FileExistsError(f"{target} already exists")
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+async def relocate_batch(
+    session: AsyncSession, files: list[Files], dry_run: bool = False
+) -> list[Path]:
+    """
+    Переносит пачку файлов в новые пути и фиксирует новые file_path в базе данных.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param files: Файлы пачки.
+    :param dry_run: Только посчитать файлы, которые нужно перенести.
+    :return: Старые пути перенесённых файлов, которые можно удалить.
+    """
+    moved = []
+    old_paths = []
+    for file in files:
+        source = STORAGE_ROOT / file.file_path
+        target = build_target_folder(file.file_format, file.file_new_name) / (
+            file.file_new_name
+        )
+        if source == target:
+            continue
+        if not source.exists():
+            logger.warning("File %s is missing on disk: %s", file.id, source)
+            continue
+        if not dry_run:
+            try:
+                await run_io(link_file, source, target)
+            except FileExistsError:
+                logger.warning("File %s skipped, %s is taken", file.id, target)
+                continue
+        moved.append({"id": file.id, "file_path": str(target.relative_to(STORAGE_ROOT))})
+        old_paths.append(source)
+    if not moved or dry_run:
+        return old_paths
+
+    await session.execute(update(Files), moved)
+    await session.commit()
+    if file_cache is not None:
+        for row in moved:
+            await file_cache.invalidate(row["id"])
+    return old_paths
+
+
+async def relocate_files(batch_size: int, grace: float, dry_run: bool = False) -> int:
+    """
+    Обходит все локальные файлы раскладки by_type и переносит те, чей путь
+    не совпадает с текущей раскладкой.
+
+    :param batch_size: Количество файлов в одной транзакции.
+    :param grace: Задержка перед удалением старых путей в секундах.
+    :param dry_run: Только посчитать файлы, которые нужно перенести.
+    :return: Количество перенесённых файлов.
+    """
+    total = 0
+    cursor = None
+    pending: deque[tuple[float, list[Path]]] = deque()
+
+    def unlink_expired(now: float) -> None:
+        while pending and pending[0][0] <= now:
+            for path in pending.popleft()[1]:
+                path.unlink(missing_ok=True)
+
+    while True:
+        stmt = (
+            select(Files)
+            .where(
+                Files.content_hash.is_(None),
+                Files.storage_backend.is_(None),
+                Files.deleted_at.is_(None),
+            )
+            .order_by(Files.created_at, Files.id)
+            .limit(batch_size)
+        )
+        if cursor is not None:
+            stmt = stmt.where(tuple_(Files.created_at, Files.id) > cursor)
+        async with db_session.session_factory() as session:
+            files = list(await session.scalars(stmt))
+            if not files:
+                break
+            cursor = tuple_(files[-1].created_at, files[-1].id)
+            old_paths = await relocate_batch(session, files, dry_run=dry_run)
+        total += len(old_paths)
+        logger.info("Relocated %s files (%s total)", len(old_paths), total)
+        if not dry_run:
+            pending.append((time.monotonic() + grace, old_paths))
+            unlink_expired(time.monotonic())
+
+    if pending:
+        await asyncio.sleep(max(pending[-1][0] - time.monotonic(), 0))
+        unlink_expired(float("inf"))
+    return total
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--grace",
+        type=float,
+        default=settings.FILE_CACHE_SHARED_TTL
+        if settings.FILE_CACHE_SHARED_BACKEND != "none"
+        else settings.FILE_CACHE_TTL,
+        help="Через сколько секунд удалять старые пути",
+    )
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    total = await relocate_files(args.batch_size, args.grace, dry_run=args.dry_run)
+    logger.info("Done, %s files %s", total, "to relocate" if args.dry_run else "relocated")
+    await db_session.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
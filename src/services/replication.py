@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Sequence
+from uuid import UUID
+
+import aiohttp
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.settings import settings
+from src.models.files import Files
+from src.models.replications import Replications
+from src.services.cache import file_cache
+from src.services.cloud_storage import upload_to_cloud
+from src.services.compression import get_codec
+from src.services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+REPLICATION_PENDING = "pending"
+REPLICATION_DONE = "replicated"
+REPLICATION_FAILED = "failed"
+
+
+def initial_replication_status() -> str | None:
+    """
+    Статус репликации для нового файла: pending, если репликация включена.
+
+    :return: Статус репликации или None.
+    """
+    if settings.replication_settings.REPLICATION_ENABLED:
+        return REPLICATION_PENDING
+    return None
+
+
+async def enqueue_replications(session: AsyncSession, file_ids: Sequence[UUID]) -> None:
+    """
+    Добавляет задания на репликацию в outbox в текущей транзакции,
+    поэтому задание появляется тогда и только тогда, когда зафиксирован файл.
+
+    :param session: Асинхронная сессия SQLAlchemy для взаимодействия с базой данных.
+    :param file_ids: Идентификаторы файлов для репликации.
+    :return: None
+    """
+    if not file_ids or not settings.replication_settings.REPLICATION_ENABLED:
+        return
+    await session.execute(
+        insert(Replications)
+        .values([{"file_id": file_id} for file_id in file_ids])
+        .on_conflict_do_nothing(index_elements=[Replications.file_id])
+    )
+
+
+def get_backoff(attempts: int) -> float:
+    """
+    Экспоненциальная задержка перед следующей попыткой со случайным разбросом.
+
+    :param attempts: Количество уже неудачных попыток.
+    :return: Задержка в секундах.
+    """
+    replication_settings = settings.replication_settings
+    delay = min(
+        replication_settings.REPLICATION_BACKOFF_BASE * 2 ** (attempts - 1),
+        replication_settings.REPLICATION_BACKOFF_MAX,
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+class ReplicationWorker:
+    """
+    Фоновый обработчик outbox-таблицы replications.
+
+    Задания забираются пачками через SELECT ... FOR UPDATE SKIP LOCKED
+    с арендой на REPLICATION_LEASE секунд, поэтому несколько процессов могут
+    работать параллельно, а задание упавшего процесса будет подобрано снова.
+    Все отправки идут через одну сессию aiohttp с пулом из
+    REPLICATION_CONCURRENCY соединений.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self.session_factory = session_factory
+        self.http_session: aiohttp.ClientSession | None = None
+        self._task: asyncio.Task | None = None
+        self._semaphore = asyncio.Semaphore(
+            settings.replication_settings.REPLICATION_CONCURRENCY
+        )
+
+    async def start(self) -> None:
+        replication_settings = settings.replication_settings
+        self.http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=replication_settings.REPLICATION_CONCURRENCY
+            ),
+            timeout=aiohttp.ClientTimeout(total=replication_settings.REPLICATION_TIMEOUT),
+        )
+        self._task = asyncio.create_task(self._run(), name="replication-worker")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.http_session is not None:
+            await self.http_session.close()
+            self.http_session = None
+
+    async def _run(self) -> None:
+        poll_interval = settings.replication_settings.REPLICATION_POLL_INTERVAL
+        while True:
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                logger.warning("Replication worker iteration failed: %s", e)
+                processed = 0
+            if not processed:
+                await asyncio.sleep(poll_interval)
+
+    async def run_once(self) -> int:
+        """
+        Забирает одну пачку готовых заданий и выполняет их параллельно.
+
+        :return: Количество обработанных заданий.
+        """
+        jobs = await self._claim_batch()
+        await asyncio.gather(*(self._replicate(*job) for job in jobs))
+        return len(jobs)
+
+    async def _claim_batch(self) -> list[tuple[UUID, Files, int]]:
+        replication_settings = settings.replication_settings
+        async with self.session_factory() as session:
+            rows = await session.execute(
+                select(Replications.id, Replications.attempts, Files)
+                .join(Files, Files.id == Replications.file_id)
+                .where(Replications.next_attempt_at <= func.now())
+                .order_by(Replications.next_attempt_at)
+                .limit(replication_settings.REPLICATION_BATCH_SIZE)
+                .with_for_update(of=Replications, skip_locked=True)
+            )
+            jobs = [(job_id, file, attempts) for job_id, attempts, file in rows]
+            if jobs:
+                await session.execute(
+                    update(Replications)
+                    .where(Replications.id.in_([job_id for job_id, _, _ in jobs]))
+                    .values(
+                        next_attempt_at=func.now()
+                        + timedelta(seconds=replication_settings.REPLICATION_LEASE)
+                    )
+                )
+            await session.commit()
+        return jobs
+
+    async def _replicate(self, job_id: UUID, file: Files, attempts: int) -> None:
+        async with self._semaphore:
+            try:
+                await upload_to_cloud(
+                    self.http_session,
+                    file_path=file.file_path,
+                    uuid=file.id,
+                    filename=file.file_old_name,
+                    codec=get_codec(file.codec),
+                    storage=get_storage(file.storage_backend),
+                )
+            except Exception as e:
+                await self._mark_failed(job_id, file, attempts + 1, e)
+            else:
+                await self._mark_done(job_id, file)
+
+    async def _mark_done(self, job_id: UUID, file: Files) -> None:
+        async with self.session_factory() as session:
+            await session.execute(delete(Replications).where(Replications.id == job_id))
+            await session.execute(
+                update(Files)
+                .where(Files.id == file.id)
+                .values(replication_status=REPLICATION_DONE)
+            )
+            await session.commit()
+        if file_cache is not None:
+            await file_cache.invalidate(file.id)
+        logger.info("File %s replicated to cloud storage", file.id)
+
+    async def _mark_failed(
+        self, job_id: UUID, file: Files, attempts: int, error: Exception
+    ) -> None:
+        async with self.session_factory() as session:
+            if attempts >= settings.replication_settings.REPLICATION_MAX_ATTEMPTS:
+                logger.error(
+                    "File %s replication failed after %s attempts: %s",
+                    file.id,
+                    attempts,
+                    error,
+                )
+                await session.execute(
+                    delete(Replications).where(Replications.id == job_id)
+                )
+                await session.execute(
+                    update(Files)
+                    .where(Files.id == file.id)
+                    .values(replication_status=REPLICATION_FAILED)
+                )
+                if file_cache is not None:
+                    await file_cache.invalidate(file.id)
+            else:
+                delay = get_backoff(attempts)
+                logger.warning(
+                    "File %s replication attempt %s failed, retry in %.1fs: %s",
+                    file.id,
+                    attempts,
+                    delay,
+                    error,
+                )
+                await session.execute(
+                    update(Replications)
+                    .where(Replications.id == job_id)
+                    .values(
+                        attempts=attempts,
+                        last_error=str(error)[:1000],
+                        next_attempt_at=datetime.now(timezone.utc)
+                        + timedelta(seconds=delay),
+                    )
+                )
+            await session.commit()
@@ -0,0 +1,195 @@
+import errno
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import AsyncIterable
+
+from fastapi import HTTPException
+from starlette.requests import ClientDisconnect
+
+from src.core.settings import STORAGE_ROOT, settings
+from src.models.upload_sessions import UploadSessions
+from src.schemas.files import CreateFilesSchema
+from src.services.atomic_write import get_temp_path, sync_paths
+from src.services.io_executor import run_io
+from src.services.storage import local_storage
+from src.services.upload_metrics import count_written, stage
+from src.services.upload_file import (
+    create_file_metadata,
+    generate_filename,
+    get_blob_path,
+    get_target_folder,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_parts_count(file_size: int, part_size: int) -> int:
+    """
+    Считает количество частей для файла заданного размера.
+
+    :param file_size: Размер файла в байтах.
+    :param part_size: Размер части в байтах.
+    :return: Количество частей.
+    """
+    return (file_size + part_size - 1) // part_size
+
+
+def get_part_range(upload: UploadSessions, index: int) -> tuple[int, int]:
+    """
+    Возвращает смещение и размер части внутри файла. Последняя часть может быть короче.
+
+    :param upload: Сессия загрузки.
+    :param index: Номер части, начиная с нуля.
+    :return: Смещение части в байтах и её размер.
+    """
+    offset = index * upload.part_size
+    return offset, min(upload.part_size, upload.file_size - offset)
+
+
+def _create_sparse(path: Path, size: int) -> None:
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    try:
+        os.ftruncate(fd, size)
+    finally:
+        os.close(fd)
+
+
+async def create_upload_file(path: Path, size: int) -> None:
+    """
+    Создаёт разреженный файл заданного размера. Место на диске под части
+    выделяется по мере их загрузки (allocate_part), поэтому незаполненная
+    сессия не занимает диск.
+
+    :param path: Путь к создаваемому файлу.
+    :param size: Размер файла в байтах.
+    :return: None
+    """
+    await local_storage.ensure_folder(path.parent)
+    await run_io(_create_sparse, path, size)
+
+
+def _allocate(fd: int, offset: int, size: int) -> None:
+    try:
+        os.posix_fallocate(fd, offset, size)
+    except AttributeError:
+        return
+    except OSError as e:
+        if e.errno == errno.ENOSPC:
+            raise
+        # Файловая система без поддержки fallocate - часть пишется в разреженный файл
+
+
+def _pwrite_all(fd: int, data: bytes, offset: int) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+async def write_part(
+    path: Path, offset: int, expected_size: int, chunks: AsyncIterable[bytes]
+) -> int:
+    """
+    Выделяет место под часть и пишет её позиционной записью (pwrite)
+    по заданному смещению. Части независимы, поэтому их можно загружать
+    параллельно и в любом порядке.
+
+    :param path: Путь к файлу сессии.
+    :param offset: Смещение части в файле.
+    :param expected_size: Ожидаемый размер части.
+    :param chunks: Асинхронный итератор блоков тела запроса.
+    :raises HTTPException: 400, если размер части не совпадает с ожидаемым,
+        507, если на диске нет места под часть.
+    :return: Количество записанных байт.
+    """
+    written = 0
+    fd = await run_io(os.open, path, os.O_WRONLY)
+    try:
+        try:
+            await run_io(_allocate, fd, offset, expected_size)
+        except OSError:
+            raise HTTPException(status_code=507, detail="Not enough disk space.")
+        with stage("disk_write"):
+            async for chunk in chunks:
+                if written + len(chunk) > expected_size:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Part is larger than expected {expected_size} bytes.",
+                    )
+                await run_io(_pwrite_all, fd, chunk, offset + written)
+                count_written(len(chunk))
+                written += len(chunk)
+    except ClientDisconnect as e:
+        logger.warning('When write part of "%s" error: %s', path, e)
+        raise HTTPException(
+            status_code=400, detail="Error reading file. Please try again."
+        )
+    finally:
+        await run_io(os.close, fd)
+
+    if written != expected_size:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Part size is {written} bytes, expected {expected_size}.",
+        )
+    return written
+
+
+def _hash_file(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with path.open("rb") as file:
+        while chunk := file.read(settings.UPLOAD_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+async def finalize_upload(upload: UploadSessions) -> CreateFilesSchema:
+    """
+    Переносит собранный файл в итоговое место хранения без склейки частей:
+    файл уже целиком лежит на диске, он просто переименовывается
+    после записи метаданных в базу данных.
+
+    В режиме content_addressed хеш считается одним проходом по файлу,
+    так как части приходят не по порядку и посчитать его при записи нельзя.
+
+    :param upload: Сессия загрузки, все части которой приняты.
+    :return: Объект CreateFilesSchema с метаданными сохранённого файла.
+    """
+    temp_path = STORAGE_ROOT / upload.temp_path
+    new_filename = generate_filename(upload.file_name)
+    content_hash = None
+    await sync_paths(temp_path)
+    if settings.STORAGE_LAYOUT == "content_addressed":
+        content_hash = await run_io(_hash_file, temp_path)
+        file_path = get_blob_path(content_hash)
+        blob_temp_path = get_temp_path(file_path)
+        await local_storage.ensure_folder(file_path.parent)
+        await run_io(os.replace, temp_path, blob_temp_path)
+        temp_path = blob_temp_path
+    else:
+        target_folder = await get_target_folder(upload.file_format, new_filename)
+        file_path = target_folder / new_filename
+
+    row_file_data = create_file_metadata(
+        file_path=file_path,
+        new_filename=new_filename,
+        file_size=upload.file_size,
+        filename=upload.file_name,
+        content_type=upload.file_format,
+        content_hash=content_hash,
+    )
+    row_file_data.temp_path = temp_path
+    return row_file_data
+
+
+async def remove_upload_file(upload: UploadSessions) -> None:
+    """
+    Удаляет файл отменённой или просроченной сессии.
+
+    :param upload: Сессия загрузки.
+    :return: None
+    """
+    await run_io((STORAGE_ROOT / upload.temp_path).unlink, missing_ok=True)
@@ -0,0 +1,56 @@
+from src.core.settings import STORAGE_ROOT, settings
+from src.services.storage.base import StorageBackend
+from src.services.storage.local import LocalStorage
+from src.services.storage.s3 import S3Storage
+
+local_storage = LocalStorage(STORAGE_ROOT)
+_storages: dict[str, StorageBackend] = {local_storage.name: local_storage}
+
+
+def create_s3_storage() -> S3Storage:
+    storage_settings = settings.storage_settings
+    return S3Storage(
+        endpoint_url=storage_settings.S3_ENDPOINT_URL,
+        bucket=storage_settings.S3_BUCKET,
+        access_key=storage_settings.S3_ACCESS_KEY,
+        secret_key=storage_settings.S3_SECRET_KEY,
+        region=storage_settings.S3_REGION,
+        prefix=storage_settings.S3_PREFIX,
+        part_size=storage_settings.S3_PART_SIZE,
+        upload_concurrency=storage_settings.S3_UPLOAD_CONCURRENCY,
+        max_connections=storage_settings.S3_MAX_CONNECTIONS,
+        timeout=storage_settings.S3_TIMEOUT,
+        max_retries=storage_settings.S3_MAX_RETRIES,
+    )
+
+
+def get_storage(name: str | None = None) -> StorageBackend:
+    """
+    Хранилище по имени из Files.storage_backend. Создаётся при первом обращении.
+
+    :param name: Имя хранилища, None - локальное.
+    :return: Объект хранилища.
+    """
+    name = name or local_storage.name
+    if name not in _storages:
+        if name != S3Storage.name:
+            raise ValueError(f"Unknown storage backend: {name}")
+        _storages[name] = create_s3_storage()
+    return _storages[name]
+
+
+def get_upload_storage() -> StorageBackend:
+    """
+    Хранилище для новых загрузок (STORAGE_BACKEND).
+
+    :return: Объект хранилища.
+    """
+    return get_storage(settings.storage_settings.STORAGE_BACKEND)
+
+
+async def close_storages() -> None:
+    """
+    Закрывает пулы соединений удалённых хранилищ.
+    """
+    for storage in _storages.values():
+        await storage.close()
@@ -0,0 +1,117 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator
+
+
+class StorageError(Exception):
+    """
+    Хранилище ответило ошибкой.
+    """
+
+
+@dataclass(frozen=True)
+class ObjectStat:
+    size: int
+    mtime_ns: int
+
+    @property
+    def mtime(self) -> float:
+        return self.mtime_ns / 1_000_000_000
+
+
+class StagedObject(ABC):
+    """
+    Записанный, но ещё не опубликованный объект. Публикуется после commit
+    метаданных в базе, поэтому по ключу не бывает объектов, которых нет в базе.
+    """
+
+    key: str
+    size: int  # bytes stored
+
+    @abstractmethod
+    async def publish(self) -> None:
+        """
+        Делает объект доступным по его ключу.
+        """
+
+    @abstractmethod
+    async def discard(self) -> None:
+        """
+        Удаляет записанные данные, метаданные которых не удалось сохранить.
+        """
+
+
+class StorageBackend(ABC):
+    """
+    Хранилище содержимого файлов. Ключ объекта - Files.file_path.
+    """
+
+    name: str
+
+    @abstractmethod
+    async def put_stream(
+        self,
+        key: str,
+        chunks: AsyncIterable[bytes],
+        content_type: str | None = None,
+    ) -> StagedObject:
+        """
+        Записывает поток блоков, не накапливая его в памяти целиком.
+        При ошибке (в том числе в итераторе chunks) записанные данные удаляются.
+
+        :param key: Ключ объекта.
+        :param chunks: Асинхронный итератор блоков данных.
+        :param content_type: MIME-тип объекта.
+        :return: Объект, который нужно опубликовать или удалить.
+        """
+
+    @abstractmethod
+    def get_stream(
+        self,
+        key: str,
+        start: int = 0,
+        end: int | None = None,
+        chunk_size: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Читает объект или его диапазон блоками.
+
+        :param key: Ключ объекта.
+        :param start: Смещение начала диапазона.
+        :param end: Невключаемый конец диапазона, None - до конца объекта.
+        :param chunk_size: Размер блока (по умолчанию DOWNLOAD_CHUNK_SIZE).
+        :raises FileNotFoundError: Если объекта нет.
+        :return: Асинхронный итератор блоков.
+        """
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """
+        Удаляет объект. Отсутствие объекта не считается ошибкой.
+
+        :param key: Ключ объекта.
+        :return: None
+        """
+
+    @abstractmethod
+    async def stat(self, key: str) -> ObjectStat | None:
+        """
+        Размер и время изменения объекта.
+
+        :param key: Ключ объекта.
+        :return: ObjectStat или None, если объекта нет.
+        """
+
+    def local_path(self, key: str) -> Path | None:
+        """
+        Путь к объекту в локальной файловой системе, если он там лежит
+        (позволяет читать файл с диска напрямую, минуя get_stream).
+
+        :param key: Ключ объекта.
+        :return: Путь или None.
+        """
+        return None
+
+    async def close(self) -> None:
+        return None
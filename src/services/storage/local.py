@@ -0,0 +1,123 @@
+import os
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator
+
+from src.core.settings import settings
+from src.services.atomic_write import get_temp_path, sync_paths
+from src.services.io_executor import open_file, run_io
+from src.services.storage.base import ObjectStat, StagedObject, StorageBackend
+from src.services.upload_metrics import count_written, stage
+
+
+class LocalStagedObject(StagedObject):
+    """
+    Временный файл рядом с итоговым путём, переименовывается в него при публикации.
+    """
+
+    def __init__(self, key: str, path: Path, temp_path: Path, size: int) -> None:
+        self.key = key
+        self.path = path
+        self.temp_path = temp_path
+        self.size = size
+
+    async def publish(self) -> None:
+        await run_io(os.replace, self.temp_path, self.path)
+        await sync_paths(self.path.parent)
+
+    async def discard(self) -> None:
+        await run_io(self.temp_path.unlink, missing_ok=True)
+
+
+class LocalStorage(StorageBackend):
+    """
+    Файлы в локальной файловой системе по пути root / key.
+    """
+
+    name = "local"
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._created_folders: set[Path] = set()
+
+    def local_path(self, key: str) -> Path:
+        return self.root / key
+
+    async def ensure_folder(self, folder: Path) -> Path:
+        """
+        Создаёт папку, если она ещё не создавалась этим хранилищем.
+        Уже созданные папки запоминаются, поэтому mkdir выполняется
+        один раз на папку, а не на каждую загрузку.
+
+        :param folder: Путь к папке.
+        :return: Тот же путь.
+        """
+        if folder not in self._created_folders:
+            await run_io(folder.mkdir, parents=True, exist_ok=True)
+            self._created_folders.add(folder)
+        return folder
+
+    async def write_file(self, path: Path, chunks: AsyncIterable[bytes]) -> int:
+        """
+        Записывает поток блоков в файл и сбрасывает его на диск согласно FSYNC_POLICY.
+        При ошибке частично записанный файл удаляется.
+
+        :param path: Путь к файлу.
+        :param chunks: Асинхронный итератор блоков данных.
+        :return: Количество записанных байт.
+        """
+        written = 0
+        try:
+            with stage("disk_write"):
+                async with open_file(path, "wb") as out_file:
+                    async for chunk in chunks:
+                        await out_file.write(chunk)
+                        count_written(len(chunk))
+                        written += len(chunk)
+            await sync_paths(path)
+        except Exception:
+            await run_io(path.unlink, missing_ok=True)
+            raise
+        return written
+
+    async def put_stream(
+        self,
+        key: str,
+        chunks: AsyncIterable[bytes],
+        content_type: str | None = None,
+    ) -> LocalStagedObject:
+        path = self.local_path(key)
+        await self.ensure_folder(path.parent)
+        temp_path = get_temp_path(path)
+        size = await self.write_file(temp_path, chunks)
+        return LocalStagedObject(key, path, temp_path, size)
+
+    async def get_stream(
+        self,
+        key: str,
+        start: int = 0,
+        end: int | None = None,
+        chunk_size: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        chunk_size = chunk_size or settings.DOWNLOAD_CHUNK_SIZE
+        async with open_file(self.local_path(key), "rb") as file:
+            if start:
+                await file.seek(start)
+            remaining = None if end is None else end - start
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = await file.read(size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    async def delete(self, key: str) -> None:
+        await run_io(self.local_path(key).unlink, missing_ok=True)
+
+    async def stat(self, key: str) -> ObjectStat | None:
+        try:
+            stat_result = await run_io(os.stat, self.local_path(key))
+        except FileNotFoundError:
+            return None
+        return ObjectStat(size=stat_result.st_size, mtime_ns=stat_result.st_mtime_ns)
@@ -0,0 +1,385 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterable, AsyncIterator
+from urllib.parse import quote, urlsplit
+from xml.etree import ElementTree
+
+import aiohttp
+from multidict import CIMultiDict
+from yarl import URL
+
+from src.core.settings import settings
+from src.services.storage.base import ObjectStat, StagedObject, StorageBackend, StorageError
+from src.services.upload_metrics import count_written, stage
+
+logger = logging.getLogger(__name__)
+
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+MIN_PART_SIZE = 1024 * 1024 * 5  # S3 limit for every part except the last one
+RETRY_STATUSES = {500, 502, 503, 504}
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def _quote(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+def sign_v4(
+    method: str,
+    path: str,
+    query: dict[str, str],
+    headers: dict[str, str],
+    access_key: str,
+    secret_key: str,
+    region: str,
+    now: datetime,
+    service: str = "s3",
+) -> str:
+    """
+    Формирует заголовок Authorization по AWS Signature Version 4.
+    Подписываются все переданные заголовки (host, x-amz-date,
+    x-amz-content-sha256 и, например, range).
+
+    :param method: HTTP-метод.
+    :param path: Путь запроса, уже закодированный (как он уходит на сервер).
+    :param query: Параметры строки запроса без кодирования.
+    :param headers: Подписываемые заголовки.
+    :param access_key: Идентификатор ключа доступа.
+    :param secret_key: Секретный ключ.
+    :param region: Регион.
+    :param now: Время запроса (совпадает с x-amz-date).
+    :param service: Имя сервиса.
+    :return: Значение заголовка Authorization.
+    """
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    date = amz_date[:8]
+    canonical_headers = {
+        name.lower(): " ".join(value.split()) for name, value in headers.items()
+    }
+    signed_headers = ";".join(sorted(canonical_headers))
+    canonical_request = "\n".join(
+        (
+            method,
+            path,
+            "&".join(
+                f"{_quote(key)}={_quote(value)}" for key, value in sorted(query.items())
+            ),
+            "".join(
+                f"{name}:{canonical_headers[name]}\n" for name in sorted(canonical_headers)
+            ),
+            signed_headers,
+            canonical_headers.get("x-amz-content-sha256", UNSIGNED_PAYLOAD),
+        )
+    )
+    scope = f"{date}/{region}/{service}/aws4_request"
+    string_to_sign = "\n".join(
+        (
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode()).hexdigest(),
+        )
+    )
+    signing_key = _hmac(
+        _hmac(_hmac(_hmac(f"AWS4{secret_key}".encode(), date), region), service),
+        "aws4_request",
+    )
+    signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+    return (
+        f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+        f"SignedHeaders={signed_headers}, Signature={signature}"
+    )
+
+
+def _find_text(body: bytes, tag: str) -> str | None:
+    root = ElementTree.fromstring(body)
+    for element in root.iter():
+        if element.tag.rsplit("}", 1)[-1] == tag:
+            return element.text
+    return None
+
+
+class S3StagedObject(StagedObject):
+    """
+    Незавершённая multipart-загрузка: объект появляется в бакете только
+    после CompleteMultipartUpload, при отмене загрузка прерывается.
+    """
+
+    def __init__(
+        self, storage: "S3Storage", key: str, upload_id: str, etags: list[str], size: int
+    ) -> None:
+        self.storage = storage
+        self.key = key
+        self.upload_id = upload_id
+        self.etags = etags
+        self.size = size
+
+    async def publish(self) -> None:
+        await self.storage.complete_multipart_upload(self.key, self.upload_id, self.etags)
+
+    async def discard(self) -> None:
+        await self.storage.abort_multipart_upload(self.key, self.upload_id)
+
+
+class S3Storage(StorageBackend):
+    """
+    S3-совместимое хранилище (AWS S3, MinIO, Ceph RGW) с адресацией
+    бакета в пути. Запросы подписываются SigV4, соединения берутся
+    из общего пула сессии aiohttp (до S3_MAX_CONNECTIONS).
+
+    Поток загружается multipart-загрузкой частями по part_size,
+    до upload_concurrency частей одной загрузки отправляются параллельно.
+    В памяти одновременно находится не больше upload_concurrency + 1 частей.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        prefix: str = "",
+        part_size: int = MIN_PART_SIZE,
+        upload_concurrency: int = 4,
+        max_connections: int = 64,
+        timeout: float = 300.0,
+        max_retries: int = 3,
+    ) -> None:
+        self.endpoint = URL(endpoint_url.rstrip("/"))
+        self.host = urlsplit(endpoint_url).netloc
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.prefix = prefix
+        self.part_size = part_size
+        self.upload_concurrency = upload_concurrency
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._http_session: aiohttp.ClientSession | None = None
+
+    @property
+    def http_session(self) -> aiohttp.ClientSession:
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._http_session
+
+    async def close(self) -> None:
+        if self._http_session is not None:
+            await self._http_session.close()
+            self._http_session = None
+
+    def _object_path(self, key: str) -> str:
+        return f"/{_quote(self.bucket)}/{_quote(self.prefix + key, safe='/-_.~')}"
+
+    def _request(
+        self,
+        method: str,
+        key: str,
+        query: dict[str, str] | None = None,
+        headers: dict[str, str] | None = None,
+        data: bytes | None = None,
+        timeout: aiohttp.ClientTimeout | None = None,
+    ):
+        query = query or {}
+        path = self._object_path(key)
+        now = datetime.now(timezone.utc)
+        signed = {
+            "host": self.host,
+            "x-amz-date": now.strftime("%Y%m%dT%H%M%SZ"),
+            "x-amz-content-sha256": UNSIGNED_PAYLOAD,
+        }
+        if headers and "range" in headers:
+            signed["range"] = headers["range"]
+        request_headers = (headers or {}) | signed
+        request_headers["authorization"] = sign_v4(
+            method,
+            path,
+            query,
+            signed,
+            self.access_key,
+            self.secret_key,
+            self.region,
+            now,
+        )
+        query_string = "&".join(
+            f"{_quote(name)}={_quote(value)}" for name, value in sorted(query.items())
+        )
+        url = URL(
+            f"{self.endpoint}{path}" + (f"?{query_string}" if query_string else ""),
+            encoded=True,
+        )
+        options = {"timeout": timeout} if timeout is not None else {}
+        return self.http_session.request(
+            method, url, headers=request_headers, data=data, **options
+        )
+
+    async def _send(
+        self,
+        method: str,
+        key: str,
+        query: dict[str, str] | None = None,
+        headers: dict[str, str] | None = None,
+        data: bytes | None = None,
+        ok: tuple[int, ...] = (200,),
+    ) -> tuple[int, CIMultiDict, bytes]:
+        """
+        Выполняет запрос с телом в памяти, повторяя его при ошибках соединения
+        и ответах 5xx до max_retries раз.
+
+        :return: Статус, заголовки и тело ответа.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._request(method, key, query, headers, data) as response:
+                    body = await response.read()
+                    if response.status in ok:
+                        return response.status, response.headers.copy(), body
+                    if response.status not in RETRY_STATUSES or attempt == self.max_retries:
+                        raise StorageError(
+                            f"S3 {method} {key} failed: HTTP {response.status} {body[:200]!r}"
+                        )
+            except aiohttp.ClientError as e:
+                if attempt == self.max_retries:
+                    raise StorageError(f"S3 {method} {key} failed: {e}") from e
+            await asyncio.sleep(0.1 * 2**attempt)
+        raise AssertionError("unreachable")
+
+    async def create_multipart_upload(self, key: str, content_type: str | None) -> str:
+        headers = {"content-type": content_type} if content_type else None
+        _, _, body = await self._send("POST", key, {"uploads": ""}, headers)
+        upload_id = _find_text(body, "UploadId")
+        if not upload_id:
+            raise StorageError(f"S3 did not return UploadId for {key}")
+        return upload_id
+
+    async def upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> str:
+        _, headers, _ = await self._send(
+            "PUT",
+            key,
+            {"partNumber": str(number), "uploadId": upload_id},
+            data=data,
+        )
+        count_written(len(data))
+        return headers["ETag"]
+
+    async def complete_multipart_upload(
+        self, key: str, upload_id: str, etags: list[str]
+    ) -> None:
+        parts = "".join(
+            f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+            for number, etag in enumerate(etags, start=1)
+        )
+        _, _, body = await self._send(
+            "POST",
+            key,
+            {"uploadId": upload_id},
+            {"content-type": "application/xml"},
+            f"<CompleteMultipartUpload>{parts}</CompleteMultipartUpload>".encode(),
+        )
+        # S3 может ответить 200 с ошибкой в теле
+        if body and _find_text(body, "Code") is not None:
+            raise StorageError(f"S3 failed to complete upload of {key}: {body[:200]!r}")
+
+    async def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        await self._send("DELETE", key, {"uploadId": upload_id}, ok=(200, 204, 404))
+
+    async def put_stream(
+        self,
+        key: str,
+        chunks: AsyncIterable[bytes],
+        content_type: str | None = None,
+    ) -> S3StagedObject:
+        upload_id = await self.create_multipart_upload(key, content_type)
+        semaphore = asyncio.Semaphore(self.upload_concurrency)
+        tasks: list[asyncio.Task] = []
+
+        async def send_part(number: int, data: bytes) -> str:
+            try:
+                return await self.upload_part(key, upload_id, number, data)
+            finally:
+                semaphore.release()
+
+        async def schedule(data: bytes) -> None:
+            # Ждём свободный слот: так в памяти не больше upload_concurrency частей
+            await semaphore.acquire()
+            for task in tasks:
+                if task.done() and task.exception() is not None:
+                    semaphore.release()
+                    raise task.exception()
+            tasks.append(asyncio.create_task(send_part(len(tasks) + 1, data)))
+
+        buffer = bytearray()
+        size = 0
+        try:
+            with stage("disk_write"):
+                async for chunk in chunks:
+                    buffer += chunk
+                    size += len(chunk)
+                    while len(buffer) >= self.part_size:
+                        await schedule(bytes(buffer[: self.part_size]))
+                        del buffer[: self.part_size]
+                if buffer or not tasks:
+                    await schedule(bytes(buffer))
+                etags = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                await self.abort_multipart_upload(key, upload_id)
+            except Exception as e:
+                logger.warning("Failed to abort upload %s of %s: %s", upload_id, key, e)
+            raise
+        return S3StagedObject(self, key, upload_id, list(etags), size)
+
+    async def get_stream(
+        self,
+        key: str,
+        start: int = 0,
+        end: int | None = None,
+        chunk_size: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        headers = None
+        if start or end is not None:
+            headers = {"range": f"bytes={start}-{'' if end is None else end - 1}"}
+        # Тело читается столько, сколько его отдаёт клиенту ответ или архив,
+        # поэтому ограничено только ожидание соединения и очередного блока
+        timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=self.timeout, sock_read=self.timeout
+        )
+        async with self._request("GET", key, headers=headers, timeout=timeout) as response:
+            if response.status == 404:
+                raise FileNotFoundError(key)
+            if response.status not in (200, 206):
+                raise StorageError(f"S3 GET {key} failed: HTTP {response.status}")
+            chunk_size = chunk_size or settings.DOWNLOAD_CHUNK_SIZE
+            async for chunk in response.content.iter_chunked(chunk_size):
+                yield chunk
+
+    async def delete(self, key: str) -> None:
+        await self._send("DELETE", key, ok=(200, 204, 404))
+
+    async def stat(self, key: str) -> ObjectStat | None:
+        status, headers, _ = await self._send("HEAD", key, ok=(200, 404))
+        if status == 404:
+            return None
+        last_modified = parsedate_to_datetime(headers["Last-Modified"])
+        return ObjectStat(
+            size=int(headers["Content-Length"]),
+            mtime_ns=int(last_modified.timestamp()) * 1_000_000_000,
+        )
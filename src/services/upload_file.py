@@ -1,111 +1,360 @@
+import hashlib
 import logging
+import os
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterator, TypeVar
+from uuid import uuid4
 
 from fastapi import UploadFile, HTTPException
-from src.core.settings import UPLOAD_DIR, BASE_DIR
+from starlette.requests import ClientDisconnect
+from src.core.settings import UPLOAD_DIR, STORAGE_ROOT, BLOBS_DIR, settings
 from datetime import datetime
-import aiofiles
 from src.schemas.files import CreateFilesSchema
+from src.services.atomic_write import get_temp_path
+from src.services.compression import Codec, iter_compressed, select_codec
+from src.services.io_executor import run_io
+from src.services.storage import get_upload_storage, local_storage
+from src.services.storage.base import StagedObject, StorageBackend
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
 
-def generate_filename(file: UploadFile) -> str:
+
+def generate_filename(filename: str) -> str:
     """
     Генерирует уникальное имя для файла, используя текущую дату и время.
 
-    :param file: Объект UploadFile, содержащий информацию о загруженном файле.
+    :param filename: Исходное имя загруженного файла.
     :return: Сформированное имя файла, содержащее метку времени и исходное имя файла.
     """
     timestamp = datetime.now().strftime("%Y-%m-%d %H-%M-%S")
-    return f"uploaded-{timestamp}: {file.filename}"
+    return f"uploaded-{timestamp}: {Path(filename).name}"
+
+
+def build_target_folder(content_type: str, filename: str) -> Path:
+    """
+    Определяет путь к папке для сохранения файла по его типу контента.
+    Внутри папки типа файлы раскладываются по STORAGE_SHARD_DEPTH уровням
+    подкаталогов по префиксу хеша имени, чтобы в одном каталоге
+    не скапливались миллионы файлов.
+
+    :param content_type: MIME-тип загруженного файла.
+    :param filename: Сформированное новое имя файла.
+    :return: Путь к папке для сохранения файла.
+    """
+    target_folder = UPLOAD_DIR / content_type.replace("/", "_")
+    depth, width = settings.STORAGE_SHARD_DEPTH, settings.STORAGE_SHARD_WIDTH
+    if depth:
+        digest = hashlib.md5(filename.encode(), usedforsecurity=False).hexdigest()
+        for level in range(depth):
+            target_folder /= digest[level * width : (level + 1) * width]
+    return target_folder
 
 
-def get_target_folder(file: UploadFile) -> Path:
+async def get_target_folder(content_type: str, filename: str) -> Path:
     """
     Определяет путь к папке для сохранения файла, основываясь на его типе контента.
     Если папка не существует, она создаётся автоматически.
 
-    :param file: Объект UploadFile, содержащий информацию о загруженном файле.
+    :param content_type: MIME-тип загруженного файла.
+    :param filename: Сформированное новое имя файла.
     :return: Путь к папке для сохранения файла.
     """
-    content_type_folder = file.content_type.replace("/", "_")
-    target_folder = UPLOAD_DIR / content_type_folder
-    target_folder.mkdir(parents=True, exist_ok=True)
-    return target_folder
+    return await local_storage.ensure_folder(build_target_folder(content_type, filename))
 
 
-async def save_to_disk(file: UploadFile, file_path: Path) -> None:
+async def iter_upload_file(file: UploadFile, chunk_size: int) -> AsyncIterator[bytes]:
     """
-    Сохраняет содержимое загруженного файла на диск по указанному пути.
+    Читает загруженный файл блоками заданного размера.
 
     :param file: Объект UploadFile, содержащий загружаемый файл.
-    :param file_path: Путь, по которому файл должен быть сохранён.
-    :raises HTTPException: В случае ошибок чтения или записи.
-    :return: None
+    :param chunk_size: Размер блока в байтах.
+    :return: Асинхронный итератор по блокам файла.
     """
-    try:
-        async with aiofiles.open(file_path, "wb") as out_file:
-            content = await file.read()
-            await out_file.write(content)
-    except ValueError as e:
-        logger.warning('When save streaming file "%s" error: %s', file_path, e)
-        raise HTTPException(
-            status_code=400, detail="Error reading file. Please try again."
-        )
-    except Exception as e:
-        logger.warning('When save streaming file "%s" error: %s', file_path, e)
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+    while chunk := await file.read(chunk_size):
+        yield chunk
 
 
-async def save_stream_to_disk(
-    file: UploadFile, file_path: Path, chunk_size: int
-) -> None:
+@contextmanager
+def upload_errors(target: Path | str) -> Iterator[None]:
     """
-    Сохраняет потоковый файл на диск по указанному пути.
+    Переводит ошибки записи загружаемого файла в HTTPException:
+    400 при ошибке чтения или обрыве соединения, 500 при остальных ошибках.
+    HTTPException (например, 413 из проверки размера) пропускается как есть.
 
-    :param file: Объект UploadFile, содержащий загружаемый файл.
-    :param file_path: Строковый путь, куда файл будет сохранён.
-    :param chunk_size: Размер блока для чтения и записи в байтах (по умолчанию 1MB).
-    :raises HTTPException: В случае ошибок чтения или записи.
-    :return: None
+    :param target: Путь или ключ записываемого файла (для лога).
     """
     try:
-        async with aiofiles.open(file_path, "wb") as buffer:
-            while chunk := await file.read(chunk_size):
-                await buffer.write(chunk)
-    except ValueError as e:
-        logger.warning('When save streaming file "%s" error: %s', file_path, e)
+        yield
+    except HTTPException:
+        raise
+    except (ValueError, ClientDisconnect) as e:
+        logger.warning('When save streaming file "%s" error: %s', target, e)
         raise HTTPException(
             status_code=400, detail="Error reading file. Please try again."
         )
     except Exception as e:
-        logger.warning('When save streaming file "%s" error: %s', file_path, e)
+        logger.warning('When save streaming file "%s" error: %s', target, e)
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
 
+async def write_chunks(
+    write: Callable[[AsyncIterable[bytes]], Awaitable[T]],
+    chunks: AsyncIterable[bytes],
+    target: Path | str,
+    max_size: int | None = None,
+    hasher: "hashlib._Hash | None" = None,
+    codec: Codec | None = None,
+) -> tuple[T, int]:
+    """
+    Передаёт поток блоков в функцию записи, каждый блок записывается один раз.
+    Ограничение размера проверяется по мере поступления данных, при его превышении
+    или обрыве соединения функция записи удаляет частично записанные данные.
+
+    :param write: Функция записи потока (файл на диске или объект хранилища).
+    :param chunks: Асинхронный итератор блоков данных.
+    :param target: Путь или ключ записываемого файла (для лога).
+    :param max_size: Максимально допустимый размер файла в байтах.
+    :param hasher: Объект hashlib, обновляемый каждым принятым блоком (до сжатия).
+    :param codec: Кодек, которым поток сжимается перед записью.
+    :raises HTTPException: 413 при превышении размера, 400/500 в случае ошибок чтения или записи.
+    :return: Результат функции записи и количество принятых байт (до сжатия).
+    """
+    written = 0
+
+    async def checked_chunks() -> AsyncIterator[bytes]:
+        nonlocal written
+        async for chunk in chunks:
+            written += len(chunk)
+            if max_size is not None and written > max_size:
+                raise HTTPException(status_code=413, detail="File is too large.")
+            if hasher is not None:
+                hasher.update(chunk)
+            yield chunk
+
+    stored_chunks = checked_chunks()
+    if codec is not None:
+        stored_chunks = iter_compressed(stored_chunks, codec)
+    with upload_errors(target):
+        result = await write(stored_chunks)
+    return result, written
+
+
+async def save_chunks_to_disk(
+    chunks: AsyncIterable[bytes],
+    file_path: Path,
+    max_size: int | None = None,
+    hasher: "hashlib._Hash | None" = None,
+    codec: Codec | None = None,
+) -> int:
+    """
+    Записывает поток блоков на диск по указанному пути (см. write_chunks).
+
+    :param chunks: Асинхронный итератор блоков данных.
+    :param file_path: Путь, по которому файл должен быть сохранён.
+    :param max_size: Максимально допустимый размер файла в байтах.
+    :param hasher: Объект hashlib, обновляемый каждым принятым блоком (до сжатия).
+    :param codec: Кодек, которым поток сжимается перед записью.
+    :raises HTTPException: 413 при превышении размера, 400/500 в случае ошибок чтения или записи.
+    :return: Количество принятых байт (до сжатия).
+    """
+    _, written = await write_chunks(
+        partial(local_storage.write_file, file_path),
+        chunks,
+        file_path,
+        max_size=max_size,
+        hasher=hasher,
+        codec=codec,
+    )
+    return written
+
+
+async def save_chunks_to_storage(
+    chunks: AsyncIterable[bytes],
+    key: str,
+    storage: StorageBackend,
+    content_type: str | None = None,
+    max_size: int | None = None,
+    codec: Codec | None = None,
+) -> tuple[StagedObject, int]:
+    """
+    Записывает поток блоков в хранилище (см. write_chunks). Объект становится
+    доступен по ключу только после публикации, см. publish_file.
+
+    :param chunks: Асинхронный итератор блоков данных.
+    :param key: Ключ объекта (Files.file_path).
+    :param storage: Хранилище.
+    :param content_type: MIME-тип файла.
+    :param max_size: Максимально допустимый размер файла в байтах.
+    :param codec: Кодек, которым поток сжимается перед записью.
+    :raises HTTPException: 413 при превышении размера, 400/500 в случае ошибок чтения или записи.
+    :return: Записанный объект и количество принятых байт (до сжатия).
+    """
+    return await write_chunks(
+        partial(storage.put_stream, key, content_type=content_type),
+        chunks,
+        key,
+        max_size=max_size,
+        codec=codec,
+    )
+
+
+def get_blob_path(digest: str) -> Path:
+    """
+    Возвращает путь к блобу в контентно-адресуемом хранилище.
+    Блобы раскладываются по двум уровням каталогов по префиксу хеша.
+
+    :param digest: SHA-256 содержимого в шестнадцатеричном виде.
+    :return: Путь к файлу блоба.
+    """
+    return BLOBS_DIR / digest[:2] / digest[2:4] / digest
+
+
+async def save_chunks_to_blob_store(
+    chunks: AsyncIterable[bytes], max_size: int | None = None
+) -> tuple[Path, Path, int, str]:
+    """
+    Сохраняет поток во временный файл контентно-адресуемого хранилища.
+    Хеш считается по мере записи, после чего временный файл переносится
+    в каталог блоба под временным именем. В путь блоба он переименовывается
+    (или удаляется, если такой блоб уже есть) только после commit метаданных,
+    см. publish_file.
+
+    :param chunks: Асинхронный итератор блоков данных.
+    :param max_size: Максимально допустимый размер файла в байтах.
+    :return: Временный путь, путь к блобу, размер содержимого и его SHA-256.
+    """
+    incoming_dir = await local_storage.ensure_folder(BLOBS_DIR / ".incoming")
+    incoming_path = incoming_dir / uuid4().hex
+    hasher = hashlib.sha256()
+    file_size = await save_chunks_to_disk(
+        chunks, incoming_path, max_size=max_size, hasher=hasher
+    )
+    digest = hasher.hexdigest()
+
+    blob_path = get_blob_path(digest)
+    temp_path = get_temp_path(blob_path)
+    await local_storage.ensure_folder(blob_path.parent)
+    await run_io(os.replace, incoming_path, temp_path)
+    return temp_path, blob_path, file_size, digest
+
+
 def create_file_metadata(
-    file: UploadFile, file_path: Path, new_filename: str
+    file_path: Path,
+    new_filename: str,
+    file_size: int,
+    filename: str,
+    content_type: str,
+    content_hash: str | None = None,
+    codec: Codec | None = None,
+    stored_size: int | None = None,
+    storage_backend: str | None = None,
 ) -> CreateFilesSchema:
     """
     Создаёт объект метаданных файла для сохранения в базу данных.
 
-    :param file: Объект UploadFile, содержащий информацию о загруженном файле.
     :param file_path: Путь, по которому файл сохранён.
     :param new_filename: Сформированное новое имя файла.
+    :param file_size: Размер файла в байтах.
+    :param filename: Исходное имя загруженного файла.
+    :param content_type: MIME-тип загруженного файла.
+    :param content_hash: SHA-256 содержимого (для контентно-адресуемого хранилища).
+    :param codec: Кодек, которым файл сжат на диске.
+    :param stored_size: Размер файла на диске (по умолчанию равен file_size).
+    :param storage_backend: Хранилище файла, None - локальное.
     :return: Объект CreateFilesSchema, содержащий метаданные файла.
     """
-    file_path = str(file_path.relative_to(BASE_DIR))
-    file_extension = Path(file_path).suffix
+    file_path = str(file_path.relative_to(STORAGE_ROOT))
+    file_extension = Path(new_filename).suffix
 
     return CreateFilesSchema(
         file_path=file_path,
-        file_size=file.size,
-        file_old_name=file.filename,
+        file_size=file_size,
+        file_old_name=filename,
         file_new_name=new_filename,
         file_extension=file_extension,
-        file_format=file.content_type,
+        file_format=content_type,
+        content_hash=content_hash,
+        codec=codec.name if codec is not None else None,
+        stored_size=file_size if stored_size is None else stored_size,
+        storage_backend=storage_backend,
+    )
+
+
+async def save_to_blob_store(
+    chunks: AsyncIterable[bytes],
+    filename: str,
+    content_type: str,
+    max_size: int | None = None,
+) -> CreateFilesSchema:
+    """
+    Сохраняет поток в контентно-адресуемое хранилище и формирует метаданные файла.
+
+    :param chunks: Асинхронный итератор блоков данных.
+    :param filename: Исходное имя файла.
+    :param content_type: MIME-тип файла.
+    :param max_size: Максимально допустимый размер файла в байтах.
+    :return: Объект CreateFilesSchema с метаданными сохранённого файла.
+    """
+    temp_path, blob_path, file_size, digest = await save_chunks_to_blob_store(
+        chunks, max_size=max_size
+    )
+    row_file_data = create_file_metadata(
+        file_path=blob_path,
+        new_filename=generate_filename(filename),
+        file_size=file_size,
+        filename=filename,
+        content_type=content_type,
+        content_hash=digest,
+    )
+    row_file_data.temp_path = temp_path
+    return row_file_data
+
+
+async def save_to_storage(
+    chunks: AsyncIterable[bytes],
+    filename: str,
+    content_type: str,
+    max_size: int | None = None,
+) -> CreateFilesSchema:
+    """
+    Сохраняет поток в хранилище STORAGE_BACKEND по пути раскладки by_type
+    и формирует метаданные файла. Текстовые форматы сжимаются (COMPRESSION_CODEC).
+
+    :param chunks: Асинхронный итератор блоков данных.
+    :param filename: Исходное имя файла.
+    :param content_type: MIME-тип файла.
+    :param max_size: Максимально допустимый размер файла в байтах.
+    :return: Объект CreateFilesSchema с метаданными сохранённого файла.
+    """
+    storage = get_upload_storage()
+    new_filename = generate_filename(filename)
+    file_path = build_target_folder(content_type, new_filename) / new_filename
+    codec = select_codec(content_type)
+    staged, file_size = await save_chunks_to_storage(
+        chunks,
+        str(file_path.relative_to(STORAGE_ROOT)),
+        storage,
+        content_type=content_type,
+        max_size=max_size,
+        codec=codec,
+    )
+
+    row_file_data = create_file_metadata(
+        file_path=file_path,
+        new_filename=new_filename,
+        file_size=file_size,
+        filename=filename,
+        content_type=content_type,
+        codec=codec,
+        stored_size=staged.size,
+        storage_backend=None if storage is local_storage else storage.name,
     )
+    row_file_data.staged = staged
+    return row_file_data
 
 
 async def save_file_to_disk(
@@ -116,20 +365,56 @@ async def save_file_to_disk(
     """
     Полный процесс сохранения загруженного файла:
     - Генерация имени файла и пути.
-    - Сохранение содержимого файла на диск.
-    - Формирование метаданных файла.
+    - Запись содержимого в хранилище (для локального - во временный файл
+      рядом с итоговым путём).
+    - Формирование метаданных файла (файл публикуется по итоговому пути
+      после записи метаданных в базу данных).
 
     :param chunk_size: Размер блока для чтения и записи в байтах (по умолчанию 1MB).
     :param large: Условие для выбора способа загрузки файлом больших или малых
     :param file: Объект UploadFile, содержащий информацию и данные загружаемого файла.
     :return: Объект CreateFilesSchema с метаданными сохранённого файла.
     """
-    target_folder = get_target_folder(file)
-    new_filename = generate_filename(file)
-    file_path = target_folder / new_filename
-    if large and chunk_size:
-        await save_stream_to_disk(file=file, file_path=file_path, chunk_size=chunk_size)
-    else:
-        await save_to_disk(file=file, file_path=file_path)
+    if not (large and chunk_size):
+        chunk_size = settings.UPLOAD_CHUNK_SIZE
+    if settings.STORAGE_LAYOUT == "content_addressed":
+        return await save_to_blob_store(
+            chunks=iter_upload_file(file, chunk_size),
+            filename=file.filename,
+            content_type=file.content_type,
+        )
+    return await save_to_storage(
+        chunks=iter_upload_file(file, chunk_size),
+        filename=file.filename,
+        content_type=file.content_type,
+    )
+
+
+async def save_raw_file_to_disk(
+    chunks: AsyncIterable[bytes],
+    filename: str,
+    content_type: str,
+    max_size: int,
+) -> CreateFilesSchema:
+    """
+    Сохраняет тело запроса (без multipart) сразу в итоговое место хранения.
 
-    return create_file_metadata(file, file_path, new_filename)
+    :param chunks: Асинхронный итератор блоков тела запроса.
+    :param filename: Исходное имя файла, переданное клиентом.
+    :param content_type: MIME-тип файла.
+    :param max_size: Максимально допустимый размер файла в байтах.
+    :return: Объект CreateFilesSchema с метаданными сохранённого файла.
+    """
+    if settings.STORAGE_LAYOUT == "content_addressed":
+        return await save_to_blob_store(
+            chunks=chunks,
+            filename=filename,
+            content_type=content_type,
+            max_size=max_size,
+        )
+    return await save_to_storage(
+        chunks=chunks,
+        filename=filename,
+        content_type=content_type,
+        max_size=max_size,
+    )
@@ -0,0 +1,169 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.settings import settings
+from src.utils.metrics import Counter, Gauge, Histogram, RateMeter
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_STAGES = ("body_receive", "disk_write", "fsync", "db_insert", "refresh", "publish")
+UPLOAD_STAGE_DURATION = {name: Histogram() for name in UPLOAD_STAGES}
+UPLOAD_REQUEST_DURATION = Histogram()
+UPLOADS_IN_FLIGHT = Gauge()
+UPLOAD_RECEIVED_BYTES = Counter()
+UPLOAD_WRITTEN_BYTES = Counter()
+UPLOAD_RECEIVE_RATE = RateMeter()
+UPLOAD_WRITE_RATE = RateMeter()
+
+UPLOAD_PATH_PREFIX = "/api/files/upload"
+
+
+@dataclass
+class Span:
+    name: str
+    start: float  # seconds since the request start
+    duration: float
+
+
+@dataclass
+class RequestTrace:
+    method: str
+    path: str
+    started_at: float = field(default_factory=time.perf_counter)
+    spans: list[Span] = field(default_factory=list)
+
+
+TraceHook = Callable[[RequestTrace, float], None]
+
+_current_trace: ContextVar[RequestTrace | None] = ContextVar("upload_trace", default=None)
+
+
+def log_slow_request(trace: RequestTrace, duration: float) -> None:
+    spans = ", ".join(
+        f"{span.name}={span.duration * 1000:.1f}ms@{span.start * 1000:.1f}ms"
+        for span in trace.spans
+    )
+    logger.warning(
+        "Slow upload %s %s took %.1fms: %s",
+        trace.method,
+        trace.path,
+        duration * 1000,
+        spans or "no stages",
+    )
+
+
+trace_hooks: list[TraceHook] = [log_slow_request]
+
+
+def add_trace_hook(hook: TraceHook) -> None:
+    """
+    Добавляет обработчик медленных запросов загрузки. Вызывается с трассой
+    запроса (список этапов) и его длительностью, если она не меньше
+    TRACE_SLOW_REQUEST_SECONDS. Так можно передать этапы во внешнюю систему трассировки.
+
+    :param hook: Функция (trace, duration) -> None.
+    :return: None
+    """
+    trace_hooks.append(hook)
+
+
+def record_stage(name: str, started_at: float, duration: float) -> None:
+    UPLOAD_STAGE_DURATION[name].observe(duration)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.spans.append(Span(name, started_at - trace.started_at, duration))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Замеряет этап загрузки: длительность попадает в гистограмму этапа
+    и, если запрос трассируется, в его трассу.
+
+    :param name: Имя этапа из UPLOAD_STAGES.
+    """
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, started_at, time.perf_counter() - started_at)
+
+
+def count_written(size: int) -> None:
+    UPLOAD_WRITTEN_BYTES.inc(size)
+    UPLOAD_WRITE_RATE.add(size)
+
+
+def is_upload_request(scope: Scope) -> bool:
+    """
+    Проверяет, что запрос загружает файл: POST/PUT к /api/files/upload*
+    (обычная, потоковая, пакетная и возобновляемая загрузки).
+
+    :param scope: ASGI scope запроса.
+    :return: True для запросов загрузки.
+    """
+    return (
+        scope["type"] == "http"
+        and scope["method"] in ("POST", "PUT")
+        and scope["path"].startswith(UPLOAD_PATH_PREFIX)
+    )
+
+
+class UploadMetricsMiddleware:
+    """
+    ASGI middleware для запросов загрузки: считает загрузки в процессе,
+    принятые байты и время приёма тела, а при TRACE_SLOW_REQUEST_SECONDS
+    собирает трассу этапов и передаёт медленные запросы в trace_hooks.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not is_upload_request(scope):
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        receive_started_at = None
+
+        async def receive_body() -> Message:
+            nonlocal receive_started_at
+            message = await receive()
+            if message["type"] == "http.request":
+                if receive_started_at is None:
+                    receive_started_at = time.perf_counter()
+                size = len(message.get("body", b""))
+                UPLOAD_RECEIVED_BYTES.inc(size)
+                UPLOAD_RECEIVE_RATE.add(size)
+                if not message.get("more_body", False):
+                    record_stage(
+                        "body_receive",
+                        receive_started_at,
+                        time.perf_counter() - receive_started_at,
+                    )
+            return message
+
+        threshold = settings.TRACE_SLOW_REQUEST_SECONDS
+        trace = RequestTrace(scope["method"], scope["path"], started_at)
+        token = _current_trace.set(trace if threshold is not None else None)
+        UPLOADS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive_body, send)
+        finally:
+            UPLOADS_IN_FLIGHT.dec()
+            _current_trace.reset(token)
+            duration = time.perf_counter() - started_at
+            UPLOAD_REQUEST_DURATION.observe(duration)
+            if threshold is not None and duration >= threshold:
+                for hook in trace_hooks:
+                    try:
+                        hook(trace, duration)
+                    except Exception as e:
+                        logger.warning("Trace hook %r failed: %s", hook, e)
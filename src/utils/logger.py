@@ -1,6 +1,11 @@
-import os
-from pathlib import Path
-from src.core.settings import BASE_DIR
+import copy
+import json
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler
+from src.core.settings import settings
 
 LOG_DEFAULT_HANDLERS = [
     "filehandler",
@@ -9,68 +14,211 @@ LOG_DEFAULT_HANDLERS = [
 LOG_FORMAT = (
     "[%(asctime)s.%(msecs)03d]: %(module)10s:%(lineno)-3d %(levelname)-7s - %(message)s"
 )
-LOGS_DIR = Path("./logs")
-LOGS_DIR.mkdir(exist_ok=True)
-LOGGING = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "formatters": {
-        "verbose": {"format": LOG_FORMAT},
-        "default": {
-            "()": "uvicorn.logging.DefaultFormatter",
-            "fmt": "%(levelprefix)s %(message)s",
-            "use_colors": None,
-        },
-        "access": {
-            "()": "uvicorn.logging.AccessFormatter",
-            "fmt": "%(levelprefix)s %(client_addr)s - "
-            "'%(request_line)s' %(status_code)s",
+ACCESS_FIELDS = ("client_addr", "method", "path", "http_version", "status_code")
+LOGS_DIR = settings.log_settings.LOG_DIR
+LOGS_DIR.mkdir(parents=True, exist_ok=True)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматирует запись одной строкой JSON. Для access-лога uvicorn
+    клиент, метод, путь и статус выносятся в отдельные поля.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        if record.name == "uvicorn.access" and isinstance(record.args, tuple):
+            data.update(zip(ACCESS_FIELDS, record.args))
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class AccessLogSampler(logging.Filter):
+    """
+    Прореживает access-лог: пропускает долю sample_rate записей об успешных
+    ответах и не больше max_per_second записей в секунду. Ответы с ошибками
+    (4xx и 5xx) пишутся всегда.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, max_per_second: float = 0.0) -> None:
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.max_per_second = max_per_second
+        self.dropped = 0
+        self._second = 0
+        self._count = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        args = record.args
+        if isinstance(args, tuple) and len(args) == len(ACCESS_FIELDS):
+            status_code = args[-1]
+            if isinstance(status_code, int) and status_code >= 400:
+                return True
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            self.dropped += 1
+            return False
+        if self.max_per_second > 0:
+            second = int(time.monotonic())
+            if second != self._second:
+                self._second, self._count = second, 0
+            if self._count >= self.max_per_second:
+                self.dropped += 1
+                return False
+            self._count += 1
+        return True
+
+
+class LogQueueHandler(QueueHandler):
+    """
+    Кладёт записи в очередь без форматирования: сообщение, исключение
+    и JSON формируются в потоке QueueListener вместе с записью в файл.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+
+def build_logging_config(log_file: str = "logs.log") -> dict:
+    """
+    Собирает конфигурацию logging.config.dictConfig по настройкам LOG_*.
+    При LOG_QUEUE_ENABLED корневой логгер и access-лог пишут в очередь,
+    а консоль и файл обслуживаются фоновыми QueueListener
+    (запускаются в lifespan приложения, см. start_log_listeners).
+
+    :param log_file: Имя файла в каталоге logs. У каждого рабочего процесса
+        свой файл, иначе процессы ротировали бы один файл независимо друг от друга.
+    :return: Словарь конфигурации.
+    """
+    log_settings = settings.log_settings
+    formatter = "json" if log_settings.LOG_RENDERER == "json" else "verbose"
+    root_handlers = LOG_DEFAULT_HANDLERS
+    access_handlers = ["access", "filehandler"]
+    queue_handlers = {}
+    if log_settings.LOG_QUEUE_ENABLED:
+        queue_handlers = {
+            "queue": {
+                "class": "src.utils.logger.LogQueueHandler",
+                "handlers": root_handlers,
+                "respect_handler_level": True,
+            },
+            "access_queue": {
+                "class": "src.utils.logger.LogQueueHandler",
+                "handlers": access_handlers,
+                "respect_handler_level": True,
+            },
+        }
+        root_handlers, access_handlers = ["queue"], ["access_queue"]
+
+    return {
+        "version": 1,
+        "disable_existing_loggers": False,
+        "formatters": {
+            "verbose": {"format": LOG_FORMAT},
+            "json": {"()": "src.utils.logger.JsonFormatter"},
+            "default": {
+                "()": "uvicorn.logging.DefaultFormatter",
+                "fmt": "%(levelprefix)s %(message)s",
+                "use_colors": None,
+            },
+            "access": {
+                "()": "uvicorn.logging.AccessFormatter",
+                "fmt": "%(levelprefix)s %(client_addr)s - "
+                "'%(request_line)s' %(status_code)s",
+            },
         },
-    },
-    "handlers": {
-        "console": {
-            "level": "DEBUG",
-            "class": "logging.StreamHandler",
-            "formatter": "verbose",
+        "filters": {
+            "access_sampler": {
+                "()": "src.utils.logger.AccessLogSampler",
+                "sample_rate": log_settings.LOG_ACCESS_SAMPLE_RATE,
+                "max_per_second": log_settings.LOG_ACCESS_MAX_PER_SECOND,
+            },
         },
-        "default": {
-            "formatter": "default",
-            "class": "logging.StreamHandler",
-            "stream": "ext://sys.stdout",
+        "handlers": {
+            "console": {
+                "level": "DEBUG",
+                "class": "logging.StreamHandler",
+                "formatter": formatter,
+            },
+            "default": {
+                "formatter": "default",
+                "class": "logging.StreamHandler",
+                "stream": "ext://sys.stdout",
+            },
+            "access": {
+                "formatter": formatter,
+                "class": "logging.StreamHandler",
+                "stream": "ext://sys.stdout",
+            },
+            "filehandler": {
+                "level": "DEBUG",
+                "class": "logging.handlers.RotatingFileHandler",
+                "formatter": formatter,
+                "filename": str(LOGS_DIR / log_file),
+                "mode": "a",
+                "backupCount": log_settings.LOG_FILE_BACKUP_COUNT,
+                "maxBytes": log_settings.LOG_FILE_MAX_BYTES,
+                "encoding": "utf-8",
+            },
+            **queue_handlers,
         },
-        "access": {
-            "formatter": "verbose",
-            "class": "logging.StreamHandler",
-            "stream": "ext://sys.stdout",
+        "loggers": {
+            "": {
+                "handlers": root_handlers,
+                "level": log_settings.LOG_LEVEL,
+            },
+            "uvicorn.error": {
+                "level": "INFO",
+            },
+            "uvicorn.access": {
+                "handlers": access_handlers,
+                "filters": ["access_sampler"],
+                "level": "INFO",
+                "propagate": False,
+            },
         },
-        "filehandler": {
-            "level": "DEBUG",
-            "class": "logging.handlers.RotatingFileHandler",
+        "root": {
+            "level": log_settings.LOG_LEVEL,
             "formatter": "verbose",
-            "filename": os.path.join(BASE_DIR, "logs", "logs.log"),
-            "mode": "a",
-            "backupCount": 3,
-            "maxBytes": 50000,
-            "encoding": "utf-8",
-        },
-    },
-    "loggers": {
-        "": {
-            "handlers": LOG_DEFAULT_HANDLERS,
-            "level": "INFO",
+            "handlers": root_handlers,
         },
-        "uvicorn.error": {
-            "level": "INFO",
-        },
-        "uvicorn.access": {
-            "handlers": ["access", "filehandler"],
-            "level": "INFO",
-            "propagate": False,
-        },
-    },
-    "root": {
-        "level": "INFO",
-        "formatter": "verbose",
-        "handlers": LOG_DEFAULT_HANDLERS,
-    },
-}
+    }
+
+
+LOGGING = build_logging_config()
+
+
+def _queue_listeners() -> list:
+    return [
+        handler.listener
+        for name in ("", "uvicorn.access")
+        for handler in logging.getLogger(name).handlers
+        if isinstance(handler, QueueHandler) and getattr(handler, "listener", None)
+    ]
+
+
+def start_log_listeners() -> None:
+    """
+    Запускает фоновые потоки записи логов, созданные dictConfig(LOGGING).
+    """
+    for listener in _queue_listeners():
+        if listener._thread is None:
+            listener.start()
+
+
+def stop_log_listeners() -> None:
+    """
+    Дописывает оставшиеся в очереди записи и останавливает фоновые потоки.
+    """
+    for listener in _queue_listeners():
+        if listener._thread is not None:
+            listener.stop()
@@ -0,0 +1,233 @@
+import bisect
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Iterable, Literal
+
+DEFAULT_TIME_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class Counter:
+    """
+    Монотонно растущий счётчик.
+    """
+
+    def __init__(self) -> None:
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    """
+    Значение, которое может расти и уменьшаться.
+    """
+
+    def __init__(self) -> None:
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class RateMeter:
+    """
+    Скорость в единицах в секунду за последние window секунд.
+    Хранит по одной сумме на секунду, поэтому занимает не больше window записей.
+    """
+
+    def __init__(self, window: int = 60) -> None:
+        self.window = window
+        self._buckets: deque[list[float]] = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: int) -> None:
+        while self._buckets and self._buckets[0][0] <= now - self.window:
+            self._buckets.popleft()
+
+    def add(self, amount: float) -> None:
+        now = int(time.monotonic())
+        with self._lock:
+            if self._buckets and self._buckets[-1][0] == now:
+                self._buckets[-1][1] += amount
+            else:
+                self._buckets.append([now, amount])
+            self._trim(now)
+
+    @property
+    def value(self) -> float:
+        with self._lock:
+            self._trim(int(time.monotonic()))
+            return sum(amount for _, amount in self._buckets) / self.window
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными границами корзин (как в Prometheus).
+    Хранит только счётчики корзин, сумму и количество наблюдений,
+    поэтому занимает постоянную память при любом числе наблюдений.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_TIME_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Оценка квантиля по верхней границе корзины, в которую он попадает.
+
+        :param q: Квантиль от 0 до 1.
+        :return: Оценка квантиля или None, если наблюдений нет.
+        """
+        if not self._count:
+            return None
+        rank = q * self._count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self._counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = count
+        return {
+            "count": count,
+            "sum": total,
+            "avg": total / count if count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+MetricType = Literal["counter", "gauge", "histogram"]
+Sample = tuple[dict[str, str], Any]
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_sample(name: str, labels: dict[str, str], value: float) -> str:
+    if labels:
+        label_text = ",".join(
+            f'{key}="{_escape_label(str(label))}"' for key, label in labels.items()
+        )
+        name = f"{name}{{{label_text}}}"
+    if not isinstance(value, int):
+        value = float(value)
+    return f"{name} {value!r}"
+
+
+class MetricsRegistry:
+    """
+    Набор метрик для выдачи в текстовом формате Prometheus (version 0.0.4).
+
+    Метрика регистрируется объектом (Counter, Gauge, RateMeter, Histogram)
+    или функцией, которая при каждом сборе возвращает пары (метки, значение).
+    """
+
+    def __init__(self) -> None:
+        self._families: dict[str, tuple[str, MetricType, Callable[[], Iterable[Sample]]]] = {}
+
+    def register(
+        self,
+        name: str,
+        help_text: str,
+        metric_type: MetricType,
+        source: Any,
+    ) -> None:
+        """
+        Регистрирует семейство метрик.
+
+        :param name: Имя метрики.
+        :param help_text: Описание для строки HELP.
+        :param metric_type: Тип метрики: counter, gauge или histogram.
+        :param source: Объект метрики или функция, возвращающая список (метки, значение).
+        :return: None
+        """
+        collect = source
+        if not callable(source):
+
+            def collect() -> list[Sample]:
+                return [({}, source)]
+
+        self._families[name] = (help_text, metric_type, collect)
+
+    def render(self) -> str:
+        lines = []
+        for name, (help_text, metric_type, collect) in self._families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in collect():
+                if metric_type == "histogram":
+                    snapshot = value.snapshot()
+                    for bound, count in snapshot["buckets"].items():
+                        lines.append(
+                            _format_sample(f"{name}_bucket", labels | {"le": bound}, count)
+                        )
+                    lines.append(_format_sample(f"{name}_sum", labels, snapshot["sum"]))
+                    lines.append(_format_sample(f"{name}_count", labels, snapshot["count"]))
+                else:
+                    if hasattr(value, "value"):
+                        value = value.value
+                    lines.append(_format_sample(name, labels, value))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
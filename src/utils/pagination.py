@@ -0,0 +1,34 @@
+import base64
+import binascii
+from datetime import datetime
+from uuid import UUID
+
+from fastapi import HTTPException
+
+
+def encode_cursor(created_at: datetime, item_id: UUID) -> str:
+    """
+    Кодирует позицию последней строки страницы в непрозрачный курсор.
+
+    :param created_at: Время создания последней строки страницы.
+    :param item_id: Идентификатор последней строки страницы.
+    :return: Курсор в виде строки base64url.
+    """
+    raw = f"{created_at.isoformat()}|{item_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """
+    Декодирует курсор, полученный из encode_cursor.
+
+    :param cursor: Курсор в виде строки base64url.
+    :raises HTTPException: 400, если курсор повреждён.
+    :return: Время создания и идентификатор строки, после которой начинается страница.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, item_id = raw.split("|")
+        return datetime.fromisoformat(created_at), UUID(item_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
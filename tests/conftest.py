@@ -1,7 +1,18 @@
 import asyncio
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
 import pytest
 import pytest_asyncio
 
+# Файлы и логи тестов пишутся во временный каталог, а не в media/ и logs/ проекта.
+# Переменные задаются до импорта src, так как пути вычисляются при импорте настроек
+TEST_STORAGE_ROOT = Path(tempfile.mkdtemp(prefix="file-storage-tests-"))
+os.environ["STORAGE_ROOT"] = str(TEST_STORAGE_ROOT)
+os.environ["LOG_DIR"] = str(TEST_STORAGE_ROOT / "logs")
+
 from src.core.settings import settings
 from httpx import AsyncClient, ASGITransport
 from main import app
@@ -14,6 +25,12 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(scope="session", autouse=True)
+def test_storage_root():
+    yield TEST_STORAGE_ROOT
+    shutil.rmtree(TEST_STORAGE_ROOT, ignore_errors=True)
+
+
 @pytest_asyncio.fixture
 async def async_client():
     async with AsyncClient(
@@ -27,10 +44,12 @@ async def make_get_request(async_client):
     async def inner(
         path: str,
         query_params: dict | None = {},
+        headers: dict | None = None,
     ):
         response = await async_client.get(
             path,
             params=query_params,
+            headers=headers,
         )
         return response
 
@@ -44,13 +63,43 @@ async def make_post_request(async_client):
         json: dict | None = None,
         files: dict | None = None,
         query_params: dict = {},
+        content=None,
+        headers: dict | None = None,
     ):
         response = await async_client.post(
             path,
             json=json,
             files=files,
             params=query_params,
+            content=content,
+            headers=headers,
         )
         return response
 
     return inner
+
+
+@pytest_asyncio.fixture
+async def make_put_request(async_client):
+    async def inner(
+        path: str,
+        content=None,
+        headers: dict | None = None,
+    ):
+        response = await async_client.put(
+            path,
+            content=content,
+            headers=headers,
+        )
+        return response
+
+    return inner
+
+
+@pytest_asyncio.fixture
+async def make_delete_request(async_client):
+    async def inner(path: str):
+        response = await async_client.delete(path)
+        return response
+
+    return inner
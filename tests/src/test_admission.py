@@ -0,0 +1,211 @@
+import asyncio
+import http
+
+import pytest
+from src.core.settings import settings
+from src.services.admission import (
+    AdmissionController,
+    admission_controller,
+    is_streamed_upload,
+)
+
+# Адрес клиента, который ASGITransport передаёт в scope
+CLIENT = "127.0.0.1"
+
+
+@pytest.mark.parametrize(
+    "method, path, expected",
+    [
+        ("POST", "/api/files/upload", False),
+        ("POST", "/api/files/upload/batch", False),
+        ("POST", "/api/files/upload/stream", True),
+        ("POST", "/api/files/uploads/", False),
+        ("PUT", "/api/files/uploads/8c5d8e0b-3d1f-4bfb-9d55-0e1b2f1f7a10/parts/0", True),
+    ],
+)
+def tests_is_streamed_upload(method: str, path: str, expected: bool):
+    assert is_streamed_upload({"type": "http", "method": method, "path": path}) is expected
+
+
+def tests_admission_controller_limits():
+    controller = AdmissionController(
+        max_uploads=3, max_in_flight_bytes=100, max_uploads_per_client=2
+    )
+    assert controller.try_acquire("a") is None
+    controller.charge(150)  # бюджет исчерпан полученными байтами
+    assert controller.try_acquire("b").reason == "bytes"
+    controller.release("a", 150)
+
+    assert controller.try_acquire("a") is None
+    assert controller.try_acquire("a") is None
+    controller.charge(90)
+    rejection = controller.try_acquire("a")
+    assert (rejection.reason, rejection.status_code) == ("client", 429)
+    assert controller.try_acquire("b") is None
+    rejection = controller.try_acquire("c")
+    assert (rejection.reason, rejection.status_code) == ("uploads", 503)
+    assert (controller.in_flight, controller.in_flight_bytes, controller.clients) == (
+        3,
+        90,
+        2,
+    )
+
+    for client, size in (("a", 40), ("a", 50), ("b", 0)):
+        controller.release(client, size)
+    assert (controller.in_flight, controller.in_flight_bytes, controller.clients) == (
+        0,
+        0,
+        0,
+    )
+
+
+@pytest.mark.parametrize(
+    "limits, status_code, reason",
+    [
+        ({"max_uploads": 1}, http.HTTPStatus.SERVICE_UNAVAILABLE, "uploads"),
+        ({"max_in_flight_bytes": 1024}, http.HTTPStatus.SERVICE_UNAVAILABLE, "bytes"),
+        ({"max_uploads_per_client": 1}, http.HTTPStatus.TOO_MANY_REQUESTS, "client"),
+    ],
+)
+@pytest.mark.asyncio
+async def tests_upload_rejected_by_admission(
+    monkeypatch,
+    make_post_request,
+    make_get_request,
+    limits: dict,
+    status_code: int,
+    reason: str,
+):
+    monkeypatch.setattr(settings.admission_settings, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(settings.admission_settings, "ADMISSION_RETRY_AFTER", 2)
+    for name in ("max_uploads", "max_in_flight_bytes", "max_uploads_per_client"):
+        monkeypatch.setattr(admission_controller, name, limits.get(name, 0))
+    before = (await make_get_request(path="/api/monitoring/admission")).json()
+
+    # Загрузка в процессе того же клиента, уже получившая 1024 байта
+    assert admission_controller.try_acquire(CLIENT) is None
+    admission_controller.charge(1024)
+    try:
+        response = await make_post_request(
+            path="/api/files/upload",
+            files={"file": ("admission.txt", b"x" * 100, "text/plain")},
+        )
+        assert response.status_code == status_code
+        assert response.headers["retry-after"] == "2"
+    finally:
+        admission_controller.release(CLIENT, 1024)
+
+    response = await make_post_request(
+        path="/api/files/upload",
+        files={"file": ("admission.txt", b"x" * 100, "text/plain")},
+    )
+    assert response.status_code == http.HTTPStatus.OK
+
+    after = (await make_get_request(path="/api/monitoring/admission")).json()
+    assert after["rejected"][reason] == before["rejected"][reason] + 1
+    assert after["admitted"] == before["admitted"] + 2
+    assert after["in_flight"] == 0
+    assert after["in_flight_bytes"] == 0
+
+    metrics = (await make_get_request(path="/metrics")).text
+    assert f'admission_rejected_total{{reason="{reason}"}}' in metrics
+
+
+@pytest.mark.asyncio
+async def tests_upload_admitted_while_large_upload_in_flight(
+    monkeypatch, make_post_request, make_get_request
+):
+    admission_settings = settings.admission_settings
+    monkeypatch.setattr(admission_settings, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(admission_settings, "ADMISSION_MAX_BUFFERED_BYTES_PER_UPLOAD", 4096)
+    monkeypatch.setattr(admission_controller, "max_uploads", 0)
+    monkeypatch.setattr(admission_controller, "max_in_flight_bytes", 64 * 1024)
+    monkeypatch.setattr(admission_controller, "max_uploads_per_client", 0)
+    content = b"x" * 1024 * 1024  # объявленный размер больше всего бюджета
+    resume = asyncio.Event()
+
+    async def slow_body():
+        yield content[:16384]
+        await resume.wait()
+        yield content[16384:]
+
+    large = asyncio.create_task(
+        make_post_request(
+            path="/api/files/upload/stream",
+            content=slow_body(),
+            headers={
+                "X-File-Name": "large-admission.bin",
+                "Content-Type": "application/octet-stream",
+                "Content-Length": str(len(content)),
+            },
+        )
+    )
+    try:
+        async with asyncio.timeout(5):
+            while admission_controller.in_flight_bytes == 0:
+                await asyncio.sleep(0.01)
+        # Учтено не больше ADMISSION_MAX_BUFFERED_BYTES_PER_UPLOAD, а не Content-Length
+        assert admission_controller.in_flight_bytes == 4096
+
+        response = await make_post_request(
+            path="/api/files/upload",
+            files={"file": ("small-admission.txt", b"x" * 100, "text/plain")},
+        )
+        assert response.status_code == http.HTTPStatus.OK
+    finally:
+        resume.set()
+        response = await large
+    assert response.status_code == http.HTTPStatus.OK
+    assert response.json()["file_size"] == len(content)
+
+    stats = (await make_get_request(path="/api/monitoring/admission")).json()
+    assert (stats["in_flight"], stats["in_flight_bytes"]) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def tests_multipart_upload_charged_in_full(
+    monkeypatch, make_post_request, make_get_request
+):
+    admission_settings = settings.admission_settings
+    monkeypatch.setattr(admission_settings, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(admission_settings, "ADMISSION_MAX_BUFFERED_BYTES_PER_UPLOAD", 4096)
+    monkeypatch.setattr(admission_controller, "max_uploads", 0)
+    monkeypatch.setattr(admission_controller, "max_in_flight_bytes", 0)
+    monkeypatch.setattr(admission_controller, "max_uploads_per_client", 0)
+    boundary = "admission-boundary"
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="multipart-admission.bin"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + b"x" * 64 * 1024 + f"\r\n--{boundary}--\r\n".encode()
+    resume = asyncio.Event()
+
+    async def slow_body():
+        yield body[:16384]
+        await resume.wait()
+        yield body[16384:]
+
+    upload = asyncio.create_task(
+        make_post_request(
+            path="/api/files/upload",
+            content=slow_body(),
+            headers={
+                "Content-Type": f"multipart/form-data; boundary={boundary}",
+                "Content-Length": str(len(body)),
+            },
+        )
+    )
+    try:
+        async with asyncio.timeout(5):
+            while admission_controller.in_flight_bytes == 0:
+                await asyncio.sleep(0.01)
+        # Multipart-тело копится во временном файле, поэтому лимит на загрузку не действует
+        assert admission_controller.in_flight_bytes == 16384
+    finally:
+        resume.set()
+        response = await upload
+    assert response.status_code == http.HTTPStatus.OK
+    assert response.json()["file_size"] == 64 * 1024
+
+    stats = (await make_get_request(path="/api/monitoring/admission")).json()
+    assert (stats["in_flight"], stats["in_flight_bytes"]) == (0, 0)
@@ -0,0 +1,102 @@
+import asyncio
+import http
+import os
+import time
+import uuid
+
+import pytest
+
+from src.core.settings import STORAGE_ROOT, settings
+from src.db.session import db_session
+from src.services import atomic_write
+from src.services.atomic_write import (
+    TEMP_FILE_PATTERN,
+    GroupSyncer,
+    get_temp_path,
+    reap_temp_files,
+)
+from tests.settings import TEST_DATA_DIR
+
+
+@pytest.mark.parametrize("fsync_policy", ["none", "fdatasync", "group"])
+@pytest.mark.parametrize("path", ["/api/files/upload", "/api/files/upload/stream"])
+@pytest.mark.asyncio
+async def tests_upload_atomic_write(
+    monkeypatch,
+    make_post_request,
+    make_get_request,
+    fsync_policy: str,
+    path: str,
+):
+    monkeypatch.setattr(settings, "FSYNC_POLICY", fsync_policy)
+    monkeypatch.setattr(settings, "STORAGE_LAYOUT", "by_type")
+    test_file = TEST_DATA_DIR / "common_text.txt"
+    file_name = f"{uuid.uuid4().hex}.txt"
+    if path.endswith("stream"):
+        response = await make_post_request(
+            path=path,
+            content=test_file.read_bytes(),
+            headers={"X-File-Name": file_name, "Content-Type": "text/plain"},
+        )
+    else:
+        with test_file.open("rb") as f:
+            response = await make_post_request(
+                files={"file": (file_name, f, "text/plain")}, path=path
+            )
+    assert response.status_code == http.HTTPStatus.OK
+
+    file_path = STORAGE_ROOT / response.json()["file_path"]
+    assert file_path.read_bytes() == test_file.read_bytes()
+    assert not [
+        name
+        for name in os.listdir(file_path.parent)
+        if TEMP_FILE_PATTERN.match(name) and file_name in name
+    ]
+
+
+@pytest.mark.asyncio
+async def tests_group_syncer_syncs_collected_paths(monkeypatch, tmp_path):
+    calls = []
+
+    def fsync_paths(paths, data_only=False):
+        calls.append((list(paths), data_only))
+
+    monkeypatch.setattr(atomic_write, "_fsync_paths", fsync_paths)
+    first, second = tmp_path / "first.txt", tmp_path / "second.txt"
+    syncer = GroupSyncer(window=0.01)
+    await asyncio.gather(
+        syncer.sync([first, tmp_path]),
+        syncer.sync([second, tmp_path]),
+    )
+    # Одна задача пула на окно, только собранные пути без повторов
+    assert calls == [([first, tmp_path, second], True)]
+
+
+@pytest.mark.asyncio
+async def tests_reap_temp_files(make_post_request):
+    test_file = TEST_DATA_DIR / "common_text.txt"
+    with test_file.open("rb") as f:
+        response = await make_post_request(
+            files={"file": (f"{uuid.uuid4().hex}.txt", f, "text/plain")},
+            path="/api/files/upload",
+        )
+    committed_path = STORAGE_ROOT / response.json()["file_path"]
+    old = time.time() - 2 * settings.TEMP_FILE_MIN_AGE
+
+    # Процесс упал между commit и переименованием.
+    committed_temp = get_temp_path(committed_path)
+    os.replace(committed_path, committed_temp)
+    os.utime(committed_temp, (old, old))
+    orphan = get_temp_path(committed_path.with_name(f"{uuid.uuid4().hex}.txt"))
+    orphan.write_bytes(b"partial")
+    os.utime(orphan, (old, old))
+    young = get_temp_path(committed_path.with_name(f"{uuid.uuid4().hex}.txt"))
+    young.write_bytes(b"in progress")
+
+    await reap_temp_files(db_session.session_factory)
+
+    assert committed_path.read_bytes() == test_file.read_bytes()
+    assert not committed_temp.exists()
+    assert not orphan.exists()
+    assert young.exists()
+    young.unlink()
@@ -0,0 +1,109 @@
+import http
+import uuid
+
+import pytest
+from src.core.settings import settings
+from src.db.session import db_session
+from src.services.file_stats import StatsRollup
+
+
+async def upload_files(make_post_request, prefix: str, file_format: str) -> list[dict]:
+    files = []
+    for name, size in (("a.txt", 30), ("b.txt", 10), ("c.csv", 20)):
+        response = await make_post_request(
+            path="/api/files/upload",
+            files={"file": (f"{prefix}-{name}", b"x" * size, file_format)},
+        )
+        files.append(response.json())
+    return files
+
+
+@pytest.mark.asyncio
+async def tests_file_stats(make_post_request, make_get_request, make_delete_request):
+    prefix = uuid.uuid4().hex
+    file_format = f"text/x-stats-{prefix}"
+    files = await upload_files(make_post_request, prefix, file_format)
+    query_params = {"file_format": file_format, "group_by": ["file_extension", "day"]}
+
+    response = await make_get_request(path="/api/files/stats", query_params=query_params)
+    assert response.status_code == http.HTTPStatus.OK
+    stats = response.json()
+    assert (stats["files_count"], stats["total_size"]) == (3, 60)
+    assert [
+        (group["file_extension"], group["files_count"], group["total_size"])
+        for group in stats["groups"]
+    ] == [(".csv", 1, 20), (".txt", 2, 40)]
+    assert all(group["day"] is not None for group in stats["groups"])
+    assert all(group["file_format"] is None for group in stats["groups"])
+
+    await make_delete_request(path=f"/api/files/{files[0]['id']}")
+    await make_delete_request(path=f"/api/files/{files[0]['id']}")
+    await StatsRollup(db_session.session_factory).run_once()
+    response = await make_get_request(path="/api/files/stats", query_params=query_params)
+    stats = response.json()
+    assert (stats["files_count"], stats["total_size"]) == (2, 30)
+    assert [
+        (group["file_extension"], group["files_count"], group["total_size"])
+        for group in stats["groups"]
+    ] == [(".csv", 1, 20), (".txt", 1, 10)]
+
+    await StatsRollup(db_session.session_factory).run_once()
+    response = await make_get_request(
+        path="/api/files/stats",
+        query_params={"file_format": file_format, "group_by": "file_format"},
+    )
+    assert response.json()["groups"] == [
+        {
+            "file_format": file_format,
+            "file_extension": None,
+            "day": None,
+            "files_count": 2,
+            "total_size": 30,
+        }
+    ]
+
+
+@pytest.mark.parametrize(
+    "query_params, exact_count_limit, expected_total, expected_exact",
+    [
+        ({"file_format": "{format}"}, 10000, 3, "true"),
+        ({"file_format": "{format}", "sort": "-created_at"}, 10000, 3, "true"),
+        ({"name_contains": "{prefix}"}, 10000, 3, "true"),
+        ({"name_contains": "{prefix}", "file_extension": ".txt"}, 10000, 2, "true"),
+        ({"name_contains": "{prefix}"}, 1, None, "false"),
+    ],
+)
+@pytest.mark.asyncio
+async def tests_listing_total(
+    monkeypatch,
+    make_post_request,
+    make_get_request,
+    query_params: dict,
+    exact_count_limit: int,
+    expected_total: int | None,
+    expected_exact: str,
+):
+    monkeypatch.setattr(
+        settings.stats_settings, "LISTING_EXACT_COUNT_LIMIT", exact_count_limit
+    )
+    prefix = uuid.uuid4().hex
+    file_format = f"text/x-total-{prefix}"
+    await upload_files(make_post_request, prefix, file_format)
+
+    query_params = {
+        key: value.format(prefix=prefix, format=file_format)
+        for key, value in query_params.items()
+    }
+    response = await make_get_request(
+        path="/api/files/", query_params={"with_total": "true"} | query_params
+    )
+    assert response.status_code == http.HTTPStatus.OK
+    assert response.headers["x-total-count-exact"] == expected_exact
+    total = int(response.headers["x-total-count"])
+    if expected_total is not None:
+        assert total == expected_total
+    else:
+        assert total > exact_count_limit
+
+    response = await make_get_request(path="/api/files/", query_params=query_params)
+    assert "x-total-count" not in response.headers
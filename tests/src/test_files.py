@@ -1,8 +1,25 @@
+import asyncio
+import csv
+import hashlib
+import io
+import json
 import os
 import http
 import uuid
+import zipfile
 
 import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete, select
+
+from main import app
+from src.core.settings import BLOBS_DIR, STORAGE_ROOT, settings
+from src.db.session import db_session
+from src.models.blobs import Blobs
+from src.models.files import Files
+from src.services.crud import files as files_crud
+from src.services.crud.files import metadata_writer, soft_delete_files
+from src.services.garbage_collector import GarbageCollector
 from tests.settings import TEST_DATA_DIR
 
 
@@ -256,3 +273,624 @@ async def tests_get_upload_files(
     response = await make_get_request(path=f"{query["path"]}{uuid.uuid4()}")
     assert response.json() == expected_answer["response"]
     assert response.status_code == expected_answer["status"]
+
+
+@pytest.mark.parametrize(
+    "query, expected_answer",
+    [
+        (
+            {"headers": {}},
+            {"content": slice(None), "status": http.HTTPStatus.OK},
+        ),
+        (
+            {"headers": {"Range": "bytes=0-9"}},
+            {"content": slice(0, 10), "status": http.HTTPStatus.PARTIAL_CONTENT},
+        ),
+        (
+            {"headers": {"Range": "bytes=-100"}},
+            {"content": slice(-100, None), "status": http.HTTPStatus.PARTIAL_CONTENT},
+        ),
+        (
+            {"headers": {"Range": "bytes=200000-"}},
+            {
+                "content": slice(0, 0),
+                "status": http.HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+            },
+        ),
+    ],
+)
+@pytest.mark.asyncio
+async def tests_get_file_content(
+    make_post_request,
+    make_get_request,
+    query: dict,
+    expected_answer: dict,
+):
+    test_file = TEST_DATA_DIR / "common_text.txt"
+    content = test_file.read_bytes()
+    with test_file.open("rb") as f:
+        post_response = await make_post_request(
+            files={"file": ("common_text.txt", f, "text/plain")},
+            path="/api/files/upload",
+        )
+    file_id = post_response.json()["id"]
+
+    response = await make_get_request(
+        path=f"/api/files/{file_id}/content", headers=query["headers"]
+    )
+    assert response.status_code == expected_answer["status"]
+    if response.status_code != http.HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE:
+        assert response.content == content[expected_answer["content"]]
+
+
+@pytest.mark.asyncio
+async def tests_get_file_content_conditional(make_post_request, make_get_request):
+    test_file = TEST_DATA_DIR / "common_text.txt"
+    with test_file.open("rb") as f:
+        post_response = await make_post_request(
+            files={"file": ("common_text.txt", f, "text/plain")},
+            path="/api/files/upload",
+        )
+    path = f"/api/files/{post_response.json()['id']}/content"
+
+    response = await make_get_request(path=path)
+    etag = response.headers["etag"]
+    cached_response = await make_get_request(
+        path=path, headers={"If-None-Match": etag}
+    )
+    assert cached_response.status_code == http.HTTPStatus.NOT_MODIFIED
+
+    multi_range_response = await make_get_request(
+        path=path, headers={"Range": "bytes=0-4,10-14"}
+    )
+    assert multi_range_response.status_code == http.HTTPStatus.PARTIAL_CONTENT
+    assert multi_range_response.headers["content-type"].startswith(
+        "multipart/byteranges"
+    )
+
+
+@pytest.mark.parametrize(
+    "query, expected_answer",
+    [
+        (
+            {
+                "path": "/api/files/upload/stream",
+                "data": {"file_name": "common_text.txt"},
+                "headers": {
+                    "X-File-Name": "common_text.txt",
+                    "Content-Type": "text/plain",
+                },
+            },
+            {
+                "response": {
+                    "file_size": 110100,
+                    "file_format": "text/plain",
+                    "file_old_name": "common_text.txt",
+                    "file_extension": ".txt",
+                },
+                "status": http.HTTPStatus.OK,
+            },
+        )
+    ],
+)
+@pytest.mark.asyncio
+async def tests_upload_raw_file(
+    make_post_request,
+    query: dict,
+    expected_answer: dict,
+):
+    test_file = TEST_DATA_DIR / query["data"]["file_name"]
+    response = await make_post_request(
+        path=query["path"],
+        content=test_file.read_bytes(),
+        headers=query["headers"],
+    )
+    assert response.status_code == expected_answer["status"]
+    data = response.json()
+    for key, value in expected_answer["response"].items():
+        assert data[key] == value
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+@pytest.mark.asyncio
+async def tests_upload_raw_file_too_large(make_post_request, chunked: bool):
+    body = b"0" * (settings.STEAM_MAX_SIZE_FILE + 1)
+
+    async def body_stream():
+        for start in range(0, len(body), 1024 * 1024):
+            yield body[start : start + 1024 * 1024]
+
+    response = await make_post_request(
+        path="/api/files/upload/stream",
+        content=body_stream() if chunked else body,
+        headers={"X-File-Name": "too_large.bin"},
+    )
+    assert response.json() == {"detail": "File is too large."}
+    assert response.status_code == http.HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+@pytest.mark.asyncio
+async def tests_scan_files(make_post_request, make_get_request):
+    test_file = TEST_DATA_DIR / "common_text.txt"
+    uploaded_ids = set()
+    for _ in range(3):
+        with test_file.open("rb") as f:
+            response = await make_post_request(
+                files={"file": ("common_text.txt", f, "text/plain")},
+                path="/api/files/upload",
+            )
+        uploaded_ids.add(response.json()["id"])
+
+    seen_ids = []
+    cursor = None
+    while True:
+        query_params = {"page_size": 2}
+        if cursor:
+            query_params["cursor"] = cursor
+        response = await make_get_request(
+            path="/api/files/scan", query_params=query_params
+        )
+        assert response.status_code == http.HTTPStatus.OK
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen_ids.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen_ids) == len(set(seen_ids))
+    assert uploaded_ids <= set(seen_ids)
+
+
+@pytest.mark.asyncio
+async def tests_scan_files_invalid_cursor(make_get_request):
+    response = await make_get_request(
+        path="/api/files/scan", query_params={"cursor": "not-a-cursor"}
+    )
+    assert response.json() == {"detail": "Invalid cursor."}
+    assert response.status_code == http.HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.parametrize(
+    "query, expected_answer",
+    [
+        (
+            {
+                "path": "/api/files/upload/batch",
+                "data": {"file_names": ["common_text.txt", "large_text.txt"]},
+            },
+            {
+                "response": [
+                    {"file_old_name": "common_text.txt", "status_code": 200},
+                    {
+                        "file_old_name": "large_text.txt",
+                        "status_code": 413,
+                        "detail": "File is too large.",
+                    },
+                ],
+                "status": http.HTTPStatus.OK,
+            },
+        )
+    ],
+)
+@pytest.mark.asyncio
+async def tests_upload_files_batch(
+    make_post_request,
+    make_get_request,
+    query: dict,
+    expected_answer: dict,
+):
+    files = [
+        ("files", (file_name, (TEST_DATA_DIR / file_name).read_bytes(), "text/plain"))
+        for file_name in query["data"]["file_names"]
+    ]
+    response = await make_post_request(path=query["path"], files=files)
+    assert response.status_code == expected_answer["status"]
+    results = response.json()
+    for result, expected in zip(results, expected_answer["response"]):
+        for key, value in expected.items():
+            assert result[key] == value
+
+    saved = results[0]["file"]
+    assert saved["file_size"] == 110100
+    get_response = await make_get_request(path=f"/api/files/{saved['id']}")
+    assert get_response.json() == saved
+    assert results[1]["file"] is None
+
+
+@pytest.mark.asyncio
+async def tests_upload_files_metadata_writer(
+    monkeypatch, make_post_request, make_get_request
+):
+    monkeypatch.setattr(settings, "METADATA_WRITER_ENABLED", True)
+    monkeypatch.setattr(metadata_writer, "max_delay", 0.05)
+    before = metadata_writer.stats()["batch_size"]
+    content = (TEST_DATA_DIR / "common_text.txt").read_bytes()
+
+    responses = await asyncio.gather(
+        *(
+            make_post_request(
+                path="/api/files/upload",
+                files={"file": (f"text_{index}.txt", content, "text/plain")},
+            )
+            for index in range(20)
+        )
+    )
+    assert all(response.status_code == http.HTTPStatus.OK for response in responses)
+    ids = {response.json()["id"] for response in responses}
+    assert len(ids) == 20
+
+    after = metadata_writer.stats()["batch_size"]
+    assert after["sum"] - before["sum"] == 20
+    assert after["count"] - before["count"] < 20
+
+    for response in responses:
+        file = await make_get_request(path=f"/api/files/{response.json()['id']}")
+        assert file.json()["file_old_name"] == response.json()["file_old_name"]
+
+
+@pytest.mark.parametrize("batch", [True, False])
+@pytest.mark.asyncio
+async def tests_upload_content_addressed(monkeypatch, make_post_request, batch: bool):
+    monkeypatch.setattr(settings, "STORAGE_LAYOUT", "content_addressed")
+    content = uuid.uuid4().bytes * 256
+    other_content = uuid.uuid4().bytes * 256
+    uploads = [("a.bin", content), ("b.bin", content), ("c.bin", other_content)]
+    if batch:
+        # Одинаковые файлы в одной пачке - одна строка блоба с двумя ссылками
+        response = await make_post_request(
+            path="/api/files/upload/batch",
+            files=[
+                ("files", (name, data, "application/octet-stream"))
+                for name, data in uploads
+            ],
+        )
+        saved = [result["file"] for result in response.json()]
+    else:
+        saved = []
+        for name, data in uploads:
+            response = await make_post_request(
+                path="/api/files/upload",
+                files={"file": (name, data, "application/octet-stream")},
+            )
+            saved.append(response.json())
+    ids = [uuid.UUID(file["id"]) for file in saved]
+
+    try:
+        digest = hashlib.sha256(content).hexdigest()
+        blob_path = STORAGE_ROOT / saved[0]["file_path"]
+        assert saved[0]["file_path"] == saved[1]["file_path"]
+        assert blob_path.is_relative_to(BLOBS_DIR) and blob_path.name == digest
+        assert list(blob_path.parent.iterdir()) == [blob_path]
+        assert blob_path.read_bytes() == content
+
+        other_path = STORAGE_ROOT / saved[2]["file_path"]
+        assert other_path != blob_path
+        assert other_path.read_bytes() == other_content
+
+        async with db_session.session_factory() as session:
+            blobs = await session.scalars(
+                select(Blobs).where(
+                    Blobs.digest.in_([digest, hashlib.sha256(other_content).hexdigest()])
+                )
+            )
+            ref_counts = {blob.file_path: blob.ref_count for blob in blobs}
+        assert ref_counts == {
+            saved[0]["file_path"]: 2,
+            saved[2]["file_path"]: 1,
+        }
+    finally:
+        async with db_session.session_factory() as session:
+            await soft_delete_files(session, ids)
+        await GarbageCollector(db_session.session_factory).purge_deleted_files(file_ids=ids)
+    assert not blob_path.exists()
+
+
+@pytest.mark.parametrize("batch", [True, False])
+@pytest.mark.asyncio
+async def tests_upload_files_publish_failed(monkeypatch, make_get_request, batch: bool):
+    monkeypatch.setattr(settings, "STORAGE_LAYOUT", "by_type")
+    monkeypatch.setattr(settings, "METADATA_WRITER_ENABLED", True)
+    monkeypatch.setattr(metadata_writer, "max_delay", 0.05)
+    prefix = uuid.uuid4().hex
+    names = [f"{prefix}-{index}.txt" for index in range(4)]
+    broken = names[1]
+    discarded = []
+    publish_file = files_crud.publish_file
+
+    async def publish_or_fail(row):
+        if row.file_old_name == broken:
+            discarded.append(row.staged.temp_path)
+            raise OSError("publish failed")
+        await publish_file(row)
+
+    monkeypatch.setattr(files_crud, "publish_file", publish_or_fail)
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+    try:
+        async with AsyncClient(base_url=settings.HOST_URL, transport=transport) as client:
+            if batch:
+                response = await client.post(
+                    "/api/files/upload/batch",
+                    files=[("files", (name, name.encode(), "text/plain")) for name in names],
+                )
+                results = response.json()
+                status_codes = [result["status_code"] for result in results]
+                saved = [result["file"] for result in results if result["file"]]
+            else:
+                # Загрузки попадают в одну пачку metadata_writer
+                responses = await asyncio.gather(
+                    *(
+                        client.post(
+                            "/api/files/upload",
+                            files={"file": (name, name.encode(), "text/plain")},
+                        )
+                        for name in names
+                    )
+                )
+                status_codes = [response.status_code for response in responses]
+                saved = [r.json() for r in responses if r.status_code == http.HTTPStatus.OK]
+
+        assert status_codes == [200, 500, 200, 200]
+        assert [file["file_old_name"] for file in saved] == [names[0], *names[2:]]
+        for file in saved:
+            response = await make_get_request(path=f"/api/files/{file['id']}/content")
+            assert response.content == file["file_old_name"].encode()
+        assert len(discarded) == 1 and not discarded[0].exists()
+        async with db_session.session_factory() as session:
+            deleted_at = await session.scalar(
+                select(Files.deleted_at).where(Files.file_old_name == broken)
+            )
+        assert deleted_at is not None
+    finally:
+        async with db_session.session_factory() as session:
+            await session.execute(delete(Files).where(Files.file_old_name == broken))
+            await session.commit()
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+@pytest.mark.parametrize(
+    "accept_encoding, compressed",
+    [("identity", False), ("gzip", True), ("gzip;q=0, identity", False), ("*", True)],
+)
+@pytest.mark.asyncio
+async def tests_export_files(
+    make_post_request,
+    make_get_request,
+    export_format: str,
+    accept_encoding: str,
+    compressed: bool,
+):
+    file_format = f"text/x-export-{uuid.uuid4().hex}"
+    with (TEST_DATA_DIR / "common_text.txt").open("rb") as f:
+        uploaded = await make_post_request(
+            files={"file": ("common_text.txt", f, file_format)},
+            path="/api/files/upload",
+        )
+
+    response = await make_get_request(
+        path="/api/files/export",
+        query_params={"format": export_format, "file_format": file_format},
+        headers={"Accept-Encoding": accept_encoding},
+    )
+    assert response.status_code == http.HTTPStatus.OK
+    assert (response.headers.get("content-encoding") == "gzip") == compressed
+    assert response.headers["vary"] == "Accept-Encoding"
+    if export_format == "csv":
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+    else:
+        rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [uploaded.json()["id"]]
+    assert int(rows[0]["file_size"]) == uploaded.json()["file_size"]
+
+
+@pytest.mark.parametrize("by_ids", [True, False])
+@pytest.mark.asyncio
+async def tests_archive_files(monkeypatch, make_post_request, by_ids: bool):
+    monkeypatch.setattr(settings, "COMPRESSION_CODEC", "gzip")
+    prefix = uuid.uuid4().hex
+    files = [
+        (f"{prefix}.txt", b"text " * 1000, "text/plain"),
+        (f"{prefix}.txt", b"other text", "text/csv"),
+        (f"{prefix}.png", os.urandom(2048), "image/png"),
+    ]
+    ids = []
+    for name, content, content_type in files:
+        response = await make_post_request(
+            path="/api/files/upload", files={"file": (name, content, content_type)}
+        )
+        ids.append(response.json()["id"])
+
+    if by_ids:
+        body = {"ids": ids + [str(uuid.uuid4())]}
+    else:
+        body = {"filters": {"name_contains": prefix}}
+    response = await make_post_request(path="/api/files/archive", json=body)
+    assert response.status_code == http.HTTPStatus.OK
+    assert response.headers["content-type"] == "application/zip"
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.testzip() is None
+        infos = archive.infolist()
+        assert [info.filename for info in infos] == [
+            f"{prefix}.txt",
+            f"{prefix} (1).txt",
+            f"{prefix}.png",
+        ]
+        assert [info.compress_type for info in infos] == [
+            zipfile.ZIP_DEFLATED,
+            zipfile.ZIP_DEFLATED,
+            zipfile.ZIP_STORED,
+        ]
+        assert [archive.read(info) for info in infos] == [
+            content for _, content, _ in files
+        ]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [{}, {"ids": []}, {"ids": [str(uuid.uuid4())], "filters": {}}],
+)
+@pytest.mark.asyncio
+async def tests_archive_files_invalid_request(make_post_request, body: dict):
+    response = await make_post_request(path="/api/files/archive", json=body)
+    assert response.status_code == http.HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.parametrize(
+    "query_params, expected_names",
+    [
+        ({"file_format": "{format}"}, ["a.txt", "b.txt", "c.csv"]),
+        ({"file_format": "{format}", "sort": "-created_at"}, ["c.csv", "b.txt", "a.txt"]),
+        ({"name_contains": "{prefix}", "sort": "file_size"}, ["b.txt", "c.csv", "a.txt"]),
+        (
+            {"name_contains": "{prefix}", "sort": "-file_size", "size_min": 15},
+            ["a.txt", "c.csv"],
+        ),
+        ({"name_contains": "{prefix}", "file_extension": ".txt"}, ["a.txt", "b.txt"]),
+        ({"sort": "name", "name_prefix": "{prefix}-b"}, ["b.txt"]),
+        ({"sort": "-name", "name_prefix": "{prefix}"}, ["c.csv", "b.txt", "a.txt"]),
+    ],
+)
+@pytest.mark.asyncio
+async def tests_get_files_filtered(
+    make_post_request,
+    make_get_request,
+    query_params: dict,
+    expected_names: list[str],
+):
+    prefix = uuid.uuid4().hex
+    file_format = f"text/x-listing-{prefix}"
+    for name, size in (("a.txt", 30), ("b.txt", 10), ("c.csv", 20)):
+        await make_post_request(
+            path="/api/files/upload",
+            files={"file": (f"{prefix}-{name}", b"x" * size, file_format)},
+        )
+
+    query_params = {
+        key: value.format(prefix=prefix, format=file_format)
+        if isinstance(value, str)
+        else value
+        for key, value in query_params.items()
+    }
+    response = await make_get_request(
+        path="/api/files/", query_params={"page_size": 100} | query_params
+    )
+    assert response.status_code == http.HTTPStatus.OK
+    names = [
+        item["file_old_name"].removeprefix(f"{prefix}-") for item in response.json()
+    ]
+    assert names == expected_names
+
+
+@pytest.mark.parametrize(
+    "query_params, status_code",
+    [
+        (
+            {"file_format": "text/plain", "file_extension": ".txt"},
+            http.HTTPStatus.BAD_REQUEST,
+        ),
+        ({"file_format": "text/plain", "sort": "file_size"}, http.HTTPStatus.BAD_REQUEST),
+        ({"size_min": 10}, http.HTTPStatus.BAD_REQUEST),
+        (
+            {"created_from": "2024-01-01T00:00:00Z", "sort": "name"},
+            http.HTTPStatus.BAD_REQUEST,
+        ),
+        ({"name_prefix": "abc"}, http.HTTPStatus.BAD_REQUEST),
+        # Слишком короткая подстрока отклоняется валидацией параметра
+        ({"name_contains": "ab"}, http.HTTPStatus.UNPROCESSABLE_ENTITY),
+    ],
+)
+@pytest.mark.asyncio
+async def tests_get_files_unsupported_filters(
+    make_get_request, query_params: dict, status_code: int
+):
+    response = await make_get_request(path="/api/files/", query_params=query_params)
+    assert response.status_code == status_code
+
+
+@pytest.mark.asyncio
+async def tests_delete_file(make_post_request, make_get_request, make_delete_request):
+    test_file = TEST_DATA_DIR / "common_text.txt"
+    file_name = f"{uuid.uuid4().hex}.txt"
+    with test_file.open("rb") as f:
+        response = await make_post_request(
+            files={"file": (file_name, f, "text/plain")}, path="/api/files/upload"
+        )
+    file_id = response.json()["id"]
+
+    response = await make_delete_request(path=f"/api/files/{file_id}")
+    assert response.status_code == http.HTTPStatus.NO_CONTENT
+
+    response = await make_get_request(path=f"/api/files/{file_id}")
+    assert response.status_code == http.HTTPStatus.NOT_FOUND
+    response = await make_get_request(path=f"/api/files/{file_id}/content")
+    assert response.status_code == http.HTTPStatus.NOT_FOUND
+    response = await make_get_request(
+        path="/api/files/", query_params={"name_prefix": file_name, "sort": "name"}
+    )
+    assert response.json() == []
+
+    response = await make_delete_request(path=f"/api/files/{file_id}")
+    assert response.status_code == http.HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.parametrize("codec", ["gzip", "zstd"])
+@pytest.mark.parametrize(
+    "query_params", [{"large": "false"}, {"large": "true", "chunk_size": 4096}]
+)
+@pytest.mark.asyncio
+async def tests_upload_compressed_file(
+    monkeypatch,
+    async_client,
+    make_post_request,
+    make_get_request,
+    codec: str,
+    query_params: dict,
+):
+    monkeypatch.setattr(settings, "STORAGE_LAYOUT", "by_type")
+    monkeypatch.setattr(settings, "COMPRESSION_CODEC", codec)
+    content = b"2024-01-01 INFO request handled in 12ms\n" * 2000
+    response = await make_post_request(
+        files={"file": (f"{uuid.uuid4().hex}.log", content, "text/plain")},
+        path="/api/files/upload",
+        query_params=query_params,
+    )
+    assert response.status_code == http.HTTPStatus.OK
+    file = response.json()
+    assert file["codec"] == codec
+    assert file["file_size"] == len(content)
+    assert file["stored_size"] < len(content) // 10
+
+    response = await make_get_request(
+        path=f"/api/files/{file['id']}/content",
+        headers={"Accept-Encoding": "identity"},
+    )
+    assert response.status_code == http.HTTPStatus.OK
+    assert "content-encoding" not in response.headers
+    assert response.headers["accept-ranges"] == "none"
+    assert response.content == content
+
+    # Диапазон сжатого представления не распаковать, читаем тело как есть
+    async with async_client.stream(
+        "GET",
+        f"/api/files/{file['id']}/content",
+        headers={"Accept-Encoding": file["codec"], "Range": "bytes=0-9"},
+    ) as response:
+        body = b"".join([chunk async for chunk in response.aiter_raw()])
+    assert response.status_code == http.HTTPStatus.PARTIAL_CONTENT
+    assert response.headers["content-encoding"] == file["codec"]
+    assert response.headers["content-range"].endswith(f"/{file['stored_size']}")
+    assert len(body) == 10
+
+
+@pytest.mark.asyncio
+async def tests_upload_incompressible_file(monkeypatch, make_post_request):
+    monkeypatch.setattr(settings, "STORAGE_LAYOUT", "by_type")
+    monkeypatch.setattr(settings, "COMPRESSION_CODEC", "gzip")
+    response = await make_post_request(
+        files={"file": (f"{uuid.uuid4().hex}.png", os.urandom(1024), "image/png")},
+        path="/api/files/upload",
+    )
+    assert response.status_code == http.HTTPStatus.OK
+    assert response.json()["codec"] is None
+    assert response.json()["stored_size"] == 1024
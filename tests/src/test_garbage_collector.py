@@ -0,0 +1,167 @@
+import http
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, select, update
+
+import src.services.storage as storage_module
+from src.core.settings import STORAGE_ROOT, settings
+from src.db.session import db_session
+from src.models.blobs import Blobs
+from src.models.files import Files
+from src.services import garbage_collector
+from src.services.crud.files import soft_delete_files
+from src.services.file_stats import record_file_stats
+from src.services.garbage_collector import GarbageCollector
+from src.services.storage import LocalStorage
+
+# Строки тестов датируются этим моментом, а возраст в настройках сборщика мусора
+# подбирается так, чтобы он видел только их, а не всю общую базу
+TEST_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+def age_of_test_rows() -> int:
+    return int((datetime.now(timezone.utc) - TEST_EPOCH - timedelta(hours=1)).total_seconds())
+
+
+async def upload(make_post_request, content: bytes) -> dict:
+    response = await make_post_request(
+        files={"file": (f"{uuid.uuid4().hex}.txt", content, "text/plain")},
+        path="/api/files/upload",
+    )
+    assert response.status_code == http.HTTPStatus.OK
+    return response.json()
+
+
+async def file_exists_in_base(file_id: str) -> bool:
+    async with db_session.session_factory() as session:
+        return await session.scalar(select(Files.id).where(Files.id == file_id)) is not None
+
+
+async def backdate_deletion(file_id: str) -> None:
+    async with db_session.session_factory() as session:
+        await session.execute(
+            update(Files).where(Files.id == file_id).values(deleted_at=TEST_EPOCH)
+        )
+        await session.commit()
+
+
+async def remove_rows(*file_ids) -> None:
+    async with db_session.session_factory() as session:
+        await soft_delete_files(session, file_ids)
+        await session.execute(delete(Files).where(Files.id.in_(file_ids)))
+        await session.commit()
+
+
+@pytest.mark.parametrize("storage_layout", ["by_type", "content_addressed"])
+@pytest.mark.asyncio
+async def tests_gc_purge_deleted_files(
+    monkeypatch,
+    make_post_request,
+    make_delete_request,
+    storage_layout: str,
+):
+    monkeypatch.setattr(settings, "STORAGE_LAYOUT", storage_layout)
+    monkeypatch.setattr(settings.gc_settings, "GC_RETENTION", age_of_test_rows())
+    content = uuid.uuid4().bytes * 64
+    first = await upload(make_post_request, content)
+    second = await upload(make_post_request, content)
+    gc = GarbageCollector(db_session.session_factory)
+
+    await make_delete_request(path=f"/api/files/{first['id']}")
+    assert await gc.purge_deleted_files() == 0  # удалён только что, срок не прошёл
+    await backdate_deletion(first["id"])
+    assert await gc.purge_deleted_files() == 1
+    assert not await file_exists_in_base(first["id"])
+    assert (STORAGE_ROOT / second["file_path"]).read_bytes() == content
+    if storage_layout == "by_type":
+        assert not (STORAGE_ROOT / first["file_path"]).exists()
+
+    await make_delete_request(path=f"/api/files/{second['id']}")
+    await backdate_deletion(second["id"])
+    assert await gc.purge_deleted_files() == 1
+    assert not await file_exists_in_base(second["id"])
+    assert not (STORAGE_ROOT / second["file_path"]).exists()
+    async with db_session.session_factory() as session:
+        assert not await session.scalar(
+            select(Blobs.id).where(Blobs.file_path == second["file_path"])
+        )
+
+
+@pytest.mark.asyncio
+async def tests_gc_purge_selected_files(make_post_request, make_delete_request):
+    deleted = await upload(make_post_request, uuid.uuid4().bytes)
+    live = await upload(make_post_request, uuid.uuid4().bytes)
+    await make_delete_request(path=f"/api/files/{deleted['id']}")
+    gc = GarbageCollector(db_session.session_factory)
+
+    try:
+        # Срок GC_RETENTION не ждём, неудалённые строки из списка не трогаем
+        assert await gc.purge_deleted_files(
+            file_ids=[uuid.UUID(deleted["id"]), uuid.UUID(live["id"])]
+        ) == 1
+        assert not await file_exists_in_base(deleted["id"])
+        assert not (STORAGE_ROOT / deleted["file_path"]).exists()
+        assert await file_exists_in_base(live["id"])
+    finally:
+        await remove_rows(live["id"])
+
+
+@pytest.mark.asyncio
+async def tests_gc_remove_orphan_files(monkeypatch, make_post_request, tmp_path):
+    monkeypatch.setattr(settings, "STORAGE_LAYOUT", "by_type")
+    monkeypatch.setattr(settings.gc_settings, "GC_ORPHAN_MIN_AGE", 0)
+    monkeypatch.setattr(garbage_collector, "STORAGE_ROOT", tmp_path)
+    monkeypatch.setattr(garbage_collector, "UPLOAD_DIR", tmp_path / "media")
+    monkeypatch.setattr(garbage_collector, "BLOBS_DIR", tmp_path / "media" / "blobs")
+    monkeypatch.setattr(storage_module, "_storages", {"local": LocalStorage(tmp_path)})
+    uploaded = await upload(make_post_request, b"referenced")
+    referenced = tmp_path / uploaded["file_path"]
+    assert referenced.exists()
+    orphan = referenced.parent / f"{uuid.uuid4().hex}.txt"
+    orphan.write_bytes(b"orphan")
+
+    try:
+        assert await GarbageCollector(db_session.session_factory).remove_orphan_files() == 1
+        assert not orphan.exists()
+        assert referenced.exists()
+    finally:
+        await remove_rows(uploaded["id"])
+
+
+@pytest.mark.parametrize("action", ["report", "soft_delete"])
+@pytest.mark.asyncio
+async def tests_gc_find_missing_files(
+    monkeypatch,
+    make_get_request,
+    action: str,
+):
+    monkeypatch.setattr(settings.gc_settings, "GC_ORPHAN_MIN_AGE", age_of_test_rows())
+    monkeypatch.setattr(settings.gc_settings, "GC_MISSING_FILE_ACTION", action)
+    name = f"{uuid.uuid4().hex}.txt"
+    missing = Files(
+        file_size=7,
+        file_path=f"media/text_plain/{name}",
+        file_format="text/plain",
+        file_old_name=name,
+        file_new_name=name,
+        file_extension=".txt",
+        created_at=TEST_EPOCH,
+    )
+    async with db_session.session_factory() as session:
+        session.add(missing)
+        await session.flush()
+        await record_file_stats(session, [missing])
+        file_id = missing.id
+        await session.commit()
+
+    try:
+        assert await GarbageCollector(db_session.session_factory).find_missing_files() == 1
+        response = await make_get_request(path=f"/api/files/{file_id}")
+        if action == "soft_delete":
+            assert response.status_code == http.HTTPStatus.NOT_FOUND
+        else:
+            assert response.status_code == http.HTTPStatus.OK
+    finally:
+        await remove_rows(file_id)
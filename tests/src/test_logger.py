@@ -0,0 +1,81 @@
+import io
+import json
+import logging
+import queue
+import time
+from logging.handlers import QueueListener
+
+import pytest
+
+from src.core.settings import settings
+from src.utils.logger import (
+    AccessLogSampler,
+    JsonFormatter,
+    LogQueueHandler,
+    build_logging_config,
+)
+
+
+def make_access_record(status_code: int) -> logging.LogRecord:
+    return logging.LogRecord(
+        "uvicorn.access",
+        logging.INFO,
+        __file__,
+        1,
+        '%s - "%s %s HTTP/%s" %d',
+        ("127.0.0.1:5000", "GET", "/api/files/", "1.1", status_code),
+        None,
+    )
+
+
+def tests_queue_logging_json():
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    log_queue = queue.Queue()
+    listener = QueueListener(log_queue, handler)
+    logger = logging.getLogger("tests.queue_logging")
+    logger.propagate = False
+    logger.addHandler(LogQueueHandler(log_queue))
+    listener.start()
+    try:
+        logger.warning("uploaded %s files", 3)
+        logger.handle(make_access_record(201))
+    finally:
+        listener.stop()
+
+    first, access = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert first["message"] == "uploaded 3 files"
+    assert first["level"] == "WARNING"
+    assert first["logger"] == "tests.queue_logging"
+    assert access["status_code"] == 201
+    assert access["path"] == "/api/files/"
+
+
+def tests_access_log_sampler(monkeypatch):
+    monkeypatch.setattr(time, "monotonic", lambda: 100.0)
+    sampler = AccessLogSampler(sample_rate=0.0)
+    assert not sampler.filter(make_access_record(200))
+    assert sampler.filter(make_access_record(404))
+    assert sampler.filter(make_access_record(500))
+
+    sampler = AccessLogSampler(max_per_second=2)
+    passed = [sampler.filter(make_access_record(200)) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert sampler.dropped == 3
+
+
+@pytest.mark.parametrize("queue_enabled", [True, False])
+def tests_build_logging_config(monkeypatch, queue_enabled: bool):
+    monkeypatch.setattr(settings.log_settings, "LOG_QUEUE_ENABLED", queue_enabled)
+    monkeypatch.setattr(settings.log_settings, "LOG_RENDERER", "json")
+    config = build_logging_config()
+    assert config["handlers"]["filehandler"]["formatter"] == "json"
+    assert config["handlers"]["filehandler"]["maxBytes"] == (
+        settings.log_settings.LOG_FILE_MAX_BYTES
+    )
+    if queue_enabled:
+        assert config["root"]["handlers"] == ["queue"]
+        assert config["handlers"]["queue"]["handlers"] == ["filehandler", "console"]
+    else:
+        assert config["root"]["handlers"] == ["filehandler", "console"]
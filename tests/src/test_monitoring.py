@@ -0,0 +1,100 @@
+import http
+
+import pytest
+from src.core.settings import settings
+from src.services import upload_metrics
+from tests.settings import TEST_DATA_DIR
+
+
+@pytest.mark.asyncio
+async def tests_db_pool_stats(make_get_request):
+    await make_get_request(path="/api/files/", query_params={"page_size": 1})
+    response = await make_get_request(path="/api/monitoring/db-pool")
+    assert response.status_code == http.HTTPStatus.OK
+    data = response.json()
+    assert data["pool_size"] >= 1
+    assert 0 <= data["saturation"] <= 1
+    assert data["checkout_wait_seconds"]["count"] >= 1
+
+
+@pytest.mark.asyncio
+async def tests_file_cache_stats(make_post_request, make_get_request):
+    test_file = TEST_DATA_DIR / "common_text.txt"
+    with test_file.open("rb") as f:
+        response = await make_post_request(
+            files={"file": ("common_text.txt", f, "text/plain")},
+            path="/api/files/upload",
+        )
+    file_id = response.json()["id"]
+
+    before = (await make_get_request(path="/api/monitoring/cache")).json()
+    first = await make_get_request(path=f"/api/files/{file_id}")
+    second = await make_get_request(path=f"/api/files/{file_id}")
+    after = (await make_get_request(path="/api/monitoring/cache")).json()
+
+    assert first.json() == second.json()
+    assert after["misses"] == before["misses"] + 1
+    assert after["local_hits"] == before["local_hits"] + 1
+
+
+@pytest.mark.asyncio
+async def tests_io_executor_stats(make_post_request, make_get_request):
+    before = (await make_get_request(path="/api/monitoring/io-executor")).json()
+    test_file = TEST_DATA_DIR / "common_text.txt"
+    with test_file.open("rb") as f:
+        await make_post_request(
+            files={"file": ("common_text.txt", f, "text/plain")},
+            path="/api/files/upload",
+        )
+    response = await make_get_request(path="/api/monitoring/io-executor")
+    assert response.status_code == http.HTTPStatus.OK
+    data = response.json()
+    assert data["max_workers"] == settings.IO_EXECUTOR_WORKERS
+    assert data["queued"] == 0
+    assert data["in_flight"] == 0
+    assert (
+        data["queue_wait_seconds"]["count"] > before["queue_wait_seconds"]["count"]
+    )
+
+
+def parse_metrics(text: str) -> dict[str, float]:
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+@pytest.mark.asyncio
+async def tests_prometheus_metrics(monkeypatch, make_post_request, make_get_request):
+    traces = []
+    monkeypatch.setattr(settings, "TRACE_SLOW_REQUEST_SECONDS", 0.0)
+    monkeypatch.setattr(settings, "METADATA_WRITER_ENABLED", False)
+    monkeypatch.setattr(
+        upload_metrics, "trace_hooks", [lambda trace, duration: traces.append(trace)]
+    )
+    before = parse_metrics((await make_get_request(path="/metrics")).text)
+    test_file = TEST_DATA_DIR / "common_text.txt"
+    with test_file.open("rb") as f:
+        await make_post_request(
+            files={"file": ("common_text.txt", f, "text/plain")},
+            path="/api/files/upload",
+        )
+    response = await make_get_request(path="/metrics")
+    assert response.status_code == http.HTTPStatus.OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = parse_metrics(response.text)
+
+    for stage in ("body_receive", "disk_write", "db_insert", "refresh", "publish"):
+        key = f'upload_stage_duration_seconds_count{{stage="{stage}"}}'
+        assert after[key] == before[key] + 1
+    assert after["upload_written_bytes_total"] > before["upload_written_bytes_total"]
+    assert after["upload_received_bytes_total"] > before["upload_received_bytes_total"]
+    assert after["uploads_in_flight"] == 0
+    assert "db_pool_checked_out" in after
+    assert "io_executor_queued" in after
+
+    (trace,) = traces
+    assert trace.path == "/api/files/upload"
+    assert [span.name for span in trace.spans][:2] == ["body_receive", "disk_write"]
@@ -0,0 +1,47 @@
+import http
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from src.core.settings import STORAGE_ROOT, settings
+from src.db.session import db_session
+from src.models.files import Files
+from src.services.relocate_files import relocate_files
+from tests.settings import TEST_DATA_DIR
+
+
+@pytest.mark.parametrize("shard_depth", [0, 3])
+@pytest.mark.asyncio
+async def tests_relocate_files(
+    monkeypatch,
+    make_post_request,
+    make_get_request,
+    shard_depth: int,
+):
+    monkeypatch.setattr(settings, "STORAGE_LAYOUT", "by_type")
+    test_file = TEST_DATA_DIR / "common_text.txt"
+    with test_file.open("rb") as f:
+        response = await make_post_request(
+            files={"file": (f"{uuid.uuid4().hex}.txt", f, "text/plain")},
+            path="/api/files/upload",
+        )
+    file_id = response.json()["id"]
+    old_path = STORAGE_ROOT / response.json()["file_path"]
+
+    monkeypatch.setattr(settings, "STORAGE_SHARD_DEPTH", shard_depth)
+    await relocate_files(batch_size=2, grace=0)
+
+    async with db_session.session_factory() as session:
+        new_path = STORAGE_ROOT / await session.scalar(
+            select(Files.file_path).where(Files.id == file_id)
+        )
+    assert new_path != old_path
+    assert not old_path.exists()
+    assert len(new_path.relative_to(STORAGE_ROOT / "media" / "text_plain").parts) == (
+        shard_depth + 1
+    )
+
+    response = await make_get_request(path=f"/api/files/{file_id}/content")
+    assert response.status_code == http.HTTPStatus.OK
+    assert response.content == test_file.read_bytes()
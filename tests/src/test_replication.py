@@ -0,0 +1,97 @@
+import asyncio
+import http
+import uuid
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from src.core.settings import settings
+from src.db.session import db_session
+from src.services.cloud_storage import CloudStorageError, upload_to_cloud
+from src.services.replication import ReplicationWorker
+from tests.settings import TEST_DATA_DIR
+
+
+@pytest_asyncio.fixture
+async def fake_cloud(monkeypatch):
+    """
+    Локальный HTTP-сервер вместо облачного хранилища.
+    Первые fail_first запросов получают 500, остальные принимаются.
+    """
+    state = {"uploads": {}, "requests": 0, "fail_first": 0}
+
+    async def handle_upload(request: web.Request) -> web.Response:
+        state["requests"] += 1
+        if state["requests"] <= state["fail_first"]:
+            return web.Response(status=500)
+        form = await request.post()
+        state["uploads"][form["uuid"]] = form["file"].file.read()
+        return web.Response(status=200)
+
+    app = web.Application(client_max_size=1024 * 1024 * 10)
+    app.router.add_post("/upload", handle_upload)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    replication_settings = settings.replication_settings
+    monkeypatch.setattr(
+        replication_settings, "CLOUD_STORAGE_URL", f"http://127.0.0.1:{port}/upload"
+    )
+    monkeypatch.setattr(replication_settings, "REPLICATION_POLL_INTERVAL", 0.05)
+    monkeypatch.setattr(replication_settings, "REPLICATION_BACKOFF_BASE", 0.01)
+    yield state
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def tests_upload_to_cloud(fake_cloud):
+    test_file = TEST_DATA_DIR / "common_text.txt"
+    file_id = uuid.uuid4()
+    async with aiohttp.ClientSession() as http_session:
+        await upload_to_cloud(http_session, test_file, file_id)
+        assert fake_cloud["uploads"][str(file_id)] == test_file.read_bytes()
+
+        fake_cloud["fail_first"] = fake_cloud["requests"] + 1
+        with pytest.raises(CloudStorageError):
+            await upload_to_cloud(http_session, test_file, file_id)
+
+
+@pytest.mark.parametrize("fail_first", [0, 1])
+@pytest.mark.asyncio
+async def tests_replication_worker(
+    fake_cloud,
+    monkeypatch,
+    make_post_request,
+    make_get_request,
+    fail_first: int,
+):
+    monkeypatch.setattr(settings.replication_settings, "REPLICATION_ENABLED", True)
+    fake_cloud["fail_first"] = fail_first
+    test_file = TEST_DATA_DIR / "common_text.txt"
+    with test_file.open("rb") as f:
+        response = await make_post_request(
+            files={"file": ("common_text.txt", f, "text/plain")},
+            path="/api/files/upload",
+        )
+    data = response.json()
+    assert data["replication_status"] == "pending"
+
+    worker = ReplicationWorker(db_session.session_factory)
+    await worker.start()
+    try:
+        for _ in range(100):
+            get_response = await make_get_request(path=f"/api/files/{data['id']}")
+            if get_response.json()["replication_status"] == "replicated":
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await worker.stop()
+
+    assert get_response.status_code == http.HTTPStatus.OK
+    assert get_response.json()["replication_status"] == "replicated"
+    assert fake_cloud["uploads"][data["id"]] == test_file.read_bytes()
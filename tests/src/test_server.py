@@ -0,0 +1,116 @@
+import importlib.util
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from src.core.settings import BASE_DIR, settings
+from src.db.session import DatabaseHelper
+from src.services.cache import create_file_cache
+from src.server import (
+    bind_socket,
+    resolve_http,
+    resolve_loop,
+    resolve_workers,
+    worker_request_limit,
+)
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def tests_resolve_workers():
+    assert resolve_workers(3) == 3
+    assert resolve_workers(0) >= 1
+
+
+def tests_worker_request_limit():
+    assert worker_request_limit(0, 100) is None
+    assert worker_request_limit(100, 0) == 100
+    limits = {worker_request_limit(100, 10) for _ in range(200)}
+    assert min(limits) >= 100 and max(limits) <= 110 and len(limits) > 1
+
+
+def tests_resolve_loop_and_http(monkeypatch, caplog):
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: object())
+    assert (resolve_loop(), resolve_http()) == ("uvloop", "httptools")
+    assert not caplog.records
+
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    with caplog.at_level(logging.WARNING, logger="src.server"):
+        assert (resolve_loop(), resolve_http()) == ("asyncio", "h11")
+    assert [record.getMessage().split()[0] for record in caplog.records] == [
+        "uvloop",
+        "httptools",
+    ]
+
+
+def tests_bind_socket_reuse_port():
+    port = get_free_port()
+    first = bind_socket("127.0.0.1", port, True, 16)
+    second = bind_socket("127.0.0.1", port, True, 16)
+    try:
+        assert first.getsockname() == second.getsockname()
+    finally:
+        first.close()
+        second.close()
+
+
+def tests_file_cache_disabled_with_several_workers(monkeypatch):
+    server_settings = settings.server_settings
+    monkeypatch.setattr(server_settings, "SERVER_MODE", "production")
+    monkeypatch.setattr(settings, "FILE_CACHE_SHARED_BACKEND", "memory")
+    monkeypatch.setattr(server_settings, "SERVER_WORKERS", 2)
+    assert create_file_cache() is None
+    monkeypatch.setattr(server_settings, "SERVER_WORKERS", 1)
+    assert create_file_cache() is not None
+
+
+def tests_database_helper_reset_after_fork():
+    helper = DatabaseHelper(settings.db_settings.DATABASE_URL_ASYNC)
+    pool = helper.engine.pool
+    helper.reset_after_fork()
+    assert helper.engine.pool is not pool
+
+
+def tests_production_server():
+    port = get_free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "src.server",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            "2",
+        ],
+        cwd=BASE_DIR,
+        env=os.environ | {"SERVER_GRACEFUL_TIMEOUT": "5"},
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/metrics")
+                break
+            except httpx.TransportError:
+                assert time.monotonic() < deadline, "server did not start"
+                time.sleep(0.2)
+        assert response.status_code == 200
+        for _ in range(10):
+            assert httpx.get(f"http://127.0.0.1:{port}/api/monitoring/db-pool").status_code == 200
+        assert httpx.get(f"http://127.0.0.1:{port}/api/monitoring/cache").json() is None
+    finally:
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
@@ -0,0 +1,147 @@
+import asyncio
+import http
+import uuid
+
+import pytest
+from src.core.settings import UPLOAD_SESSIONS_DIR
+from tests.settings import TEST_DATA_DIR
+
+
+@pytest.mark.parametrize(
+    "query, expected_answer",
+    [
+        (
+            {
+                "path": "/api/files/uploads/",
+                "data": {
+                    "file_name": "common_text.txt",
+                    "part_size": 1024 * 64,
+                },
+            },
+            {
+                "response": {
+                    "file_size": 110100,
+                    "file_format": "text/plain",
+                    "file_old_name": "common_text.txt",
+                    "file_extension": ".txt",
+                },
+                "parts_count": 2,
+                "status": http.HTTPStatus.OK,
+            },
+        )
+    ],
+)
+@pytest.mark.asyncio
+async def tests_resumable_upload(
+    make_post_request,
+    make_put_request,
+    make_get_request,
+    query: dict,
+    expected_answer: dict,
+):
+    content = (TEST_DATA_DIR / query["data"]["file_name"]).read_bytes()
+    part_size = query["data"]["part_size"]
+    create_response = await make_post_request(
+        path=query["path"],
+        json={
+            "file_name": query["data"]["file_name"],
+            "file_format": "text/plain",
+            "file_size": len(content),
+            "part_size": part_size,
+        },
+    )
+    assert create_response.status_code == http.HTTPStatus.CREATED
+    upload = create_response.json()
+    assert upload["parts_count"] == expected_answer["parts_count"]
+    upload_path = f"{query['path']}{upload['id']}"
+
+    incomplete_response = await make_post_request(path=f"{upload_path}/complete")
+    assert incomplete_response.status_code == http.HTTPStatus.CONFLICT
+
+    part_responses = await asyncio.gather(
+        *(
+            make_put_request(
+                path=f"{upload_path}/parts/{index}",
+                content=content[index * part_size : (index + 1) * part_size],
+            )
+            for index in reversed(range(upload["parts_count"]))
+        )
+    )
+    assert all(r.status_code == http.HTTPStatus.OK for r in part_responses)
+    status_response = await make_get_request(path=upload_path)
+    assert status_response.json()["received_parts"] == [0, 1]
+
+    complete_response = await make_post_request(path=f"{upload_path}/complete")
+    assert complete_response.status_code == expected_answer["status"]
+    data = complete_response.json()
+    for key, value in expected_answer["response"].items():
+        assert data[key] == value
+
+    content_response = await make_get_request(path=f"/api/files/{data['id']}/content")
+    assert content_response.content == content
+
+
+@pytest.mark.parametrize(
+    "part, expected_status",
+    [
+        (b"0" * 10, http.HTTPStatus.BAD_REQUEST),
+        (b"0" * (1024 * 64 + 1), http.HTTPStatus.BAD_REQUEST),
+    ],
+)
+@pytest.mark.asyncio
+async def tests_resumable_upload_wrong_part_size(
+    make_post_request,
+    make_put_request,
+    make_delete_request,
+    part: bytes,
+    expected_status: http.HTTPStatus,
+):
+    create_response = await make_post_request(
+        path="/api/files/uploads/",
+        json={"file_name": "data.bin", "file_size": 1024 * 128, "part_size": 1024 * 64},
+    )
+    upload_id = create_response.json()["id"]
+    try:
+        response = await make_put_request(
+            path=f"/api/files/uploads/{upload_id}/parts/0", content=part
+        )
+        assert response.status_code == expected_status
+    finally:
+        await make_delete_request(path=f"/api/files/uploads/{upload_id}")
+
+
+@pytest.mark.parametrize("part_size", [2**31, 2**40])
+@pytest.mark.asyncio
+async def tests_resumable_upload_part_size_too_large(make_post_request, part_size: int):
+    response = await make_post_request(
+        path="/api/files/uploads/",
+        json={"file_name": "data.bin", "file_size": part_size, "part_size": part_size},
+    )
+    assert response.status_code == http.HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def tests_resumable_upload_allocates_parts_lazily(
+    make_post_request, make_put_request, make_delete_request
+):
+    part_size = 1024 * 1024
+    create_response = await make_post_request(
+        path="/api/files/uploads/",
+        json={"file_name": "lazy.bin", "file_size": part_size * 64, "part_size": part_size},
+    )
+    assert create_response.status_code == http.HTTPStatus.CREATED
+    upload_id = create_response.json()["id"]
+    temp_path = UPLOAD_SESSIONS_DIR / f"{uuid.UUID(upload_id).hex}.part"
+    try:
+        assert temp_path.stat().st_size == part_size * 64
+        assert temp_path.stat().st_blocks * 512 < part_size
+
+        response = await make_put_request(
+            path=f"/api/files/uploads/{upload_id}/parts/3", content=b"x" * part_size
+        )
+        assert response.status_code == http.HTTPStatus.OK
+        assert part_size <= temp_path.stat().st_blocks * 512 < part_size * 2
+    finally:
+        response = await make_delete_request(path=f"/api/files/uploads/{upload_id}")
+    assert response.status_code == http.HTTPStatus.NO_CONTENT
+    assert not temp_path.exists()